@@ -0,0 +1,143 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from metadata import MARKET_CAP_VALUE
+from scan_table import ScanTable
+
+# 섹터/업종 집계 (WRS)
+# 결과 행을 DataFrame으로 한 번 바꾼 뒤 groupby 한 번으로 구간(6mo/3mo/1mo)별 통계를 모두 계산합니다.
+# - MD: 중앙값, Mean: 평균, WRS: 시총 가중 평균 RS, Breadth: RS > 0 종목 비율(%), Count: 종목 수
+# 배치가 들어올 때마다 add()로 합계(개수/합/가중합/양수 개수)를 누적하고,
+# 중앙값만 마지막에 모아 둔 RS 값으로 한 번 계산합니다.
+WINDOWS = ['6mo', '3mo', '1mo']
+RS_COLUMNS = [f"RS_{w}" for w in WINDOWS]
+INDUSTRY_KEYS = ['Sector', 'Industry']
+SECTOR_KEYS = ['Sector']
+INVALID_GROUP_VALUES = ['N/A', 'nan', 'null', '']
+ROUND_DIGITS = 4
+
+_MC_UNITS = {'T': 1e12, 'B': 1e9, 'M': 1e6, 'K': 1e3}
+
+
+def parse_market_cap(value):
+    """'12.34B' 같은 시총 문자열 → 숫자 (없으면 NaN, 숫자 시총 컬럼이 없는 예전 결과 행용)"""
+    if value is None:
+        return np.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().upper()
+    if not text or text in ('N/A', 'NAN', 'NULL'):
+        return np.nan
+    scale = _MC_UNITS.get(text[-1], 1.0)
+    try:
+        return float(text[:-1] if text[-1] in _MC_UNITS else text) * scale
+    except ValueError:
+        return np.nan
+
+
+def rows_to_frame(rows):
+    """
+    결과 행(dict 리스트 또는 ScanTable) → 집계용 DataFrame (Sector, Industry, RS_*, MC)
+    Sector/Industry가 비어 있거나 RS_6mo가 없는 행은 기존 WRS 계산처럼 제외합니다.
+    MC는 메타데이터 단계의 숫자 시총(MARKET_CAP_VALUE)을 쓰고,
+    숫자 시총이 하나도 없는 행들(그 컬럼이 없던 예전 결과 등)만 표시용 'Market Cap' 문자열을 파싱합니다.
+    """
+    columns = INDUSTRY_KEYS + RS_COLUMNS + ['Market Cap', MARKET_CAP_VALUE]
+    frame = rows.to_frame(columns) if isinstance(rows, ScanTable) else pd.DataFrame(rows, columns=columns)
+    if frame.empty:
+        return pd.DataFrame(columns=INDUSTRY_KEYS + RS_COLUMNS + ['MC'])
+    valid = (frame['Sector'].notna() & ~frame['Sector'].astype(str).isin(INVALID_GROUP_VALUES) &
+             frame['Industry'].notna() & ~frame['Industry'].astype(str).isin(INVALID_GROUP_VALUES) &
+             frame['RS_6mo'].notna())
+    frame = frame[valid]
+    out = frame[INDUSTRY_KEYS].copy()
+    for col in RS_COLUMNS:
+        out[col] = pd.to_numeric(frame[col], errors='coerce').astype('float64')
+    mc = pd.to_numeric(frame[MARKET_CAP_VALUE], errors='coerce').astype('float64')
+    if mc.isna().all():
+        mc = frame['Market Cap'].map(parse_market_cap).astype('float64')
+    out['MC'] = mc
+    return out
+
+
+def _partial_sums(frame, keys):
+    """그룹별 가산 통계 (배치끼리 더할 수 있는 값만)"""
+    mc = frame['MC'].where(frame['MC'] > 0)
+    parts = {'Count': frame.groupby(keys, sort=False).size()}
+    columns = {}
+    for w, col in zip(WINDOWS, RS_COLUMNS):
+        rs = frame[col]
+        weighted = rs.notna() & mc.notna()
+        columns[f"n_{w}"] = rs.notna().astype('int64')
+        columns[f"sum_{w}"] = rs.fillna(0.0)
+        columns[f"pos_{w}"] = (rs > 0).astype('int64')
+        columns[f"wsum_{w}"] = (rs * mc).where(weighted, 0.0)
+        columns[f"mc_{w}"] = mc.where(weighted, 0.0)
+    sums = pd.DataFrame(columns, index=frame.index).join(frame[keys]).groupby(keys, sort=False).sum()
+    return sums.join(pd.DataFrame(parts))
+
+
+class GroupAggregator:
+    """
+    배치 단위로 누적되는 섹터/업종 통계
+    - add(rows): 배치 결과 행 추가 (그룹별 합계 누적, 중앙값용 RS 값 보관)
+    - result(): 그룹별 통계 DataFrame
+    - records(): result.json에 넣을 dict 리스트
+    """
+
+    def __init__(self, keys=INDUSTRY_KEYS):
+        self.keys = list(keys)
+        self._sums = None
+        self._values = []  # 중앙값 계산용 (keys + RS_* 컬럼만)
+
+    def add(self, rows):
+        frame = rows if isinstance(rows, pd.DataFrame) else rows_to_frame(rows)
+        if frame.empty:
+            return self
+        part = _partial_sums(frame, self.keys)
+        self._sums = part if self._sums is None else self._sums.add(part, fill_value=0)
+        self._values.append(frame[self.keys + RS_COLUMNS])
+        return self
+
+    def result(self):
+        if self._sums is None:
+            return pd.DataFrame()
+        sums = self._sums
+        medians = pd.concat(self._values, ignore_index=True).groupby(self.keys, sort=False)[RS_COLUMNS].median()
+
+        out = pd.DataFrame(index=sums.index)
+        out['Count'] = sums['Count'].astype('int64')
+        for w, col in zip(WINDOWS, RS_COLUMNS):
+            n = sums[f"n_{w}"]
+            out[f"WRS_{w}"] = (sums[f"wsum_{w}"] / sums[f"mc_{w}"]).where(sums[f"mc_{w}"] > 0)
+            out[f"WRS_{w}_MD"] = medians[col]
+            out[f"WRS_{w}_Mean"] = (sums[f"sum_{w}"] / n).where(n > 0)
+            out[f"Breadth_{w}"] = (sums[f"pos_{w}"] / n * 100).where(n > 0)
+            out[f"Count_{w}"] = n.astype('int64')
+        return out.sort_index().reset_index()
+
+    def records(self):
+        """
+        dict 리스트 (실수는 ROUND_DIGITS 자리, Breadth는 소수 2자리, NaN은 None)
+        기존 wrs_data 키(Sector, Industry, Count, WRS_6mo_MD)는 그대로 유지
+        """
+        out = self.result()
+        if out.empty:
+            return []
+        float_cols = [c for c in out.columns if c not in self.keys and not c.startswith('Count')]
+        for col in float_cols:
+            out[col] = out[col].round(2 if col.startswith('Breadth') else ROUND_DIGITS)
+        return json.loads(out.to_json(orient='records'))
+
+
+def aggregate(rows):
+    """
+    결과 행 전체 → (업종별 records, 섹터별 records)
+    행을 DataFrame으로 한 번만 바꿔 두 집계에서 같이 씁니다.
+    """
+    frame = rows_to_frame(rows)
+    industries = GroupAggregator(INDUSTRY_KEYS).add(frame)
+    sectors = GroupAggregator(SECTOR_KEYS).add(frame)
+    return industries.records(), sectors.records()
@@ -0,0 +1,260 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import aggregation
+import changes
+import history_store
+import payload
+import rs_engine
+import scan_table
+import utils
+from metrics import METRICS
+from price_store import PriceStore
+from sector_cache import SectorCache
+
+# 스캔 파이프라인 벤치마크 (네트워크 없음)
+# 합성 가격/메타데이터 픽스처(cache/bench/fixtures_<N>/)를 한 번 만들어 두고,
+# offline 모드로 get_market_cap_and_rs → 순위 → WRS 집계 → JSON 저장 단계를 돌리며
+# 단계별 실행 시간, 최대 메모리(tracemalloc), 메모리 블록 증가량을 측정합니다.
+# 결과는 BENCHMARK_RESULTS(로컬 파일, 저장소에는 커밋하지 않음)에 쌓아 두고,
+# 같은 머신(호스트 + 아키텍처)에서 잰 같은 규모의 직전 기록과 비교해 느려진 단계를 표시합니다.
+#
+#   python benchmark.py                      # 1.5k, 10k, 50k
+#   python benchmark.py --sizes 1500 --record
+BENCH_DIR = "cache/bench"
+BENCHMARK_RESULTS = "benchmark_results.json"
+DEFAULT_SIZES = [1500, 10000, 50000]
+HISTORY_DAYS = 260              # 픽스처 이력 길이 (영업일, 6mo 계산 + 여유)
+FIXTURE_END_DATE = "2025-12-31"  # 재현성을 위해 고정
+INDUSTRIES_PER_SECTOR = 12
+REGRESSION_THRESHOLD = 0.2      # 직전 기록보다 20% 넘게 느려지면 표시
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _ticker_name(i):
+    return f"S{i:05d}"
+
+
+def make_fixtures(n, root, seed=0):
+    """
+    n개 합성 티커 + 벤치마크의 가격(PriceStore 형식)과 메타데이터(SectorCache 형식) 픽스처 생성
+    이미 같은 규모로 만들어 둔 픽스처가 있으면 재사용합니다.
+    """
+    meta_path = os.path.join(root, "fixture.json")
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            if json.load(f).get('n') == n:
+                return root
+
+    print(f"픽스처 생성 중... ({n}개 → {root})")
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=FIXTURE_END_DATE, periods=HISTORY_DAYS)
+    tickers = [_ticker_name(i) for i in range(n)] + rs_engine.benchmark_tickers()
+
+    # 로그 수익률 누적합으로 가격 경로 생성 (일부 티커는 신규 상장처럼 이력을 짧게)
+    log_returns = rng.normal(0.0003, 0.02, size=(HISTORY_DAYS, len(tickers)))
+    closes = 50 * np.exp(np.cumsum(log_returns, axis=0))
+    starts = np.where(rng.random(len(tickers)) < 0.05, rng.integers(0, HISTORY_DAYS - 30, len(tickers)), 0)
+    starts[n:] = 0  # 벤치마크는 전체 이력
+
+    store = PriceStore(os.path.join(root, "prices"), offline=True)
+    fetched_on = datetime.utcnow().strftime('%Y-%m-%d')
+    for j, ticker in enumerate(tickers):
+        close = closes[starts[j]:, j]
+        df = pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+                           'Volume': rng.integers(1e5, 1e7, len(close))}, index=dates[starts[j]:])
+        store._save(ticker, df, fetched_on)
+    store.save_index()
+
+    sectors = list(rs_engine.SECTOR_ETFS)
+    cache = SectorCache(os.path.join(root, "sector_search.json"))
+    cache.load()
+    for i in range(n):
+        sector = sectors[i % len(sectors)]
+        cache[_ticker_name(i)] = {
+            'Sector': sector,
+            'Industry': f"{sector} {rng.integers(INDUSTRIES_PER_SECTOR)}",
+            'Shares': int(rng.integers(1e7, 1e10)),
+            'sector_updated': fetched_on,
+            'shares_updated': fetched_on,
+        }
+    cache.save(force=True)
+
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump({'n': n, 'seed': seed, 'days': HISTORY_DAYS, 'end': FIXTURE_END_DATE}, f)
+    return root
+
+
+class StageProfiler:
+    """stage(name) 블록마다 실행 시간, tracemalloc 최대 메모리, 메모리 블록 증가량을 기록"""
+
+    def __init__(self, trace=True):
+        self.trace = trace
+        self.stages = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        if self.trace:
+            tracemalloc.reset_peak()
+        blocks_before = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = {'seconds': round(time.perf_counter() - start, 4),
+                      'alloc_blocks': sys.getallocatedblocks() - blocks_before}
+            if self.trace:
+                record['peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+            self.stages[name] = record
+
+
+def _max_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / 1e6 if sys.platform == 'darwin' else rss / 1e3, 1)  # macOS는 바이트, Linux는 KB
+
+
+def run_pipeline(n, fixture_root, work_dir, trace=True, verbose=False):
+    """픽스처로 파이프라인 한 번 실행 → 단계별 측정 결과"""
+    fixture_root = os.path.abspath(fixture_root)
+    os.makedirs(work_dir, exist_ok=True)
+    ticker_info_list = [{'Ticker': _ticker_name(i)} for i in range(n)]
+    profiler = StageProfiler(trace)
+
+    # 출력 파일(static/*, cache/*)은 작업 폴더 안에만 쓰도록 cwd를 옮김
+    cwd = os.getcwd()
+    original_cache = utils.SECTOR_CACHE
+    os.chdir(work_dir)
+    os.makedirs("static", exist_ok=True)
+    utils.SECTOR_CACHE = SectorCache(os.path.join(fixture_root, "sector_search.json"))
+    METRICS.reset()
+    if trace:
+        tracemalloc.start()
+    try:
+        with open(os.devnull, 'w') as devnull, \
+                (contextlib.nullcontext() if verbose else contextlib.redirect_stdout(devnull)):
+            with profiler.stage('scan'):
+                store = PriceStore(os.path.join(fixture_root, "prices"), offline=True)
+                results = utils.get_market_cap_and_rs(ticker_info_list, price_store=store, offline=True)
+
+            with profiler.stage('rank'):
+                results.set_column('RS_Rank_Pct', utils.rank_percentiles(results.column('RS_6mo')))
+
+            with profiler.stage('aggregate'):
+                wrs_data, sector_data = aggregation.aggregate(results)
+                wrs_ranks = utils.rank_percentiles([w['WRS_6mo_MD'] for w in wrs_data])
+                for wrs_item, rank in zip(wrs_data, wrs_ranks):
+                    wrs_item['WRS_MD_Rank_Pct'] = rank
+
+            output_data = {"last_updated": time.strftime("%Y-%m-%d %H:%M:%S UTC"), "total_count": len(results),
+                           "market_condition": "N/A", "wrs_data": wrs_data, "sector_data": sector_data,
+                           "data": results}
+            with profiler.stage('write_result'):
+                changes.write_chunks_if_changed("static/result.json", scan_table.iter_json(output_data))
+
+            with profiler.stage('write_payload'):
+                payload.write_frontend_payload(output_data)
+
+            with profiler.stage('write_history'):
+                history_store.write_snapshot(output_data, FIXTURE_END_DATE, "static/history")
+    finally:
+        if trace:
+            tracemalloc.stop()
+        utils.SECTOR_CACHE = original_cache
+        os.chdir(cwd)
+
+    return {
+        'n': n,
+        'rows': len(results),
+        'total_seconds': round(sum(s['seconds'] for s in profiler.stages.values()), 4),
+        'max_rss_mb': _max_rss_mb(),
+        'stages': profiler.stages,
+        'timers': METRICS.to_dict()['timers'],  # 파이프라인 내부 타이머 (batch_load, batch_compute 등)
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       text=True).strip()
+    except Exception:
+        return None
+
+
+def _host():
+    return platform.node() or None
+
+
+def load_results(path=BENCHMARK_RESULTS):
+    if not os.path.exists(path):
+        return {'runs': []}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def find_previous(results, n, trace, host=None):
+    """같은 머신(호스트 + 아키텍처), 같은 규모, 같은 측정 방식(tracemalloc 여부)의 가장 최근 기록"""
+    host = host or _host()
+    for run in reversed(results['runs']):
+        if run['n'] == n and run.get('trace') == trace and \
+                (run.get('host'), run.get('machine')) == (host, platform.machine()):
+            return run
+    return None
+
+
+def report(run, previous=None):
+    print(f"\n=== {run['n']:,} tickers ({run['rows']:,} rows) | total {run['total_seconds']:.2f}s"
+          f" | max RSS {run['max_rss_mb']} MB ===")
+    print(f"{'stage':<15}{'seconds':>10}{'peak MB':>10}{'blocks':>12}  vs previous")
+    for name, stage in run['stages'].items():
+        change = ''
+        if previous and name in previous['stages'] and previous['stages'][name]['seconds'] > 0:
+            ratio = stage['seconds'] / previous['stages'][name]['seconds'] - 1
+            change = f"{ratio:+.0%}" + ("  ⚠️ REGRESSION" if ratio > REGRESSION_THRESHOLD else '')
+        print(f"{name:<15}{stage['seconds']:>10.3f}{stage.get('peak_mb', '-'):>10}{stage['alloc_blocks']:>12,}  {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="스캔 파이프라인 벤치마크 (오프라인 픽스처)")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="합성 티커 수")
+    parser.add_argument('--no-trace', action='store_true', help="tracemalloc 끄기 (시간만 측정, 오버헤드 없음)")
+    parser.add_argument('--record', action='store_true', help=f"결과를 {BENCHMARK_RESULTS}에 추가")
+    parser.add_argument('--verbose', action='store_true', help="파이프라인 로그 출력")
+    args = parser.parse_args()
+    utils.quiet_warnings()
+
+    trace = not args.no_trace
+    results = load_results()
+    for n in args.sizes:
+        fixture_root = make_fixtures(n, os.path.join(BENCH_DIR, f"fixtures_{n}"))
+        run = run_pipeline(n, fixture_root, os.path.join(BENCH_DIR, f"work_{n}"), trace, args.verbose)
+        run.update({'date': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC'), 'commit': _git_commit(),
+                    'trace': trace, 'python': platform.python_version(), 'machine': platform.machine(),
+                    'host': _host()})
+        report(run, find_previous(results, n, trace))
+        results['runs'].append(run)
+
+    if args.record:
+        with open(BENCHMARK_RESULTS, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n기록 저장: {BENCHMARK_RESULTS}")
+
+
+if __name__ == "__main__":
+    main()
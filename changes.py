@@ -0,0 +1,187 @@
+import filecmp
+import hashlib
+import json
+import math
+import os
+import re
+
+from scan_table import ScanTable, iter_json
+
+# 직전 스캔 대비 변경 사항
+# - diff_scans(): 편입/제외 티커, RS 순위가 크게 움직인 티커, 업종 WRS 순위 변화 → changes.json
+# - content_digest(): last_updated를 뺀 result.json 내용의 해시 (같으면 result.json/요약/샤드를 다시 쓰지 않음)
+# - write_if_changed() / write_chunks_if_changed(): 기존 파일과 내용이 같으면 쓰지 않음 (git 커밋/배포 대상에서 빠짐)
+# 직전 result.json은 행마다 (Ticker, 순위, 섹터, 업종)만 남기고 읽어 행 dict를 만들지 않습니다.
+CHANGES_FILE = "changes.json"
+RANK_MOVE_THRESHOLD = 10       # RS_Rank_Pct가 10%p 이상 움직인 티커
+INDUSTRY_MOVE_THRESHOLD = 10   # WRS_MD_Rank_Pct가 10%p 이상 움직인 업종
+# 내용 비교에서 제외할 부분: 최상위 last_updated (result.json의 첫 키라 행/업종 값과 겹치지 않음)
+VOLATILE_PATTERN = re.compile(r',?"last_updated":(?:"(?:[^"\\]|\\.)*"|null)')
+
+
+def _clean(value):
+    """NaN/inf → None (changes.json은 JSON 표준 유지, 직전 result.json에 NaN이 있어도)"""
+    if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+        return None
+    return value
+
+
+def content_digest(output_data):
+    """result.json 구조의 내용 해시 (iter_json 조각 단위로 계산, last_updated 제외)"""
+    digest = hashlib.sha1()
+    for chunk in iter_json(output_data):
+        if not VOLATILE_PATTERN.match(chunk):
+            digest.update(chunk.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _text_digest(text):
+    return hashlib.sha1(VOLATILE_PATTERN.sub('', text, count=1).encode('utf-8')).hexdigest()
+
+
+def _compact_row(obj):
+    """json.load object_hook: 종목 행은 (Ticker, RS_Rank_Pct, Sector, Industry)만 남김"""
+    if 'Ticker' in obj:
+        return (obj['Ticker'], obj.get('RS_Rank_Pct'), obj.get('Sector'), obj.get('Industry'))
+    return obj
+
+
+def load_previous(path):
+    """
+    직전 result.json (없거나 읽을 수 없으면 None)
+    data는 (Ticker, RS_Rank_Pct, Sector, Industry) 튜플 리스트, digest는 content_digest와 같은 기준의 해시
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        previous = json.loads(text, object_hook=_compact_row)
+    except (OSError, ValueError):
+        return None
+    previous['digest'] = _text_digest(text)
+    return previous
+
+
+def same_content(previous, current):
+    """last_updated를 빼고 같은 스캔 결과인지"""
+    return previous is not None and previous.get('digest') == content_digest(current)
+
+
+def write_if_changed(path, text):
+    """
+    text를 path에 저장 (임시 파일 + rename). 기존 파일과 내용이 같으면 쓰지 않음
+    반환값: 실제로 썼으면 True
+    """
+    data = text.encode('utf-8')
+    if os.path.exists(path) and os.path.getsize(path) == len(data):
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def write_chunks_if_changed(path, chunks):
+    """
+    조각(str)들을 임시 파일에 이어 쓰고, 기존 파일과 같으면 임시 파일만 지움 (전체 문자열을 만들지 않음)
+    반환값: 실제로 바꿨으면 True
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for chunk in chunks:
+            f.write(chunk)
+    if os.path.exists(path) and filecmp.cmp(tmp_path, path, shallow=False):
+        os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, path)
+    return True
+
+
+def _row_index(data):
+    """{Ticker: (RS_Rank_Pct, Sector, Industry)} — ScanTable, load_previous의 튜플 행, 행 dict 리스트"""
+    if isinstance(data, ScanTable):
+        return {ticker: (_clean(rank), sector, industry) for ticker, rank, sector, industry in
+                zip(data.column('Ticker'), data.column('RS_Rank_Pct'), data.column('Sector'), data.column('Industry'))}
+    index = {}
+    for row in data or []:
+        if isinstance(row, tuple):
+            index[row[0]] = (_clean(row[1]),) + row[2:]
+        else:
+            index[row['Ticker']] = (_clean(row.get('RS_Rank_Pct')), row.get('Sector'), row.get('Industry'))
+    return index
+
+
+def _rank_moves(previous_rows, current_rows, threshold):
+    moves = []
+    for ticker, (rank, sector, industry) in current_rows.items():
+        old = previous_rows.get(ticker)
+        if old is None or old[0] is None or rank is None:
+            continue
+        change = round(old[0] - rank, 2)  # 양수 = 순위 상승 (퍼센타일이 작아짐)
+        if abs(change) >= threshold:
+            moves.append({'Ticker': ticker, 'Sector': sector, 'Industry': industry,
+                          'from': old[0], 'to': rank, 'change': change})
+    moves.sort(key=lambda m: -abs(m['change']))
+    return moves
+
+
+def _industry_moves(previous_wrs, current_wrs, threshold):
+    def by_key(records):
+        return {(w.get('Sector'), w.get('Industry')): w for w in records or []}
+
+    old_map, new_map = by_key(previous_wrs), by_key(current_wrs)
+    moves = []
+    for key, row in new_map.items():
+        old = old_map.get(key)
+        old_rank = None if old is None else _clean(old.get('WRS_MD_Rank_Pct'))
+        new_rank = _clean(row.get('WRS_MD_Rank_Pct'))
+        if old is not None and (old_rank is None or new_rank is None):
+            continue
+        change = None if old is None else round(old_rank - new_rank, 2)
+        if old is None or abs(change) >= threshold:
+            moves.append({'Sector': key[0], 'Industry': key[1],
+                          'WRS_6mo_MD_from': None if old is None else _clean(old.get('WRS_6mo_MD')),
+                          'WRS_6mo_MD_to': _clean(row.get('WRS_6mo_MD')),
+                          'rank_from': old_rank, 'rank_to': new_rank, 'change': change})
+    removed = [{'Sector': s, 'Industry': i} for (s, i) in old_map if (s, i) not in new_map]
+    moves.sort(key=lambda m: -abs(m['change'] or 0))
+    return moves, removed
+
+
+def diff_scans(previous, current, rank_threshold=RANK_MOVE_THRESHOLD, industry_threshold=INDUSTRY_MOVE_THRESHOLD):
+    """
+    직전 스캔(result.json 구조)과 현재 스캔 비교 → changes.json 구조
+    직전 스캔이 없으면 변경 목록은 비어 있고 previous_updated는 None
+    """
+    changes = {
+        "last_updated": current.get('last_updated'),
+        "previous_updated": None if previous is None else previous.get('last_updated'),
+        "market_condition": current.get('market_condition'),
+        "rank_threshold": rank_threshold,
+        "industry_threshold": industry_threshold,
+        "added": [], "removed": [], "rank_moves": [], "industry_moves": [], "industries_removed": [],
+    }
+    if previous is not None:
+        old_rows = _row_index(previous.get('data'))
+        new_rows = _row_index(current.get('data'))
+        changes['added'] = [{'Ticker': t, 'RS_Rank_Pct': r[0]} for t, r in new_rows.items() if t not in old_rows]
+        changes['removed'] = sorted(t for t in old_rows if t not in new_rows)
+        changes['rank_moves'] = _rank_moves(old_rows, new_rows, rank_threshold)
+        changes['industry_moves'], changes['industries_removed'] = _industry_moves(
+            previous.get('wrs_data'), current.get('wrs_data'), industry_threshold)
+        if previous.get('market_condition') != current.get('market_condition'):
+            changes['market_condition_from'] = previous.get('market_condition')
+    changes['summary'] = {key: len(changes[key]) for key in
+                          ('added', 'removed', 'rank_moves', 'industry_moves', 'industries_removed')}
+    return changes
+
+
+def write_changes(changes, output_dir):
+    path = os.path.join(output_dir, CHANGES_FILE)
+    text = json.dumps(changes, ensure_ascii=False, separators=(',', ':'), allow_nan=False)
+    write_if_changed(path, text)
+    return path
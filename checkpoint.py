@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+# 실행 체크포인트 (배치 결과를 cache/runs/<run_id>/에 저장)
+# 잡이 중간에 죽거나 타임아웃되어도, 같은 run_id로 다시 실행하면 끝난 배치는 건너뜁니다.
+RUNS_DIR = "cache/runs"
+
+
+def make_run_id(tickers, batch_size, date_str=None):
+    """
+    기본 run_id: UTC 날짜 + 유니버스(티커 목록, 배치 크기) 해시
+    같은 날 같은 유니버스로 재실행하면 같은 run_id → 이어서 실행
+    """
+    date_str = date_str or datetime.utcnow().strftime('%Y-%m-%d')
+    digest = hashlib.sha1(f"{batch_size}|{','.join(tickers)}".encode('utf-8')).hexdigest()[:10]
+    return f"{date_str}_{digest}"
+
+
+def _atomic_write_json(path, obj):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        if hasattr(obj, 'dump'):  # ScanTable: 컬럼 하나씩 저장
+            obj.dump(f)
+        else:
+            json.dump(obj, f, ensure_ascii=False, separators=(',', ':'))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class RunCheckpoint:
+    """
+    배치/단계 단위 체크포인트
+    - save_batch(i, rows, failures) / load_batch(i): 배치 i의 결과 행과 실패 사유
+    - save_stage(name, rows) / load_stage(name): 재시도 등 단계 결과 전체 (rows는 JSON 값 또는 ScanTable)
+    - finish(): 모든 출력이 저장된 뒤 호출 → 체크포인트 폴더 삭제 (+ 지난 실행 정리)
+    """
+
+    def __init__(self, run_id, root=RUNS_DIR, fresh=False):
+        self.run_id = run_id
+        self.root = root
+        self.path = os.path.join(root, run_id)
+        if fresh and os.path.exists(self.path):
+            shutil.rmtree(self.path)
+        os.makedirs(self.path, exist_ok=True)
+
+    def _batch_path(self, index):
+        return os.path.join(self.path, f"batch_{index:05d}.json")
+
+    def _stage_path(self, name):
+        return os.path.join(self.path, f"stage_{name}.json")
+
+    def completed_batches(self):
+        return sorted(int(f[6:11]) for f in os.listdir(self.path) if f.startswith('batch_') and f.endswith('.json'))
+
+    def has_batch(self, index):
+        return os.path.exists(self._batch_path(index))
+
+    def save_batch(self, index, rows, failures=None):
+        _atomic_write_json(self._batch_path(index), {'rows': rows, 'failures': failures or {}})
+
+    def load_batch(self, index):
+        """반환값: (rows, failures)"""
+        with open(self._batch_path(index), 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        return saved['rows'], saved['failures']
+
+    def has_stage(self, name):
+        return os.path.exists(self._stage_path(name))
+
+    def save_stage(self, name, rows):
+        _atomic_write_json(self._stage_path(name), rows)
+
+    def load_stage(self, name):
+        with open(self._stage_path(name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def finish(self):
+        """실행 완료: 이번 실행과 지난 실행들의 체크포인트 정리"""
+        if os.path.exists(self.root):
+            for name in os.listdir(self.root):
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
@@ -1,24 +1,34 @@
-
-import pandas as pd
-import json
-import os
-import pandas as pd
 import json
 import os
+import sys
 import time
-import shutil
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 # utils에 있는 강력한 병렬 처리 함수 가져오기
 import utils
+import history_store
+import payload
+import changes
+import checkpoint
+import scan_table
+import universes
+from metrics import METRICS, METRICS_FILE
+# pandas를 쓰는 모듈(aggregation, history_query, intraday)은 쓰는 함수 안에서 import
+# → update_history_index 같은 가벼운 함수는 pandas 없이 import 가능
 
 # 설정
 # 기존 엑셀 대신 구글 시트 사용
 GOOGLE_SHEET_ID = "17JU4KoC-Out5NqGy3qtN7LSunMUsH5xS2qJSk1fBDGQ"
 GOOGLE_SHEET_URL = f"https://docs.google.com/spreadsheets/d/{GOOGLE_SHEET_ID}/export?format=csv"
 
+STATIC_DIR = "static"
 OUTPUT_FILE = "static/result.json"
 HISTORY_DIR = "static/history"
 HISTORY_INDEX = "static/history_index.json"
+BATCH_SIZE = 20
+SHEET_UNIVERSE = "sheet"  # 기본(구글 시트) 유니버스 이름 (전날 대비 비교 스냅샷 키)
+MIN_RESULT_RATIO = 0.5    # 결과 행 수가 직전 스캔의 이 비율보다 적으면 저장하지 않음 (불완전한 수집)
 
 def backup_existing_data():
     """
@@ -57,20 +67,40 @@ def backup_existing_data():
         print(f"  ⚠️ 백업 실패: {e}")
         return None
 
-def update_history_index():
+def _load_history_index(index_file):
+    if not os.path.exists(index_file):
+        return None
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_history_index(dates, index_file):
+    """날짜 목록이 기존 인덱스와 같으면 쓰지 않음 (last_updated도 그대로) → 실제로 썼으면 True"""
+    existing = _load_history_index(index_file)
+    if existing is not None and existing.get('dates') == dates:
+        return False
+    index_data = {
+        "last_updated": datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC'),
+        "total_history": len(dates),
+        "dates": dates
+    }
+    changes.write_if_changed(index_file, json.dumps(index_data, ensure_ascii=False, indent=2))
+    return True
+
+def update_history_index(history_dir=HISTORY_DIR, index_file=HISTORY_INDEX):
     """
-    history_index.json 업데이트 (날짜 목록)
+    history_index.json 전체 재생성 (history 폴더 목록 기준)
     """
-    if not os.path.exists(HISTORY_DIR):
+    if not os.path.exists(history_dir):
         return
     
-    # history 폴더에서 모든 JSON 파일 찾기
-    history_files = sorted([f for f in os.listdir(HISTORY_DIR) if f.startswith('result_') and f.endswith('.json')])
+    # history 폴더에서 날짜별 파일 찾기 (컬럼형 스냅샷 snap_*.json 우선, 기존 result_*.json도 포함)
+    history_files = history_store.list_history(history_dir)
     
-    # 날짜 추출 (result_2026-01-29.json -> 2026-01-29)
     dates = []
-    for filename in history_files:
-        date_part = filename.replace('result_', '').replace('.json', '')
+    for date_part, filename in history_files.items():
         dates.append({
             "date": date_part,
             "filename": f"history/{filename}"
@@ -79,141 +109,375 @@ def update_history_index():
     # 최신순 정렬
     dates.sort(key=lambda x: x['date'], reverse=True)
     
-    index_data = {
-        "last_updated": datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC'),
-        "total_history": len(dates),
-        "dates": dates
-    }
+    if _write_history_index(dates, index_file):
+        print(f"  → 히스토리 인덱스 업데이트: {len(dates)}개 날짜")
+    else:
+        print(f"  → 히스토리 인덱스 변경 없음: {len(dates)}개 날짜")
+
+def add_history_entry(date_str, history_file, history_dir=HISTORY_DIR, index_file=HISTORY_INDEX):
+    """
+    history_index.json에 날짜 하나만 추가/교체 (history 폴더를 다시 읽거나 전체를 정렬하지 않음)
+    인덱스가 없거나 읽을 수 없으면 update_history_index로 전체 재생성
+    """
+    existing = _load_history_index(index_file)
+    if existing is None:
+        return update_history_index(history_dir, index_file)
+
+    entry = {"date": date_str, "filename": f"history/{os.path.basename(history_file)}"}
+    dates = [d for d in existing.get('dates', []) if d.get('date') != date_str]
+    # 최신순 유지: 보통 맨 앞에 들어감
+    position = next((i for i, d in enumerate(dates) if d.get('date', '') < date_str), len(dates))
+    dates.insert(position, entry)
+
+    if _write_history_index(dates, index_file):
+        print(f"  → 히스토리 인덱스에 {date_str} 반영: {len(dates)}개 날짜")
+    else:
+        print(f"  → 히스토리 인덱스 변경 없음: {len(dates)}개 날짜")
+
+def build_output_data(results, market_condition, **extra):
+    """
+    순위/섹터 집계를 붙여 result.json 구조를 만듭니다.
+    results는 ScanTable 또는 행 dict 리스트 (리스트면 ScanTable로 바꿔 data에 넣음)
+    extra(mode, as_of 등)는 market_condition 뒤에 들어갑니다.
+    """
+    import aggregation
+
+    results = scan_table.as_table(results)
+
+    # ===== 퍼센타일 순위 계산 =====
+    print(f"[{time.strftime('%X')}] RS 퍼센타일 순위 계산 중...")
+    
+    # 개별 RS(6MO) 퍼센타일 (정렬 한 번으로 전체 순위 계산)
+    with METRICS.timer('rank'):
+        results.set_column('RS_Rank_Pct', utils.rank_percentiles(results.column('RS_6mo')))
     
-    with open(HISTORY_INDEX, 'w', encoding='utf-8') as f:
-        json.dump(index_data, f, ensure_ascii=False, indent=2)
+    # 섹터/업종 집계 (중앙값/평균/시총 가중/Breadth/종목 수, 3개 구간, groupby 한 번)
+    with METRICS.timer('aggregate'):
+        wrs_data, sector_data = aggregation.aggregate(results)
     
-    print(f"  → 히스토리 인덱스 업데이트: {len(dates)}개 날짜")
+        # WRS 중앙값 퍼센타일 계산
+        wrs_md_ranks = utils.rank_percentiles([w['WRS_6mo_MD'] for w in wrs_data])
+        for wrs_item, rank in zip(wrs_data, wrs_md_ranks):
+            wrs_item['WRS_MD_Rank_Pct'] = rank
+
+    output_data = {
+        "last_updated": time.strftime("%Y-%m-%d %H:%M:%S UTC"),
+        "total_count": len(results),
+        "market_condition": market_condition,
+    }
+    output_data.update(extra)
+    output_data.update({
+        "wrs_data": wrs_data,
+        "sector_data": sector_data,
+        "data": results
+    })
+    return output_data
+
+def write_result_files(output_data, output_dir=STATIC_DIR):
+    """result.json + 프론트엔드용 요약/섹터 샤드 저장 (내용이 같은 파일은 건너뜀)"""
+    output_file = os.path.join(output_dir, "result.json")
+    # 전체 결과 (공백 없는 JSON, 외부 도구 호환용), 행 하나씩 직렬화해서 이어 씀
+    with METRICS.timer('write_result'):
+        if changes.write_chunks_if_changed(output_file, scan_table.iter_json(output_data)):
+            METRICS.incr('write.bytes', os.path.getsize(output_file))
+            print(f"결과 파일 저장 완료: {output_file}")
+        else:
+            METRICS.incr('write.skipped')
+            print(f"결과 파일 변경 없음: {output_file}")
+
+    # ===== 프론트엔드용 요약 + 섹터 샤드 + 사전 압축 =====
+    try:
+        with METRICS.timer('write_payload'):
+            written = payload.write_frontend_payload(output_data, output_dir)
+        METRICS.incr('write.bytes', sum(written.values()))
+        print(f"[{time.strftime('%X')}] 프론트엔드 파일 저장 완료: 변경 {len(written)}개, 요약 {written.get(os.path.join(output_dir, payload.SUMMARY_FILE), 0) / 1024:.0f} KB")
+    except Exception as e:
+        print(f"⚠️ 프론트엔드 파일 저장 실패: {e}")
+
+def write_changes(previous, output_data, output_dir=STATIC_DIR):
+    """직전 result.json 대비 변경 사항 → changes.json"""
+    with METRICS.timer('diff'):
+        diff = changes.diff_scans(previous, output_data)
+        changes_file = changes.write_changes(diff, output_dir)
+    METRICS.set('changes', diff['summary'])
+    summary = diff['summary']
+    print(f"[{time.strftime('%X')}] 변경 사항 저장: {changes_file} "
+          f"(편입 {summary['added']}, 제외 {summary['removed']}, 순위 급변 {summary['rank_moves']}, 업종 {summary['industry_moves']})")
+    return diff
+
+def check_results(results, previous, min_ratio=MIN_RESULT_RATIO):
+    """
+    저장 전 결과 검사: 비었거나 직전 스캔보다 행 수가 크게 줄었으면 ValueError
+    (빈/부분 결과로 result.json, changes.json, 히스토리 스냅샷을 덮어쓰지 않도록)
+    """
+    if not results:
+        raise ValueError("결과 행 없음")
+    previous_count = len(previous.get('data') or []) if previous is not None else 0
+    if previous_count and len(results) < previous_count * min_ratio:
+        raise ValueError(f"결과 행 {len(results)}개 < 직전 스캔 {previous_count}개의 {min_ratio:.0%}")
+
+def publish_outputs(results, market_condition, output_dir=STATIC_DIR, history_cache_dir=None):
+    """
+    순위/집계 → result.json, 요약/샤드, 변경 사항, 히스토리 스냅샷/인덱스, 추세 파일을 output_dir 아래에 저장
+    (기본 static/, 유니버스별 실행은 각자의 폴더, history_cache_dir 기본은 history_query.MATRIX_CACHE_DIR)
+    직전 result.json과 내용(last_updated 제외)이 같으면 result.json/요약/샤드/변경 사항은 다시 쓰지 않고,
+    오늘 날짜 히스토리 스냅샷/인덱스와 추세 파일만 저장합니다 (휴장일/같은 날 재실행도 날짜가 빠지지 않도록).
+    결과가 비었거나 직전 스캔보다 크게 줄었으면(check_results) 아무 파일도 쓰지 않고 ValueError
+    """
+    import history_query
+
+    history_cache_dir = history_cache_dir or history_query.MATRIX_CACHE_DIR
+    history_dir = os.path.join(output_dir, "history")
+    history_index = os.path.join(output_dir, "history_index.json")
+    os.makedirs(output_dir, exist_ok=True)
+
+    previous = changes.load_previous(os.path.join(output_dir, "result.json"))
+    check_results(results, previous)
+    output_data = build_output_data(results, market_condition)
+    if changes.same_content(previous, output_data):
+        METRICS.set('changes', 'unchanged')
+        print(f"[{time.strftime('%X')}] 직전 스캔({previous.get('last_updated')})과 내용이 같음 → 결과/프론트엔드 파일 저장 생략")
+    else:
+        # 변경 사항은 부가 파일: 실패해도 결과 파일 저장은 계속
+        try:
+            write_changes(previous, output_data, output_dir)
+        except Exception as e:
+            print(f"⚠️ 변경 사항 저장 실패: {e}")
+        write_result_files(output_data, output_dir)
+    
+    # ===== 금일 데이터 히스토리 즉시 저장 (컬럼형 스냅샷) + 인덱스에 오늘 날짜만 반영 =====
+    try:
+        # 날짜 추출 (UTC 기준)
+        today_str = datetime.utcnow().strftime("%Y-%m-%d") # UTC 기준 오늘 날짜
+        with METRICS.timer('write_history'):
+            history_file = history_store.write_snapshot(output_data, today_str, history_dir)
+        METRICS.incr('write.bytes', os.path.getsize(history_file))
+        print(f"[{time.strftime('%X')}] 히스토리 즉시 아카이빙 완료: {history_file}")
+        with METRICS.timer('write_history_index'):
+            add_history_entry(today_str, history_file, history_dir, history_index)
+    except Exception as e:
+        print(f"⚠️ 히스토리 저장 실패: {e}")
+
+    # ===== 히스토리 추세 파일 (순위 상승 종목 / 연속 상승 업종) =====
+    try:
+        history = history_query.HistoryMatrix(index_file=history_index, static_dir=output_dir, cache_dir=history_cache_dir)
+        with METRICS.timer('trends'):
+            history.build()
+            trends_file = history_query.write_trends(history, os.path.join(output_dir, "trends.json"))
+        print(f"[{time.strftime('%X')}] 추세 파일 저장: {trends_file}")
+    except Exception as e:
+        print(f"⚠️ 추세 파일 생성 실패: {e}")
+    return output_data
+
+def _publish_universe(name, rows, market_condition, output_dir, history_cache_dir):
+    """유니버스 하나의 결과 저장 (ProcessPoolExecutor 워커, 프로세스마다 METRICS가 따로)"""
+    METRICS.reset()
+    publish_outputs(rows, market_condition, output_dir, history_cache_dir)
+    return name, len(rows), METRICS.to_dict()['timers']
+
+def run_universes(config_path, args):
+    """
+    여러 유니버스 스캔: 합집합 티커로 가격/벤치마크/메타데이터를 한 번만 받아 계산하고,
+    유니버스별 순위/집계/히스토리/추세 저장은 프로세스 풀에서 병렬로 실행합니다.
+    """
+    specs = universes.load_config(config_path)
+    loaded = []
+    for spec in specs:
+        ticker_info_list = universes.load_universe(spec)
+        if not ticker_info_list:
+            print(f"⚠️ 유니버스 '{spec['name']}' 티커 없음 → 건너뜀")
+            continue
+        print(f"[{time.strftime('%X')}] 유니버스 '{spec['name']}': {len(ticker_info_list)}개")
+        loaded.append((spec, ticker_info_list))
+    if not loaded:
+        print("⚠️ 로드된 유니버스 없음 → 종료")
+        return
+
+    union = universes.merge_universes([tickers for _, tickers in loaded])
+    print(f"[{time.strftime('%X')}] 유니버스 {len(loaded)}개, 합집합 티커: {len(union)}개")
+    diffs = {spec['name']: universes.diff_snapshot(spec['name'], tickers) for spec, tickers in loaded}
+    new_tickers = {t for diff in diffs.values() for t in diff['added']}
+
+    start_time = time.time()
+    run_id = args.run_id or checkpoint.make_run_id([item['Ticker'] for item in union], BATCH_SIZE)
+    run_checkpoint = checkpoint.RunCheckpoint(run_id, fresh=args.fresh)
+    print(f"[{time.strftime('%X')}] 실행 ID: {run_id}")
+    try:
+        results = utils.get_market_cap_and_rs(union, batch_size=BATCH_SIZE, offline=args.offline,
+                                              checkpoint=run_checkpoint, new_tickers=new_tickers,
+                                              workers=args.workers)
+    except Exception as e:
+        abort_run(run_id, f"수집 중 에러 발생: {e}")
+    print(f"[{time.strftime('%X')}] 수집 완료! 소요 시간: {time.time() - start_time:.1f}초, 성공: {len(results)}개")
+
+    market_condition = utils.get_market_condition_from_sheet()
+    print(f"  → Market Condition: {market_condition}")
+
+    # 유니버스별 행 나누기 (순위/집계는 유니버스 안에서 다시 계산)
+    jobs = []
+    for spec, ticker_info_list in loaded:
+        rows = results.select(item['Ticker'] for item in ticker_info_list)
+        jobs.append((spec['name'], rows, market_condition, universes.output_dir(spec),
+                     universes.history_cache_dir(spec)))
+
+    failed = []
+    with METRICS.timer('publish_universes'):
+        with ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as executor:
+            futures = {executor.submit(_publish_universe, *job): job[0] for job in jobs}
+            for future in as_completed(futures):
+                try:
+                    name, count, timers = future.result()
+                    METRICS.set(f'universe.{name}', {'results': count, 'timers': timers})
+                    print(f"[{time.strftime('%X')}] 유니버스 '{name}' 저장 완료: {count}개")
+                except Exception as e:
+                    failed.append(futures[future])
+                    print(f"⚠️ 유니버스 '{futures[future]}' 저장 실패: {e}")
+
+    METRICS.set('tickers', len(union))
+    METRICS.set('results', len(results))
+    METRICS.set('universe_diff', diffs)
+    if failed:
+        abort_run(run_id, f"유니버스 저장 실패: {', '.join(sorted(failed))}")
+    METRICS.set('run_id', run_id)
+    write_run_metrics()
+    # 모든 유니버스 저장 완료 → 체크포인트 정리
+    run_checkpoint.finish()
+    print(f"[{time.strftime('%X')}] 모든 작업 완료!")
+
+def write_run_metrics():
+    try:
+        print(f"[{time.strftime('%X')}] 실행 지표 저장: {METRICS.write(METRICS_FILE)}")
+    except Exception as e:
+        print(f"⚠️ 실행 지표 저장 실패: {e}")
+
+def abort_run(run_id, reason):
+    """
+    수집/저장 실패: 결과 파일을 쓰지 않고 체크포인트(cache/runs)는 그대로 둔 채 0이 아닌 코드로 종료
+    (워크플로가 실패로 표시되고, 재실행하면 끝난 배치부터 이어서 진행)
+    """
+    print(f"⚠️ {reason} → 결과 파일 저장 없이 종료 (체크포인트 유지: {run_id})")
+    METRICS.set('run_id', run_id)
+    METRICS.set('aborted', reason)
+    write_run_metrics()
+    sys.exit(1)
+
+def run_intraday():
+    """
+    장중 스캔: 저장된 1년치 종가 + 현재가 일괄 조회로 RS/순위/50DIV만 다시 계산
+    result.json과 요약/샤드만 다시 쓰고, 히스토리/추세/체크포인트는 건드리지 않습니다.
+    """
+    import intraday
+
+    start_time = time.time()
+    # 유니버스는 직전 result.json에서 (없으면 구글 시트)
+    ticker_info_list = intraday.load_universe(OUTPUT_FILE) or utils.get_tickers_from_google_sheet(GOOGLE_SHEET_URL)
+    print(f"[{time.strftime('%X')}] 장중 스캔 대상: {len(ticker_info_list)}개")
+
+    results, as_of = intraday.compute_intraday_rows(ticker_info_list, batch_size=BATCH_SIZE)
+    if not results:
+        print("⚠️ 장중 스캔 결과 없음 → 기존 파일 유지")
+        return
+    print(f"[{time.strftime('%X')}] 장중 계산 완료: {len(results)}개, {time.time() - start_time:.1f}초 (현재가 기준 {as_of})")
+
+    market_condition = utils.get_market_condition_from_sheet()
+    output_data = build_output_data(results, market_condition, mode="intraday", as_of=as_of)
+    write_result_files(output_data)
+
+    METRICS.set('mode', 'intraday')
+    METRICS.set('tickers', len(ticker_info_list))
+    METRICS.set('results', len(results))
+    write_run_metrics()
 
 def main():
+    parser = argparse.ArgumentParser(description="RS Scanner 데이터 수집")
+    parser.add_argument('--offline', action='store_true', help="네트워크 없이 로컬 가격 저장소(cache/prices)만으로 재계산")
+    parser.add_argument('--run-id', default=None, help="체크포인트 실행 ID (기본: UTC 날짜 + 유니버스 해시, 같은 날 재실행 시 이어서 실행)")
+    parser.add_argument('--fresh', action='store_true', help="저장된 체크포인트를 무시하고 처음부터 실행")
+    parser.add_argument('--intraday', action='store_true', help="장중 스캔: 저장된 종가 + 현재가로 RS/순위만 다시 계산")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="가격 계산 프로세스 수 (기본: CPU 코어 수, 1이면 한 프로세스)")
+    parser.add_argument('--universes', metavar='CONFIG', default=None,
+                        help="여러 유니버스 스캔 (설정 파일, universes.example.json 참고)")
+    args = parser.parse_args()
+    utils.quiet_warnings()
+
     if not os.path.exists('static'):
         os.makedirs('static')
+
+    if args.intraday:
+        run_intraday()
+        return
+
+    if args.universes:
+        run_universes(args.universes, args)
+        return
     
     # ===== 히스토리 백업 (기존 로직 제거 - 수집 후 즉시 저장으로 변경) =====
     # print(f"[{time.strftime('%X')}] 기존 데이터 백업 중...")
     # backup_existing_data()
 
     print(f"[{time.strftime('%X')}] 구글 시트 데이터 로드 중...")
-    # Load Tickers
-    print("구글 시트 데이터 로드 중...")
+    # Load Tickers (실패하면 remote_csv가 마지막으로 받은 시트를 사용)
     ticker_info_list = utils.get_tickers_from_google_sheet(GOOGLE_SHEET_URL)
+    universe_diff = None
     
-    # 2. 실패 시 Fallback
-    if not ticker_info_list:
-        print("⚠️ 구글 시트 로드 실패 (Fallback 모드)")
-        # 주요 나스닥/S&P500 티커 Fallback
-        ticker_info_list = [
-            {"Ticker": "AAPL", "Sector": "Technology", "Industry": "Consumer Electronics"},
-            {"Ticker": "MSFT", "Sector": "Technology", "Industry": "Software - Infrastructure"},
-            {"Ticker": "NVDA", "Sector": "Technology", "Industry": "Semiconductors"},
-            {"Ticker": "GOOGL", "Sector": "Communication Services", "Industry": "Internet Content & Information"},
-            {"Ticker": "AMZN", "Sector": "Consumer Cyclical", "Industry": "Internet Retail"},
-            {"Ticker": "TSLA", "Sector": "Consumer Cyclical", "Industry": "Auto Manufacturers"},
-            {"Ticker": "META", "Sector": "Communication Services", "Industry": "Internet Content & Information"},
-            {"Ticker": "AMD", "Sector": "Technology", "Industry": "Semiconductors"},
-            {"Ticker": "NFLX", "Sector": "Communication Services", "Industry": "Entertainment"},
-            {"Ticker": "PLTR", "Sector": "Technology", "Industry": "Software - Infrastructure"}
-        ]
+    if ticker_info_list:
+        # 전날 대비 편입/제외 (새로 편입된 티커는 메타데이터를 먼저 조회)
+        universe_diff = universes.diff_snapshot(SHEET_UNIVERSE, ticker_info_list)
+        print(f"[{time.strftime('%X')}] 대상 티커: {len(ticker_info_list)}개 "
+              f"(편입 {len(universe_diff['added'])}, 제외 {len(universe_diff['removed'])}, 기준 {universe_diff['previous']})")
     else:
-        print(f"[{time.strftime('%X')}] 대상 티커: {len(ticker_info_list)}개")
+        # 시트도 캐시도 없음 → 직전 result.json의 유니버스로 (몇 개짜리 임시 목록으로 히스토리를 남기지 않음)
+        import intraday
+        ticker_info_list = intraday.load_universe(OUTPUT_FILE)
+        if not ticker_info_list:
+            print("⚠️ 티커 목록을 가져올 수 없음 (시트/캐시/직전 결과 모두 없음) → 기존 파일 유지하고 종료")
+            return
+        print(f"⚠️ 구글 시트 로드 실패 → 직전 result.json 유니버스 사용: {len(ticker_info_list)}개")
     
     start_time = time.time()
+
+    # 배치 체크포인트 (cache/runs/<run_id>/): 중간에 죽어도 재실행 시 끝난 배치는 건너뜀
+    run_id = args.run_id or checkpoint.make_run_id([item['Ticker'] for item in ticker_info_list], BATCH_SIZE)
+    run_checkpoint = checkpoint.RunCheckpoint(run_id, fresh=args.fresh)
+    print(f"[{time.strftime('%X')}] 실행 ID: {run_id}")
     
-    # 병렬 처리 함수 실행 (20개씩 동시 작업)
+    # 병렬 처리 함수 실행 (배치 단위 계산 + 체크포인트)
     try:
-        results = utils.get_market_cap_and_rs(ticker_info_list)
+        results = utils.get_market_cap_and_rs(ticker_info_list, batch_size=BATCH_SIZE, offline=args.offline,
+                                              checkpoint=run_checkpoint,
+                                              new_tickers=universe_diff['added'] if universe_diff else None,
+                                              workers=args.workers)
     except Exception as e:
-        print(f"수집 중 에러 발생: {e}")
-        results = []
+        # 빈 결과로 result.json/히스토리를 덮어쓰거나 체크포인트를 지우지 않음
+        abort_run(run_id, f"수집 중 에러 발생: {e}")
     
     
-    # Save Sector Cache (Persistence)
-    utils.save_sector_cache()
-
     end_time = time.time()
     duration = end_time - start_time
     
     print(f"[{time.strftime('%X')}] 수집 완료! 소요 시간: {duration:.1f}초, 성공: {len(results)}개")
 
-    # ===== 퍼센타일 순위 계산 =====
-    print(f"[{time.strftime('%X')}] RS 퍼센타일 순위 계산 중...")
-    
-    # 개별 RS(6MO) 퍼센타일
-    rs_6mo_values = [r['RS_6mo'] for r in results if r.get('RS_6mo') is not None]
-    for item in results:
-        rs_val = item.get('RS_6mo')
-        item['RS_Rank_Pct'] = utils.calculate_percentile_rank(rs_val, rs_6mo_values)
-    
-    # WRS 계산을 위한 Sector/Industry 그룹핑
-    from collections import defaultdict
-    import statistics
-    
-    sector_groups = defaultdict(list)
-    for item in results:
-        if (item.get('Sector') and item['Sector'] not in ['N/A', 'nan'] and
-            item.get('Industry') and item['Industry'] not in ['N/A', 'nan'] and
-            item.get('RS_6mo') is not None):
-            key = f"{item['Sector']}|{item['Industry']}"
-            sector_groups[key].append(item['RS_6mo'])
-    
-    # WRS 데이터 생성 (중앙값 포함)
-    wrs_data = []
-    for key, rs_values in sector_groups.items():
-        if len(rs_values) >= 1:  # 최소 1개 이상
-            sector, industry = key.split('|')
-            median_rs = statistics.median(rs_values)
-            wrs_data.append({
-                'Sector': sector,
-                'Industry': industry,
-                'Count': len(rs_values),
-                'WRS_6mo_MD': round(median_rs, 4)
-            })
-    
-    # WRS 중앙값 퍼센타일 계산
-    wrs_md_values = [w['WRS_6mo_MD'] for w in wrs_data]
-    for wrs_item in wrs_data:
-        wrs_item['WRS_MD_Rank_Pct'] = utils.calculate_percentile_rank(wrs_item['WRS_6mo_MD'], wrs_md_values)
-    
     # ===== Market Condition 가져오기 =====
     print(f"[{time.strftime('%X')}] Market Condition 가져오는 중...")
     market_condition = utils.get_market_condition_from_sheet()
     print(f"  → Market Condition: {market_condition}")
 
-    output_data = {
-        "last_updated": time.strftime("%Y-%m-%d %H:%M:%S UTC"),
-        "total_count": len(results),
-        "market_condition": market_condition,
-        "wrs_data": wrs_data,
-        "data": results
-    }
-    
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, ensure_ascii=False, indent=2)
-        
-    print(f"결과 파일 저장 완료: {OUTPUT_FILE}")
-    
-    # ===== 금일 데이터 히스토리 즉시 저장 =====
     try:
-        if not os.path.exists(HISTORY_DIR):
-            os.makedirs(HISTORY_DIR)
-        
-        # 날짜 추출 (UTC 기준)
-        today_str = datetime.utcnow().strftime("%Y-%m-%d") # UTC 기준 오늘 날짜
-        history_file = os.path.join(HISTORY_DIR, f"result_{today_str}.json")
-        
-        shutil.copy(OUTPUT_FILE, history_file)
-        print(f"[{time.strftime('%X')}] 히스토리 즉시 아카이빙 완료: {history_file}")
+        publish_outputs(results, market_condition)
     except Exception as e:
-        print(f"⚠️ 히스토리 저장 실패: {e}")
-    
-    # ===== 히스토리 인덱스 업데이트 =====
-    print(f"[{time.strftime('%X')}] 히스토리 인덱스 업데이트 중...")
-    update_history_index()
+        abort_run(run_id, f"결과 저장 실패: {e}")
+
+    # ===== 실행 지표 (단계별 시간, 요청/바이트, 캐시 적중률, 실패 사유) =====
+    METRICS.set('run_id', run_id)
+    METRICS.set('tickers', len(ticker_info_list))
+    METRICS.set('results', len(results))
+    if universe_diff:
+        METRICS.set('universe_diff', universe_diff)
+    write_run_metrics()
+
+    # 모든 출력 저장 완료 → 체크포인트 정리
+    run_checkpoint.finish()
     print(f"[{time.strftime('%X')}] 모든 작업 완료!")
 
 if __name__ == "__main__":
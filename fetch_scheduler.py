@@ -0,0 +1,221 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import pandas as pd
+
+from metrics import METRICS
+
+# 스케줄러 기본 설정
+MAX_IN_FLIGHT = 4          # 동시에 진행할 배치 다운로드 수
+REQUESTS_PER_SECOND = 2.0  # 토큰 버킷 충전 속도
+BURST = 4                  # 토큰 버킷 최대 크기
+MIN_BATCH_SIZE = 10
+MAX_BATCH_SIZE = 100
+INITIAL_BATCH_SIZE = 20
+TARGET_LATENCY = 8.0       # 배치 1개 다운로드 목표 시간(초). 이보다 빠르면 배치를 키우고 느리면 줄임
+BASE_BACKOFF = 2.0         # 429/빈 프레임 발생 시 첫 대기 시간(초)
+MAX_BACKOFF = 60.0
+MAX_ATTEMPTS = 3           # 티커당 최대 시도 횟수
+
+
+class TokenBucket:
+    """
+    간단한 토큰 버킷 (스레드 안전)
+    초당 rate개씩 충전되고 최대 capacity개까지 쌓입니다. acquire()는 토큰이 생길 때까지 대기합니다.
+    """
+
+    def __init__(self, rate=REQUESTS_PER_SECOND, capacity=BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+
+class YahooProvider:
+    """기본 Provider: yfinance로 일봉 다운로드"""
+
+    def download(self, tickers, **kwargs):
+        import yfinance as yf
+        return yf.download(tickers, progress=False, group_by='ticker', **kwargs)
+
+
+class FixtureProvider:
+    """
+    네트워크 없이 로컬 파일로 yfinance를 흉내내는 Provider (테스트/벤치마크용)
+    root 폴더의 <TICKER>.parquet (또는 .csv) 파일을 읽어
+    yf.download(group_by='ticker')와 같은 모양으로 돌려줍니다.
+    """
+
+    def __init__(self, root, latency=0.0):
+        self.root = root
+        self.latency = latency
+
+    def _load(self, ticker):
+        for ext, reader in (('.parquet', pd.read_parquet), ('.csv', lambda p: pd.read_csv(p, index_col=0, parse_dates=True))):
+            path = os.path.join(self.root, ticker + ext)
+            if os.path.exists(path):
+                return reader(path)
+        return None
+
+    def download(self, tickers, period=None, start=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        frames = {}
+        for t in tickers:
+            df = self._load(t)
+            if df is None or df.empty:
+                continue
+            if start is not None:
+                df = df[df.index >= pd.Timestamp(start)]
+            elif period is not None:
+                df = df[df.index > df.index[-1] - pd.Timedelta(days=365 if period == '1y' else int(period.rstrip('d')))]
+            frames[t] = df
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1).sort_index()
+
+
+def is_rate_limit_error(error):
+    """429 / Too Many Requests 계열 에러 판별 (yfinance는 YFRateLimitError로 올려줌)"""
+    text = f"{type(error).__name__} {error}".lower()
+    return '429' in text or 'too many requests' in text or 'ratelimit' in text or 'rate limit' in text
+
+
+class FetchScheduler:
+    """
+    배치 다운로드 스케줄러
+    - max_in_flight개의 배치 다운로드를 동시에 진행 (고정 20개 배치 + sleep(1) 직렬 처리 대체)
+    - 모든 요청은 토큰 버킷을 통과 (초당 요청 수 제한)
+    - 429 또는 빈 프레임이면 지수 백오프 후 배치를 다시 큐에 넣음 (모든 워커가 같이 쉼)
+    - 배치 다운로드 시간에 맞춰 배치 크기를 자동 조절
+    provider는 download(tickers, **kwargs)만 있으면 교체 가능합니다 (FixtureProvider 등).
+    """
+
+    def __init__(self, provider=None, max_in_flight=MAX_IN_FLIGHT, rate=REQUESTS_PER_SECOND, burst=BURST,
+                 batch_size=INITIAL_BATCH_SIZE, min_batch_size=MIN_BATCH_SIZE, max_batch_size=MAX_BATCH_SIZE,
+                 target_latency=TARGET_LATENCY, max_attempts=MAX_ATTEMPTS):
+        self.provider = provider or YahooProvider()
+        self.max_in_flight = max_in_flight
+        self.bucket = TokenBucket(rate, burst)
+        self.batch_size = batch_size
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.target_latency = target_latency
+        self.max_attempts = max_attempts
+
+        self.lock = threading.Lock()
+        self.cooldown_until = 0.0
+        self.throttle_streak = 0
+        self.stats = {'requests': 0, 'throttled': 0, 'requeued': 0, 'gave_up': 0}
+
+    # --- 적응형 조절 ---
+
+    def _on_success(self, latency):
+        with self.lock:
+            self.throttle_streak = 0
+            if latency < self.target_latency / 2:
+                self.batch_size = min(self.max_batch_size, int(self.batch_size * 1.25) + 1)
+            elif latency > self.target_latency:
+                self.batch_size = max(self.min_batch_size, int(self.batch_size * 0.7))
+
+    def _on_throttle(self):
+        with self.lock:
+            self.throttle_streak += 1
+            self.stats['throttled'] += 1
+            delay = min(MAX_BACKOFF, BASE_BACKOFF * 2 ** (self.throttle_streak - 1))
+            delay += random.uniform(0, delay / 4)
+            self.cooldown_until = max(self.cooldown_until, time.monotonic() + delay)
+            self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+            print(f"  [Scheduler] 요청 제한 감지 → {delay:.1f}초 대기, 배치 크기 {self.batch_size}")
+
+    def _wait_cooldown(self):
+        while True:
+            with self.lock:
+                remaining = self.cooldown_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    # --- 다운로드 ---
+
+    def _download_one(self, batch, kwargs):
+        self._wait_cooldown()
+        self.bucket.acquire()
+        with self.lock:
+            self.stats['requests'] += 1
+        started = time.monotonic()
+        try:
+            data = self.provider.download(batch, **kwargs)
+            return data, time.monotonic() - started, None
+        except Exception as e:
+            return None, time.monotonic() - started, e
+
+    def download_all(self, tickers, **kwargs):
+        """
+        티커 전체를 배치로 나눠 동시에 다운로드하고, 끝나는 순서대로 (batch, data)를 yield합니다.
+        최대 시도 횟수를 넘긴 배치는 빈 DataFrame으로 yield합니다.
+        """
+        pending = deque(tickers)
+        attempts = {}
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            in_flight = {}
+            while pending or in_flight:
+                while pending and len(in_flight) < self.max_in_flight:
+                    size = min(self.batch_size, len(pending))
+                    batch = [pending.popleft() for _ in range(size)]
+                    in_flight[executor.submit(self._download_one, batch, kwargs)] = batch
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = in_flight.pop(future)
+                    data, latency, error = future.result()
+                    METRICS.add_time('download_batch', latency)
+                    METRICS.incr('download.requests')
+
+                    throttled = (error is not None and is_rate_limit_error(error)) or \
+                        (error is None and (data is None or data.empty))
+                    if error is not None and not throttled:
+                        print(f"  [Scheduler] 배치 다운로드 에러: {error}")
+
+                    if error is None and not throttled:
+                        self._on_success(latency)
+                        # 응답 바이트는 yfinance가 노출하지 않으므로 받은 프레임 크기로 대신 기록
+                        METRICS.incr('download.rows', len(data))
+                        METRICS.incr('download.bytes', int(data.memory_usage(index=True).sum()))
+                        yield batch, data
+                        continue
+
+                    if throttled:
+                        METRICS.incr('download.throttled')
+                        self._on_throttle()
+                    else:
+                        METRICS.incr('download.errors')
+                    # 재시도 횟수는 티커 단위로 셈 (다시 큐에 들어가면 배치 크기가 바뀔 수 있음)
+                    retry, gave_up = [], []
+                    for t in batch:
+                        attempts[t] = attempts.get(t, 1) + 1
+                        (retry if attempts[t] <= self.max_attempts else gave_up).append(t)
+                    if retry:
+                        self.stats['requeued'] += 1
+                        pending.extendleft(reversed(retry))
+                    if gave_up:
+                        self.stats['gave_up'] += 1
+                        METRICS.incr('download.gave_up_tickers', len(gave_up))
+                        yield gave_up, pd.DataFrame()
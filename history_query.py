@@ -0,0 +1,206 @@
+import json
+import os
+
+import pandas as pd
+
+import changes
+import history_store
+
+# 히스토리 시계열 조회
+# history_index.json에 있는 날짜별 스냅샷을 (날짜, 티커) 긴 테이블로 모아 parquet로 캐시해 두고,
+# 새 날짜가 생기면 그 날짜만 읽어서 덧붙입니다. 조회는 날짜 × 티커 행렬(pivot)로 합니다.
+HISTORY_INDEX = "static/history_index.json"
+STATIC_DIR = "static"
+MATRIX_CACHE_DIR = "cache/history"
+TRENDS_FILE = "static/trends.json"
+
+TICKER_METRICS = ['Price', 'RS_6mo', 'RS_3mo', 'RS_1mo', '50DIV', 'RS_Rank_Pct']
+INDUSTRY_METRICS = ['Count', 'WRS_6mo', 'WRS_6mo_MD', 'WRS_MD_Rank_Pct', 'Breadth_6mo']
+
+
+def _read_index(index_file=HISTORY_INDEX):
+    if not os.path.exists(index_file):
+        return []
+    with open(index_file, 'r', encoding='utf-8') as f:
+        return json.load(f).get('dates', [])
+
+
+def _load_day(entry, static_dir=STATIC_DIR):
+    """history_index 항목 하나 → (티커 행 DataFrame, 업종 행 DataFrame)"""
+    path = os.path.join(static_dir, entry['filename'])
+    with open(path, 'r', encoding='utf-8') as f:
+        data = history_store.decode_snapshot(json.load(f), os.path.dirname(path))
+    date = pd.Timestamp(entry['date'])
+
+    rows = pd.DataFrame(data.get('data') or [])
+    if not rows.empty:
+        rows = rows[['Ticker', 'Sector', 'Industry'] + [c for c in TICKER_METRICS if c in rows.columns]]
+        rows.insert(0, 'date', date)
+
+    wrs = pd.DataFrame(data.get('wrs_data') or [])
+    if not wrs.empty:
+        wrs = wrs[['Sector', 'Industry'] + [c for c in INDUSTRY_METRICS if c in wrs.columns]]
+        wrs.insert(0, 'date', date)
+    return rows, wrs
+
+
+def _concat(frames, sort_by):
+    """빈 프레임은 빼고 이어붙여 정렬 (pandas가 빈 프레임을 dtype 결정에 섞지 않도록), 모두 비면 빈 프레임"""
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True).sort_values(sort_by)
+
+
+class HistoryMatrix:
+    """
+    히스토리 스냅샷 전체를 메모리에 올려두고 시계열 질의에 답합니다.
+    - build(): 캐시(parquet)에 없는 날짜만 읽어 추가
+    - trajectory(): 티커 하나의 지표 추이
+    - top_rank_improvers(): N일 동안 RS 순위가 가장 많이 오른 종목
+    - rising_industries(): WRS 중앙값이 K번 연속 오른 업종
+    """
+
+    def __init__(self, index_file=HISTORY_INDEX, static_dir=STATIC_DIR, cache_dir=MATRIX_CACHE_DIR):
+        self.index_file = index_file
+        self.static_dir = static_dir
+        self.cache_dir = cache_dir
+        self.rows = pd.DataFrame()
+        self.wrs = pd.DataFrame()
+        self._pivots = {}
+
+    def _cache_path(self, name):
+        return os.path.join(self.cache_dir, f"{name}.parquet")
+
+    def build(self):
+        """캐시를 읽고 history_index.json에 새로 생긴 날짜만 덧붙입니다. 반환값: 추가된 날짜 수"""
+        cache_mtime = 0
+        if os.path.exists(self._cache_path('rows')):
+            self.rows = pd.read_parquet(self._cache_path('rows'))
+            self.wrs = pd.read_parquet(self._cache_path('wrs'))
+            cache_mtime = os.path.getmtime(self._cache_path('rows'))
+
+        known = set(self.rows['date'].dt.strftime('%Y-%m-%d')) if not self.rows.empty else set()
+        new_entries = []
+        for entry in _read_index(self.index_file):
+            path = os.path.join(self.static_dir, entry['filename'])
+            if entry['date'] not in known:
+                new_entries.append(entry)
+            elif os.path.exists(path) and os.path.getmtime(path) > cache_mtime:
+                # 같은 날 재실행으로 다시 쓰인 스냅샷 → 해당 날짜만 다시 읽음
+                date = pd.Timestamp(entry['date'])
+                self.rows = self.rows[self.rows['date'] != date]
+                if not self.wrs.empty:
+                    self.wrs = self.wrs[self.wrs['date'] != date]
+                new_entries.append(entry)
+
+        new_rows, new_wrs = [], []
+        for entry in new_entries:
+            try:
+                rows, wrs = _load_day(entry, self.static_dir)
+            except Exception as e:
+                print(f"히스토리 로드 에러 ({entry['date']}): {e}")
+                continue
+            new_rows.append(rows)
+            new_wrs.append(wrs)
+
+        if new_rows:
+            self.rows = _concat([self.rows] + new_rows, ['date', 'Ticker'])
+            self.wrs = _concat([self.wrs] + new_wrs, ['date', 'Sector', 'Industry'])
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.rows.to_parquet(self._cache_path('rows'), index=False)
+            self.wrs.to_parquet(self._cache_path('wrs'), index=False)
+
+        self._pivots = {}
+        return len(new_rows)
+
+    # --- 행렬 ---
+
+    def matrix(self, metric):
+        """날짜 × 티커 행렬 (한 번 만든 pivot은 재사용)"""
+        if metric not in self._pivots:
+            self._pivots[metric] = self.rows.pivot_table(index='date', columns='Ticker', values=metric, aggfunc='last')
+        return self._pivots[metric]
+
+    def industry_matrix(self, metric='WRS_6mo_MD'):
+        """날짜 × (Sector, Industry) 행렬"""
+        key = ('industry', metric)
+        if key not in self._pivots:
+            self._pivots[key] = self.wrs.pivot_table(index='date', columns=['Sector', 'Industry'], values=metric, aggfunc='last')
+        return self._pivots[key]
+
+    @property
+    def dates(self):
+        return self.matrix('RS_6mo').index
+
+    # --- 질의 ---
+
+    def trajectory(self, ticker, metric='RS_6mo', days=60):
+        """티커 하나의 최근 days개 스냅샷 지표 추이 (Series, 날짜 인덱스)"""
+        m = self.matrix(metric)
+        if ticker not in m.columns:
+            return pd.Series(dtype='float64')
+        return m[ticker].iloc[-days:].dropna()
+
+    def top_rank_improvers(self, n=50, days=20):
+        """
+        days개 스냅샷 전 대비 RS_Rank_Pct가 가장 많이 좋아진 종목 (값이 작을수록 상위)
+        반환값: Ticker, 이전/현재 순위, 개선폭 DataFrame
+        """
+        m = self.matrix('RS_Rank_Pct')
+        if len(m) < 2:
+            return pd.DataFrame(columns=['Ticker', 'Rank_Before', 'Rank_Now', 'Improvement'])
+        before = m.iloc[max(0, len(m) - 1 - days)]
+        now = m.iloc[-1]
+        out = pd.DataFrame({'Rank_Before': before, 'Rank_Now': now})
+        out['Improvement'] = out['Rank_Before'] - out['Rank_Now']
+        out = out.dropna().sort_values('Improvement', ascending=False).head(n)
+        return out.rename_axis('Ticker').reset_index()
+
+    def rising_industries(self, k=3, metric='WRS_6mo_MD'):
+        """
+        최근 k번 연속 지표가 오른 업종 (값이 그대로인 날(주말 등)은 건너뜀)
+        반환값: Sector, Industry, 현재 값, k번 상승 폭 DataFrame
+        """
+        m = self.industry_matrix(metric)
+        results = []
+        for key in m.columns:
+            series = m[key].dropna()
+            series = series[series.diff() != 0]  # 주말/휴일 중복 스냅샷 제거
+            if len(series) < k + 1:
+                continue
+            tail = series.iloc[-(k + 1):]
+            if (tail.diff().iloc[1:] > 0).all():
+                results.append({'Sector': key[0], 'Industry': key[1],
+                                metric: float(tail.iloc[-1]), 'Change': float(tail.iloc[-1] - tail.iloc[0])})
+        out = pd.DataFrame(results, columns=['Sector', 'Industry', metric, 'Change'])
+        return out.sort_values('Change', ascending=False).reset_index(drop=True)
+
+
+def write_trends(matrix=None, trends_file=TRENDS_FILE):
+    """UI용 추세 파일(static/trends.json) 생성: 순위 상승 종목, 연속 상승 업종"""
+    if matrix is None:
+        matrix = HistoryMatrix()
+        matrix.build()
+    if matrix.rows.empty:
+        return None
+
+    def records(df):
+        return json.loads(df.to_json(orient='records'))
+
+    trends = {
+        "last_date": matrix.dates[-1].strftime('%Y-%m-%d'),
+        "history_days": len(matrix.dates),
+        "rank_improvers_5": records(matrix.top_rank_improvers(n=50, days=5)),
+        "rank_improvers_20": records(matrix.top_rank_improvers(n=50, days=20)),
+        "rising_industries_3": records(matrix.rising_industries(k=3)),
+    }
+    changes.write_if_changed(trends_file, json.dumps(trends, ensure_ascii=False, separators=(',', ':')))
+    return trends_file
+
+
+if __name__ == "__main__":
+    hm = HistoryMatrix()
+    added = hm.build()
+    print(f"히스토리 행렬: {len(hm.dates)}일 × {hm.matrix('RS_6mo').shape[1]}종목 (새로 추가 {added}일)")
+    print(f"추세 파일 저장: {write_trends(hm)}")
@@ -0,0 +1,277 @@
+import hashlib
+import json
+import math
+import os
+
+import changes
+from scan_table import ScanTable
+
+# 히스토리 아카이브 (날짜별 컬럼형 스냅샷)
+# result.json 전체를 날짜마다 복사하던 방식 대신:
+# - 행(dict) 리스트를 컬럼 배열로 저장 (키 이름 반복 제거)
+# - Sector/Industry처럼 반복되는 문자열은 사전(dictionary) 인코딩 (고유값 목록 + 정수 코드)
+# - 실수는 컬럼별 고정 소수 자릿수의 정수로 양자화 (예: RS 6자리 → -0.021619772912890654 대신 -21620), NaN은 null
+# - 공백 없는 JSON
+# - (선택) 델타: 직전 키프레임과 똑같은 컬럼(Ticker, Sector/Industry 코드 등)은 {"type":"base"}로만 표시
+# 브라우저(index.html)에서도 바로 읽을 수 있도록 JSON을 유지합니다.
+HISTORY_DIR = "static/history"
+SNAPSHOT_FORMAT = "rs-snapshot-v1"
+SNAPSHOT_PREFIX = "snap_"
+LEGACY_PREFIX = "result_"
+
+MAX_DECIMALS = 6           # 실수 컬럼 기본 소수 자릿수 (화면은 RS 4자리까지 표시)
+COLUMN_DECIMALS = {'Price': 4}
+DICT_ENCODE_RATIO = 0.5    # 고유값 비율이 이보다 낮은 문자열 컬럼만 사전 인코딩
+KEYFRAME_MAX_AGE_DAYS = 7  # 델타 스냅샷의 기준(키프레임)으로 쓸 수 있는 최대 경과일
+COLUMN_TYPES = ('dict', 'num', 'plain')
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and (math.isnan(value) or math.isinf(value)))
+
+
+def _column_decimals(name, values):
+    """
+    값이 정확히 표현되는 최소 소수 자릿수 (최대 MAX_DECIMALS, 컬럼별 상한 COLUMN_DECIMALS)
+    예: 50DIV(소수 2자리) → 2, RS_6mo → 6
+    """
+    limit = COLUMN_DECIMALS.get(name, MAX_DECIMALS)
+    for k in range(limit + 1):
+        scale = 10 ** k
+        if all(abs(round(v * scale) - v * scale) < 1e-6 for v in values):
+            return k
+    return limit
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _table_columns(rows):
+    """(컬럼 이름 리스트, 이름 → 값 리스트 함수) — ScanTable은 행 dict 없이 컬럼 단위로"""
+    if isinstance(rows, ScanTable):
+        return list(rows.columns), rows.column
+    columns = []
+    for row in rows:
+        for key in row:
+            if key not in columns:
+                columns.append(key)
+    return columns, lambda name: [row.get(name) for row in rows]
+
+
+def encode_column(name, values):
+    """값 리스트 → 컬럼 인코딩 (사전 / 양자화 실수 / 그대로)"""
+    non_null = [v for v in values if v is not None]
+    if non_null and all(isinstance(v, str) for v in non_null):
+        uniques = list(dict.fromkeys(non_null))
+        if len(uniques) <= len(values) * DICT_ENCODE_RATIO:
+            lookup = {v: i for i, v in enumerate(uniques)}
+            return {'type': 'dict', 'values': uniques,
+                    'codes': [None if v is None else lookup[v] for v in values]}
+    if non_null and all(_is_number(v) for v in non_null):
+        finite = [v for v in non_null if not _is_missing(v)]
+        decimals = _column_decimals(name, finite)
+        scale = 10 ** decimals
+        return {'type': 'num', 'decimals': decimals,
+                'values': [None if _is_missing(v) else int(round(v * scale)) for v in values]}
+    return {'type': 'plain', 'values': values}
+
+
+def encode_table(rows):
+    """행(dict) 리스트 또는 ScanTable → 컬럼형 테이블"""
+    columns, values_of = _table_columns(rows)
+    return {'n': len(rows), 'columns': {name: encode_column(name, values_of(name)) for name in columns}}
+
+
+def decode_table(table):
+    """컬럼형 테이블 → 행(dict) 리스트"""
+    n = table['n']
+    names = list(table['columns'])
+    decoded = []
+    for name in names:
+        col = table['columns'][name]
+        if col['type'] == 'dict':
+            lookup = col['values']
+            decoded.append([None if c is None else lookup[c] for c in col['codes']])
+        elif col['type'] == 'num' and col['decimals'] > 0:
+            scale = 10 ** col['decimals']
+            decoded.append([None if v is None else v / scale for v in col['values']])
+        else:
+            decoded.append(col['values'])
+    return [{name: decoded[j][i] for j, name in enumerate(names)} for i in range(n)]
+
+
+def _is_table(value):
+    return isinstance(value, ScanTable) or (isinstance(value, list) and all(isinstance(v, dict) for v in value))
+
+
+def _dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), allow_nan=False)
+
+
+def column_digest(col):
+    """인코딩된 컬럼의 해시 (키프레임 컬럼과 같은지 비교용)"""
+    return hashlib.sha1(_dumps(col).encode('utf-8')).hexdigest()
+
+
+def _digest_columns(obj):
+    """json.load object_hook: 인코딩된 컬럼을 읽자마자 해시로 바꿔 값 리스트를 들고 있지 않음"""
+    if obj.get('type') in COLUMN_TYPES and ('values' in obj or 'codes' in obj):
+        return column_digest(obj)
+    return obj
+
+
+def iter_snapshot_json(result_data, base=None, base_date=None, extra_meta=None):
+    """
+    result.json 구조 → 스냅샷 JSON 조각 (리스트/ScanTable 값은 테이블로, 나머지는 meta로)
+    컬럼 하나씩 인코딩 → 직렬화 → 버리므로 인코딩된 전체 테이블을 메모리에 두지 않습니다.
+    base(키프레임 스냅샷, 컬럼이 해시여도 됨)가 주어지면 base와 똑같은 컬럼은 참조로만 남깁니다.
+    extra_meta는 meta 뒤에 덧붙입니다 (summary.json의 shards 등).
+    """
+    meta = {key: value for key, value in result_data.items() if not _is_table(value)}
+    meta.update(extra_meta or {})
+    tables = [key for key, value in result_data.items() if _is_table(value)]
+
+    yield '{"format":%s,"meta":%s,"tables":{' % (_dumps(SNAPSHOT_FORMAT), _dumps(meta))
+    referenced = 0
+    for t, key in enumerate(tables):
+        rows = result_data[key]
+        base_table = base['tables'].get(key) if base is not None else None
+        if base_table and base_table['n'] != len(rows):
+            base_table = None
+        columns, values_of = _table_columns(rows)
+        yield ('' if t == 0 else ',') + '%s:{"n":%d,"columns":{' % (_dumps(key), len(rows))
+        for c, name in enumerate(columns):
+            col = encode_column(name, values_of(name))
+            base_col = base_table['columns'].get(name) if base_table else None
+            if base_col is not None and \
+                    (base_col if isinstance(base_col, str) else column_digest(base_col)) == column_digest(col):
+                col = {'type': 'base'}
+                referenced += 1
+            yield ('' if c == 0 else ',') + _dumps(name) + ':' + _dumps(col)
+        yield '}}'
+    yield '},"order":%s' % _dumps(list(result_data))
+    if referenced:
+        yield ',"base":%s' % _dumps(base_date)
+    yield '}'
+
+
+def encode_snapshot(result_data, base=None, base_date=None):
+    """result.json 구조 → 스냅샷 구조 (dict, iter_snapshot_json과 같은 내용)"""
+    return json.loads(''.join(iter_snapshot_json(result_data, base, base_date)))
+
+
+def decode_snapshot(snapshot, history_dir=HISTORY_DIR):
+    """스냅샷 구조 → result.json 구조 (키 순서 포함, 델타면 키프레임 참조 복원)"""
+    if snapshot.get('format') != SNAPSHOT_FORMAT:
+        return snapshot  # 기존 result_*.json 그대로
+
+    if snapshot.get('base'):
+        with open(snapshot_path(snapshot['base'], history_dir), 'r', encoding='utf-8') as f:
+            base = json.load(f)
+        for key, table in snapshot['tables'].items():
+            for name, col in table['columns'].items():
+                if col['type'] == 'base':
+                    table['columns'][name] = base['tables'][key]['columns'][name]
+
+    out = {}
+    for key in snapshot.get('order') or (list(snapshot['meta']) + list(snapshot['tables'])):
+        if key in snapshot['tables']:
+            out[key] = decode_table(snapshot['tables'][key])
+        else:
+            out[key] = snapshot['meta'].get(key)
+    return out
+
+
+def snapshot_path(date_str, history_dir=HISTORY_DIR):
+    return os.path.join(history_dir, f"{SNAPSHOT_PREFIX}{date_str}.json")
+
+
+def find_keyframe(date_str, history_dir=HISTORY_DIR, digests=False):
+    """
+    date_str 이전의 가장 최근 키프레임(델타가 아닌 스냅샷)을 찾습니다.
+    KEYFRAME_MAX_AGE_DAYS보다 오래됐으면 None → 새 키프레임을 씀
+    digests=True면 컬럼 값 대신 컬럼 해시만 남김 (델타 비교용)
+    반환값: (날짜, 스냅샷) 또는 (None, None)
+    """
+    from datetime import datetime
+    current = datetime.strptime(date_str, '%Y-%m-%d')
+    for date_part, filename in sorted(list_history(history_dir).items(), reverse=True):
+        if date_part >= date_str or not filename.startswith(SNAPSHOT_PREFIX):
+            continue
+        if (current - datetime.strptime(date_part, '%Y-%m-%d')).days > KEYFRAME_MAX_AGE_DAYS:
+            break
+        with open(os.path.join(history_dir, filename), 'r', encoding='utf-8') as f:
+            snapshot = json.load(f, object_hook=_digest_columns if digests else None)
+        if not snapshot.get('base'):
+            return date_part, snapshot
+    return None, None
+
+
+def write_snapshot(result_data, date_str, history_dir=HISTORY_DIR, delta=True):
+    """
+    하루치 결과를 컬럼형 스냅샷으로 저장 (임시 파일 + rename, 내용이 같으면 건너뜀)
+    delta=True면 최근 키프레임과 같은 컬럼은 참조로 저장합니다.
+    """
+    os.makedirs(history_dir, exist_ok=True)
+    base_date, base = find_keyframe(date_str, history_dir, digests=True) if delta else (None, None)
+    path = snapshot_path(date_str, history_dir)
+    changes.write_chunks_if_changed(path, iter_snapshot_json(result_data, base, base_date))
+
+    # 같은 날짜의 기존 전체 복사본이 있으면 정리
+    legacy = os.path.join(history_dir, f"{LEGACY_PREFIX}{date_str}.json")
+    if os.path.exists(legacy):
+        os.remove(legacy)
+    return path
+
+
+def list_history(history_dir=HISTORY_DIR):
+    """
+    날짜별 히스토리 파일 목록 {날짜: 파일명} (스냅샷 우선, 없으면 기존 result_*.json)
+    """
+    if not os.path.exists(history_dir):
+        return {}
+    files = {}
+    for filename in os.listdir(history_dir):
+        if not filename.endswith('.json'):
+            continue
+        for prefix in (LEGACY_PREFIX, SNAPSHOT_PREFIX):
+            if filename.startswith(prefix):
+                date_part = filename[len(prefix):-len('.json')]
+                if prefix == SNAPSHOT_PREFIX or date_part not in files:
+                    files[date_part] = filename
+    return files
+
+
+def load_snapshot(date_str, history_dir=HISTORY_DIR):
+    """
+    특정 날짜의 result.json 모양 데이터를 복원합니다 (스냅샷/기존 파일 모두 지원).
+    없으면 None
+    """
+    filename = list_history(history_dir).get(date_str)
+    if filename is None:
+        return None
+    with open(os.path.join(history_dir, filename), 'r', encoding='utf-8') as f:
+        return decode_snapshot(json.load(f), history_dir)
+
+
+def migrate_legacy(history_dir=HISTORY_DIR):
+    """기존 result_*.json 전체 복사본을 컬럼형 스냅샷으로 변환"""
+    converted = 0
+    for date_str, filename in sorted(list_history(history_dir).items()):
+        if not filename.startswith(LEGACY_PREFIX):
+            continue
+        with open(os.path.join(history_dir, filename), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        write_snapshot(data, date_str, history_dir)
+        converted += 1
+    return converted
+
+
+if __name__ == "__main__":
+    import fetch_and_save
+
+    count = migrate_legacy()
+    print(f"히스토리 변환 완료: {count}개")
+    # 인덱스가 변환 전 result_*.json을 가리키지 않도록 다시 생성
+    fetch_and_save.update_history_index()
@@ -0,0 +1,200 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import price_store
+import rs_engine
+
+# 추가 지표 레지스트리
+# 지표는 배치 가격 행렬(날짜 × 티커) 전체에 대해 한 번에 계산되고,
+# 이동평균/고가 같은 중간값은 PriceContext가 (종류, 기간)별로 한 번만 계산해 지표끼리 공유합니다.
+# 사용할 지표는 indicators.json에서 고릅니다 (없으면 추가 지표 없음):
+#   {"enabled": ["20DIV", "200DIV", "RS_52W_High", "ATR_Pct", "Vol_Surge"]}
+# Price / RS / 50DIV는 기본 컬럼이라 항상 계산됩니다 (rs_engine.compute_rs_frame).
+# 지표마다 선언한 inputs(가격 필드)와 window(최소 봉 수)로 배치에 읽어 올 필드와 창 길이를 정하고
+# (required_fields / history_days), 배치 이력이 window보다 짧으면 계산하지 않고 NaN으로 둡니다.
+INDICATOR_CONFIG = "indicators.json"
+RS_HIGH_WINDOW = 252  # 52주 (영업일)
+ATR_WINDOW = 14
+VOLUME_WINDOW = 50    # 거래량 급증 기준: 직전 50일 평균
+
+REGISTRY = {}
+_enabled_cache = {}
+
+
+class Indicator:
+    """
+    지표 정의: 이름, 계산 함수(ctx → {컬럼: Series}), 필요한 가격 필드(inputs), 최소 봉 수(window), 출력 컬럼
+    inputs/window는 배치를 읽을 때 쓰입니다 (required_fields, history_days).
+    """
+
+    def __init__(self, name, fn, inputs, window, columns):
+        self.name = name
+        self.fn = fn
+        self.inputs = inputs
+        self.window = window
+        self.columns = columns
+
+
+def register(name, inputs=('Close',), window=None, columns=None):
+    """지표 등록 데코레이터 (같은 이름이면 덮어씀)"""
+    def decorator(fn):
+        REGISTRY[name] = Indicator(name, fn, tuple(inputs), window, list(columns or [name]))
+        return fn
+    return decorator
+
+
+class PriceContext:
+    """
+    배치 하나의 가격 행렬과 공유 계산 캐시
+    - field(name): 가격 필드 행렬 (없는 필드는 NaN 행렬, 예: 장중 스캔은 종가만 있음)
+    - latest / sma(window) / rs_line / true_range: (종류, 기간)별 한 번만 계산해 지표끼리 공유
+    """
+
+    def __init__(self, batch_data, close, benchmark_close):
+        self.batch_data = batch_data
+        self.close = close
+        self.benchmark_close = benchmark_close
+        self._fields = {'Close': close}
+        self._cache = {}
+
+    def cached(self, key, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def field(self, name):
+        if name not in self._fields:
+            matrix = rs_engine.extract_field_matrix(self.batch_data, name, list(self.close.columns))
+            self._fields[name] = matrix.reindex(index=self.close.index, columns=self.close.columns)
+        return self._fields[name]
+
+    def latest(self, name='Close'):
+        return self.cached(('latest', name), lambda: self.field(name).iloc[-1])
+
+    def sma(self, window, name='Close'):
+        """마지막 window봉 평균 (이력이 window보다 짧으면 NaN)"""
+        def compute():
+            frame = self.field(name)
+            if len(frame) < window:
+                return pd.Series(np.nan, index=frame.columns)
+            return frame.iloc[-window:].mean()
+        return self.cached(('sma', name, window), compute)
+
+    def rs_line(self):
+        """RS 라인 = 종목 종가 / 기본 벤치마크 종가 (날짜 맞춤)"""
+        def compute():
+            if self.benchmark_close is None:
+                return pd.DataFrame(np.nan, index=self.close.index, columns=self.close.columns)
+            bench = self.benchmark_close.reindex(self.close.index)
+            return self.close.div(bench, axis=0)
+        return self.cached(('rs_line',), compute)
+
+    def true_range(self):
+        def compute():
+            high, low = self.field('High'), self.field('Low')
+            prev_close = self.close.shift(1)
+            # fmax: 전일 종가가 없는 첫 봉은 고가 - 저가
+            return np.fmax(high - low, np.fmax((high - prev_close).abs(), (low - prev_close).abs()))
+        return self.cached(('true_range',), compute)
+
+
+def _divergence(ctx, window):
+    latest, ma = ctx.latest(), ctx.sma(window)
+    div = ((latest - ma) / ma * 100).round(2)
+    return div.mask(ma == 0)
+
+
+@register('20DIV', window=20)
+def div_20(ctx):
+    return {'20DIV': _divergence(ctx, 20)}
+
+
+@register('200DIV', window=200)
+def div_200(ctx):
+    return {'200DIV': _divergence(ctx, 200)}
+
+
+@register('RS_52W_High', window=RS_HIGH_WINDOW)
+def rs_52w_high(ctx):
+    """RS 라인이 52주(252봉, 티커 이력이 더 짧으면 있는 이력 안에서) 신고가인지"""
+    rs_line = ctx.rs_line().iloc[-RS_HIGH_WINDOW:]
+    latest = rs_line.iloc[-1]
+    flag = (latest >= rs_line.max()) & latest.notna()
+    return {'RS_52W_High': flag}
+
+
+@register('ATR_Pct', inputs=('High', 'Low', 'Close'), window=ATR_WINDOW + 1)
+def atr_pct(ctx):
+    """ATR(14, 단순 평균) / 종가 (%)"""
+    atr = ctx.true_range().iloc[-ATR_WINDOW:].mean()
+    return {'ATR_Pct': (atr / ctx.latest() * 100).round(2)}
+
+
+@register('Vol_Surge', inputs=('Volume',), window=VOLUME_WINDOW + 1)
+def volume_surge(ctx):
+    """마지막 거래량 / 직전 50일 평균 거래량 (배수)"""
+    volume = ctx.field('Volume')
+    average = volume.iloc[-(VOLUME_WINDOW + 1):-1].mean()
+    return {'Vol_Surge': (volume.iloc[-1] / average.where(average > 0)).round(2)}
+
+
+def load_enabled(path=INDICATOR_CONFIG):
+    """설정 파일의 enabled 목록 (프로세스당 한 번 읽음, 모르는 이름은 경고 후 제외)"""
+    if path in _enabled_cache:
+        return _enabled_cache[path]
+    enabled = []
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                names = json.load(f).get('enabled', [])
+            unknown = [n for n in names if n not in REGISTRY]
+            if unknown:
+                print(f"⚠️ 알 수 없는 지표 (무시): {', '.join(unknown)}")
+            enabled = [n for n in names if n in REGISTRY]
+        except (OSError, ValueError) as e:
+            print(f"지표 설정 로드 에러: {e}")
+    _enabled_cache[path] = enabled
+    return enabled
+
+
+def _names(enabled):
+    return load_enabled() if enabled is None else enabled
+
+
+def required_bars(enabled=None):
+    """활성화된 지표 중 가장 긴 window (봉 수, 지표가 없으면 0)"""
+    return max((REGISTRY[name].window or 0 for name in _names(enabled)), default=0)
+
+
+def required_fields(enabled=None):
+    """배치에 읽어 올 가격 필드: Close + 활성화된 지표의 inputs"""
+    return list(dict.fromkeys(['Close'] + [f for name in _names(enabled) for f in REGISTRY[name].inputs]))
+
+
+def history_days(enabled=None):
+    """배치 가격 창 길이 (달력일): 기본 창과 활성화된 지표의 최대 window 중 긴 쪽"""
+    return max(price_store.WINDOW_DAYS, price_store.bars_to_days(required_bars(enabled)))
+
+
+def compute(batch_data, close, benchmark_close, enabled=None):
+    """
+    활성화된 지표를 배치 전체에 대해 계산합니다.
+    반환값: 티커를 인덱스로 하는 DataFrame (지표 출력 컬럼), 활성화된 지표가 없으면 빈 DataFrame
+    """
+    names = _names(enabled)
+    if not names or close is None or close.empty:
+        return pd.DataFrame(index=close.columns if close is not None else None)
+    ctx = PriceContext(batch_data, close, benchmark_close)
+    frame = pd.DataFrame(index=close.columns)
+    for name in names:
+        indicator = REGISTRY[name]
+        if indicator.window and len(close) < indicator.window:
+            for column in indicator.columns:
+                frame[column] = np.nan  # 이력 부족
+            continue
+        for column, values in indicator.fn(ctx).items():
+            frame[column] = values
+    return frame
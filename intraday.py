@@ -0,0 +1,125 @@
+import json
+import os
+
+import pandas as pd
+
+import indicators
+import metadata
+import rs_engine
+import utils
+from metrics import METRICS
+from price_store import PriceStore, split_download_frame
+from scan_table import ScanTable
+
+# 장중(온디맨드) 스캔
+# 저장된 1년치 일봉(cache/prices)은 그대로 쓰고, 유니버스 전체의 현재가만 일괄로 받아
+# 현재가를 마지막 봉으로 취급해 RS/50DIV/순위를 다시 계산합니다. (1년치 재다운로드 없음)
+QUOTE_PERIOD = "1d"       # 현재가 조회: 당일 분봉의 마지막 종가
+QUOTE_INTERVAL = "5m"
+RESULT_FILE = "static/result.json"
+
+
+def load_universe(result_file=RESULT_FILE):
+    """직전 실행 result.json의 티커 목록 (구글 시트를 다시 읽지 않음). 없으면 빈 리스트"""
+    if not os.path.exists(result_file):
+        return []
+    with open(result_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [{'Ticker': row['Ticker']} for row in data.get('data', []) if row.get('Ticker')]
+
+
+def fetch_live_quotes(price_store, yf_tickers):
+    """
+    티커 전체의 현재가를 FetchScheduler로 일괄 조회합니다 (당일 분봉의 마지막 종가).
+    반환값: {Yahoo 티커: (시각, 가격)}
+    """
+    quotes = {}
+    for batch, data in price_store.scheduler.download_all(yf_tickers, period=QUOTE_PERIOD, interval=QUOTE_INTERVAL):
+        for ticker, frame in split_download_frame(data, batch).items():
+            close = frame['Close'].dropna()
+            if len(close):
+                quotes[ticker] = (close.index[-1], float(close.iloc[-1]))
+    METRICS.incr('intraday.quotes', len(quotes))
+    return quotes
+
+
+def session_date(quotes):
+    """현재가 시각 중 가장 늦은 날짜 (거래소 현지 날짜, tz 제거)"""
+    latest = max(ts for ts, _ in quotes.values())
+    latest = pd.Timestamp(latest)
+    if latest.tzinfo is not None:
+        latest = latest.tz_localize(None)
+    return latest.normalize()
+
+
+def apply_live_prices(close, quotes, session):
+    """
+    종가 행렬(날짜 × 티커)의 마지막 봉을 현재가로 바꿉니다.
+    - 저장 이력에 이미 당일 봉이 있으면 그 행을 현재가로 교체
+    - 없으면 당일 행을 새로 추가 (현재가가 없는 티커는 직전 종가 유지)
+    """
+    live = pd.Series({t: price for t, (_, price) in quotes.items() if t in close.columns}, dtype='float64')
+    if close.empty or live.empty:
+        return close
+    if close.index[-1] < session:
+        new_row = close.ffill().iloc[[-1]]
+        new_row.index = pd.DatetimeIndex([session])
+        close = pd.concat([close, new_row])
+    else:
+        close = close.copy()
+    close.loc[close.index[-1], live.index] = live.values
+    return close
+
+
+def _as_panel(close):
+    """종가 행렬 → process_batch가 받는 (티커, 필드) MultiIndex 모양"""
+    return pd.concat({'Close': close}, axis=1).swaplevel(axis=1)
+
+
+def compute_intraday_rows(ticker_info_list, batch_size=20, price_store=None):
+    """
+    저장된 이력 + 현재가로 결과 행 계산 (get_market_cap_and_rs와 같은 행 모양)
+    반환값: (ScanTable, as_of 문자열) — 현재가를 하나도 못 받으면 ([], None)
+    """
+    # 가격 저장소는 읽기 전용 (증분 갱신도 하지 않음), 현재가 조회에만 스케줄러 사용
+    price_store = price_store or PriceStore(offline=True)
+    benchmarks = rs_engine.benchmark_tickers()
+    yf_tickers = [utils.sanitize_ticker_for_yf(item['Ticker']) for item in ticker_info_list]
+
+    with METRICS.timer('intraday_quotes'):
+        quotes = fetch_live_quotes(price_store, list(dict.fromkeys(benchmarks + yf_tickers)))
+    if not quotes:
+        print("현재가 조회 실패 → 장중 스캔 중단")
+        return [], None
+    session = session_date(quotes)
+    print(f"현재가 {len(quotes)}개 수신 (세션 {session.strftime('%Y-%m-%d')})")
+
+    # 벤치마크도 현재가를 마지막 봉으로
+    bench_close = {}
+    for ticker in benchmarks:
+        close = utils.extract_benchmark_close(price_store.window(ticker, indicators.history_days()))
+        if close is not None:
+            bench_close[ticker] = apply_live_prices(close.to_frame(ticker), quotes, session)[ticker]
+    primary_close = bench_close.get(rs_engine.PRIMARY_BENCHMARK)
+    max_window = max(rs_engine.RS_WINDOWS.values())
+    benchmark_returns = {name: rs_engine.compute_benchmark_returns(close)
+                         for name, close in bench_close.items() if len(close) > max_window}
+    extra_returns = {name: benchmark_returns[name] for name in rs_engine.EXTRA_BENCHMARKS if name in benchmark_returns}
+
+    results = ScanTable()
+    with METRICS.timer('intraday_compute'):
+        for i in range(0, len(ticker_info_list), batch_size):
+            batch_tickers = [item['Ticker'] for item in ticker_info_list[i:i + batch_size]]
+            data = price_store.get_batch([utils.sanitize_ticker_for_yf(t) for t in batch_tickers], refresh=False,
+                                         period_days=indicators.history_days(), fields=['Close'])
+            close = rs_engine.extract_close_matrix(data)
+            if close.empty:
+                continue
+            close = apply_live_prices(close, quotes, session)
+            results.extend(utils.process_batch(batch_tickers, _as_panel(close), primary_close,
+                                               extra_returns=extra_returns))
+
+    metadata.attach_metadata(results, utils.SECTOR_CACHE)
+    rs_engine.attach_sector_rs(results, rs_engine.compute_benchmark_returns(primary_close), benchmark_returns)
+    as_of = max(ts for ts, _ in quotes.values())
+    return results, pd.Timestamp(as_of).strftime('%Y-%m-%d %H:%M:%S %Z').strip()
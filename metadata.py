@@ -0,0 +1,152 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from metrics import METRICS
+
+# 메타데이터 캐시 유효기간 (일)
+SECTOR_TTL_DAYS = 7   # Sector/Industry: 주 1회 갱신
+SHARES_TTL_DAYS = 7   # 발행주식수: 주 1회 갱신 (시총 = 발행주식수 × 최신 종가)
+METADATA_WORKERS = 8  # 메타데이터 조회 전용 동시 요청 수
+CHUNK_SIZE = 200      # 이 개수마다 캐시 중간 저장
+
+INVALID_VALUES = ['N/A', 'nan', 'NONE', None, '']
+MARKET_CAP_VALUE = 'Market_Cap_Value'  # 숫자 시총 컬럼 (집계용, 'Market Cap'은 화면 표시용 문자열)
+
+
+def _is_stale(updated, ttl_days, today):
+    if not updated:
+        return True
+    try:
+        return datetime.strptime(updated, '%Y-%m-%d') + timedelta(days=ttl_days) <= today
+    except ValueError:
+        return True
+
+
+def needs_refresh(entry, today=None):
+    """
+    캐시 항목을 다시 조회해야 하는지 판단합니다.
+    - 캐시에 없음
+    - 마지막 Sector/Industry 조회(sector_updated)가 SECTOR_TTL_DAYS 지남
+    - 마지막 발행주식수 조회(shares_updated)가 SHARES_TTL_DAYS 지남
+    조회 시각은 값이 없을 때(ETF/우선주의 발행주식수, 'N/A' 섹터)도 기록하므로
+    그런 티커도 매 실행이 아니라 TTL마다 한 번만 다시 조회합니다.
+    """
+    today = today or datetime.utcnow()
+    if not entry:
+        return True
+    if _is_stale(entry.get('sector_updated'), SECTOR_TTL_DAYS, today):
+        return True
+    return _is_stale(entry.get('shares_updated'), SHARES_TTL_DAYS, today)
+
+
+def fetch_metadata(yf_ticker):
+    """
+    yfinance에서 단일 티커 메타데이터 조회 (t.info 1회)
+    반환값: {'Sector', 'Industry', 'Shares'} 또는 실패 시 None
+    """
+    import yfinance as yf
+    try:
+        t = yf.Ticker(yf_ticker)
+        info = t.info
+
+        quote_type = (info.get('quoteType') or '').upper()
+        if 'ETF' in quote_type:
+            sector = industry = 'ETF'  # User requested both to be ETF
+        elif 'ETN' in quote_type:
+            sector = industry = 'ETN'  # User requested both to be ETN
+        else:
+            sector = info.get('sector') or 'N/A'
+            industry = info.get('industry') or 'N/A'
+
+        shares = info.get('sharesOutstanding') or info.get('impliedSharesOutstanding')
+        if not shares:
+            try:
+                shares = t.fast_info['shares']
+            except Exception:
+                shares = None
+
+        return {'Sector': sector, 'Industry': industry, 'Shares': shares}
+    except Exception as e:
+        print(f"메타데이터 조회 에러 ({yf_ticker}): {e}")
+        return None
+
+
+def refresh_metadata(cache, ticker_map, max_workers=METADATA_WORKERS, fetch_fn=fetch_metadata,
+                     chunk_size=CHUNK_SIZE, on_chunk=None, first=None):
+    """
+    만료/누락된 캐시 항목만 골라 일괄 조회하고 cache에 반영합니다.
+    ticker_map: {원래 티커: Yahoo 티커}, 캐시 키는 원래 티커
+    조회는 워커 스레드에서, 캐시 쓰기는 호출한 스레드에서만 합니다.
+    chunk_size개마다 on_chunk()를 호출합니다 (중간 저장용).
+    first(오늘 새로 편입된 티커 등)는 캐시에 없으므로 다른 만료 항목보다 먼저 조회합니다.
+    캐시 적중/미스는 여기서 티커당 한 번만 셉니다 (이후 attach_metadata는 count=False).
+    반환값: 새로 조회한 티커 수
+    """
+    today = datetime.utcnow()
+    today_str = today.strftime('%Y-%m-%d')
+    misses = [t for t in ticker_map if needs_refresh(cache.get(t), today)]
+    if first:
+        first = set(first)
+        misses.sort(key=lambda t: t not in first)  # 안정 정렬: 새 티커 먼저, 나머지는 원래 순서
+    METRICS.incr('metadata.fresh', len(ticker_map) - len(misses))
+    METRICS.incr('metadata.stale', len(misses))
+    if not misses:
+        return 0
+
+    print(f"메타데이터 갱신 중... ({len(misses)}개, 캐시 적중 {len(ticker_map) - len(misses)}개)")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for start in range(0, len(misses), chunk_size):
+            chunk = misses[start:start + chunk_size]
+            with METRICS.timer('metadata_chunk'):
+                fetched = list(executor.map(lambda t: fetch_fn(ticker_map[t]), chunk))
+            METRICS.incr('metadata.requests', len(chunk))
+
+            for ticker, meta in zip(chunk, fetched):
+                if meta is None:
+                    METRICS.incr('metadata.failures')
+                    continue  # 조회 실패 → 기존 캐시 유지 (다음 실행에 재시도)
+                entry = cache.peek(ticker) or {}
+                if meta['Sector'] not in INVALID_VALUES and meta['Industry'] not in INVALID_VALUES:
+                    entry.update({'Sector': meta['Sector'], 'Industry': meta['Industry']})
+                elif entry.get('Sector') in INVALID_VALUES:
+                    entry.update({'Sector': meta['Sector'], 'Industry': meta['Industry']})
+                if meta['Shares']:
+                    entry['Shares'] = int(meta['Shares'])
+                # 값이 없어도 조회 시각은 기록 (없는 값도 TTL 동안 캐시 → 매 실행 재조회 방지)
+                entry.update({'sector_updated': today_str, 'shares_updated': today_str})
+                cache[ticker] = entry
+
+            if on_chunk is not None:
+                on_chunk()
+    return len(misses)
+
+
+def market_cap_from_cache(entry, price):
+    """캐시된 발행주식수 × 최신 종가로 시총 계산 (없으면 0)"""
+    if not entry or not entry.get('Shares') or price is None or price != price:
+        return 0
+    return entry['Shares'] * price
+
+
+def attach_metadata(results, cache, count=True):
+    """
+    결과 표(ScanTable)에 Sector/Industry/Market Cap 컬럼을 채웁니다 (네트워크 호출 없음).
+    Market Cap은 표시용 문자열('12.34B'/'N/A'), 숫자 값은 MARKET_CAP_VALUE 컬럼(없으면 None)에 같이 넣습니다.
+    count=False면 캐시 적중/미스를 세지 않음 (refresh_metadata에서 이미 센 경우)
+    """
+    lookup = cache.get if count else cache.peek
+    sectors, industries, market_caps, values = [], [], [], []
+    for ticker, price in zip(results.column('Ticker'), results.column('Price')):
+        entry = lookup(ticker) or {}
+        sector = entry.get('Sector')
+        industry = entry.get('Industry')
+        sectors.append(sector if sector not in INVALID_VALUES else 'N/A')
+        industries.append(industry if industry not in INVALID_VALUES else 'N/A')
+        market_cap = market_cap_from_cache(entry, price)
+        market_caps.append(f"{market_cap / 1e9:.2f}B" if market_cap else "N/A")
+        values.append(float(market_cap) if market_cap else None)
+    results.set_column('Sector', sectors)
+    results.set_column('Industry', industries)
+    results.set_column('Market Cap', market_caps)
+    results.set_column(MARKET_CAP_VALUE, values)
+    return results
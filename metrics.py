@@ -0,0 +1,83 @@
+import contextlib
+import json
+import os
+import threading
+import time
+
+# 실행 지표 (타이머 / 카운터)
+# 각 단계가 METRICS.timer('단계') / METRICS.incr('카운터')로 기록하고,
+# 실행이 끝나면 static/run_metrics.json(result.json 옆)에 기계가 읽을 수 있는 형태로 저장합니다.
+# 다운로드는 워커 스레드에서 기록하므로 모든 갱신은 Lock으로 보호합니다.
+METRICS_FILE = "static/run_metrics.json"
+
+
+class RunMetrics:
+    """
+    실행 한 번의 지표
+    - timer(name): with 블록 실행 시간 누적 (호출 횟수, 합계, 최대)
+    - incr(name, value): 카운터 증가 (요청 수, 바이트, 실패 수 등)
+    - set(name, value): 값 기록 (캐시 적중률, 단계별 통계 dict 등)
+    - write(): run_metrics.json 저장
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.timers = {}
+            self.counters = {}
+            self.values = {}
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            entry = self.timers.setdefault(name, {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+            entry['calls'] += 1
+            entry['seconds'] += seconds
+            entry['max_seconds'] = max(entry['max_seconds'], seconds)
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set(self, name, value):
+        with self._lock:
+            self.values[name] = value
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "started": time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime(self.started)),
+                "wall_seconds": round(time.time() - self.started, 3),
+                "timers": {name: {'calls': t['calls'], 'seconds': round(t['seconds'], 4),
+                                  'max_seconds': round(t['max_seconds'], 4)} for name, t in self.timers.items()},
+                "counters": dict(self.counters),
+                "values": dict(self.values),
+            }
+
+    def write(self, path=METRICS_FILE):
+        data = self.to_dict()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return path
+
+
+def hit_rate(hits, misses):
+    total = hits + misses
+    return round(hits / total, 4) if total else None
+
+
+# 실행 전체에서 공유하는 지표 (fetch_and_save 실행 1회 = 1개)
+METRICS = RunMetrics()
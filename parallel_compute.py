@@ -0,0 +1,100 @@
+import itertools
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# 가격 계산 단계의 멀티프로세스 실행
+# 티커(열) 묶음 단위로 프로세스 풀에 나눠, 각 워커가 가격 저장소(cache/prices)에서
+# 자기 열의 종가를 직접 읽고 RS/50DIV를 계산합니다.
+# 부모와 워커 사이에는 가격 프레임을 보내지 않고 (티커 목록 → 결과 행)만 주고받습니다.
+# 티커 수가 PARALLEL_MIN_TICKERS보다 적거나 워커가 1개면 지금처럼 한 프로세스에서 계산합니다.
+COMPUTE_WORKERS = None        # None이면 CPU 코어 수
+PARALLEL_MIN_TICKERS = 2000   # 이보다 적으면 프로세스 시작 비용이 더 큼
+BATCHES_PER_TASK = 25         # 작업 하나 = 배치 25개 (배치 20개 기준 500티커)
+TASKS_IN_FLIGHT_PER_WORKER = 2  # 워커당 동시에 제출해 두는 작업 수 (결과 대기 메모리 상한)
+
+_worker = {}  # 워커 프로세스 상태 (가격 저장소, 벤치마크 종가, 다운로드 실패 사유, 추가 벤치마크 수익률)
+
+
+def _init_worker(store_root, benchmark_close, fetch_failures, extra_returns):
+    from price_store import PriceStore
+    _worker.update({
+        'store': PriceStore(store_root, offline=True),
+        'benchmark_close': benchmark_close,
+        'fetch_failures': fetch_failures,
+        'extra_returns': extra_returns,
+    })
+
+
+def run_batch(batch_index, batch_tickers, price_store, benchmark_close, fetch_failures=None, extra_returns=None):
+    """
+    배치 하나: 저장소에서 가격 창 로드 (지표가 쓰는 필드/기간만, indicators.history_days) → process_batch
+    반환값: (배치 번호, 결과 행, 실패 사유, 로드 시간, 계산 시간, 에러 메시지 또는 None)
+    에러가 나면 배치 전체를 일시적 실패(transient)로 돌려줍니다 (재시도 대상).
+    """
+    import indicators
+    import utils
+
+    load_seconds = compute_seconds = 0.0
+    try:
+        start = time.perf_counter()
+        data = price_store.get_batch([utils.sanitize_ticker_for_yf(t) for t in batch_tickers], refresh=False,
+                                     period_days=indicators.history_days(), fields=indicators.required_fields())
+        load_seconds = time.perf_counter() - start
+
+        failures = {}
+        start = time.perf_counter()
+        rows = utils.process_batch(batch_tickers, data, benchmark_close, failures, fetch_failures, extra_returns)
+        compute_seconds = time.perf_counter() - start
+        return batch_index, rows, failures, load_seconds, compute_seconds, None
+    except Exception as e:
+        return batch_index, [], {t: 'transient' for t in batch_tickers}, load_seconds, compute_seconds, str(e)
+
+
+def _run_task(batches):
+    return [run_batch(index, tickers, _worker['store'], _worker['benchmark_close'],
+                      _worker['fetch_failures'], _worker['extra_returns'])
+            for index, tickers in batches]
+
+
+def resolve_workers(workers=None):
+    workers = workers if workers is not None else COMPUTE_WORKERS
+    return max(1, workers or os.cpu_count() or 1)
+
+
+def compute_batches(batches, price_store, benchmark_close, extra_returns=None, workers=None):
+    """
+    [(배치 번호, 원래 티커 리스트), ...] → run_batch 결과를 끝나는 순서대로 yield
+    워커가 2개 이상이고 티커가 PARALLEL_MIN_TICKERS 이상이면 프로세스 풀(spawn)에서,
+    아니면 현재 프로세스에서 순서대로 계산합니다.
+    """
+    workers = resolve_workers(workers)
+    total_tickers = sum(len(tickers) for _, tickers in batches)
+    fetch_failures = dict(price_store.fetch_failures)
+
+    if workers <= 1 or total_tickers < PARALLEL_MIN_TICKERS:
+        for index, tickers in batches:
+            yield run_batch(index, tickers, price_store, benchmark_close, fetch_failures, extra_returns)
+        return
+
+    tasks = [batches[i:i + BATCHES_PER_TASK] for i in range(0, len(batches), BATCHES_PER_TASK)]
+    workers = min(workers, len(tasks))
+    print(f"가격 계산: 프로세스 {workers}개, 작업 {len(tasks)}개 ({total_tickers}개 티커)")
+    # fork 대신 spawn: 다운로드 스레드 풀이 있는 부모를 fork하지 않음 (OS와 관계없이 같은 동작)
+    context = multiprocessing.get_context('spawn')
+    initargs = (os.path.abspath(price_store.root), benchmark_close, fetch_failures, extra_returns)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=initargs) as executor:
+        # 한 번에 워커 수 × TASKS_IN_FLIGHT_PER_WORKER개만 제출 → 끝난 결과는 넘기고 바로 다음 작업 제출
+        # (전부 제출하면 끝난 작업 결과가 Future에 남아 전체 행이 메모리에 쌓임)
+        pending = iter(tasks)
+        in_flight = {executor.submit(_run_task, task)
+                     for task in itertools.islice(pending, workers * TASKS_IN_FLIGHT_PER_WORKER)}
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = next(pending, None)
+                if task is not None:
+                    in_flight.add(executor.submit(_run_task, task))
+                yield from future.result()
@@ -0,0 +1,131 @@
+import gzip
+import json
+import math
+import os
+import re
+
+import changes
+import history_store
+from scan_table import ScanTable
+
+# 프론트엔드용 데이터 파일
+# - summary.json: 첫 화면용. result.json의 data 중 첫 화면 표가 쓰는 컬럼(SUMMARY_COLUMNS)만 컬럼형으로
+#   (사전 인코딩 + 양자화 + 공백 없음, wrs_data는 index.html이 이 컬럼으로 직접 계산하므로 제외)
+# - shards/<sector>.json: 섹터별 원본 정밀도 전체 컬럼 행 (드릴다운 시 지연 로드, SPY/IWM/섹터 RS, 지표 등)
+# - *.gz / *.br: 요약과 샤드를 미리 압축한 파일 (PRECOMPRESS=True일 때만, brotli 모듈이 있을 때만 .br)
+#   GitHub Pages는 .gz/.br 변형을 서빙하지 않고 자체 압축하므로 기본은 끔 (저장소만 커짐).
+#   직접 서버(nginx gzip_static 등)로 배포할 때만 켭니다. 끄면 남아 있는 변형 파일은 지웁니다.
+# 내용이 기존 파일과 같으면 다시 쓰지 않음 (압축 파일도 원본이 바뀔 때만)
+STATIC_DIR = "static"
+SUMMARY_FILE = "summary.json"
+SHARD_DIR = "shards"
+SUMMARY_KEYS = ['last_updated', 'total_count', 'market_condition', 'mode', 'as_of', 'data']
+# index.html 첫 화면(개별 종목 표, 업종 WRS 계산, Today's List)이 쓰는 컬럼
+SUMMARY_COLUMNS = ['Ticker', 'Sector', 'Industry', 'Price', 'Market Cap',
+                   'RS_6mo', 'RS_3mo', 'RS_1mo', 'RS_Rank_Pct', '50DIV']
+PRECOMPRESSED_SUFFIXES = ('.gz', '.br')
+PRECOMPRESS = False
+
+
+def _clean(value):
+    """NaN/inf → None (JSON 표준 유지)"""
+    if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+        return None
+    return value
+
+
+def sector_slug(sector):
+    """섹터 이름 → 파일명 (예: 'Consumer Cyclical' → 'consumer-cyclical')"""
+    slug = re.sub(r'[^a-z0-9]+', '-', str(sector).lower()).strip('-')
+    return slug or 'unknown'
+
+
+def _shard_chunks(sector, rows):
+    """섹터 샤드 JSON 조각 ({"sector": ..., "data": [행, ...]}, 행 하나씩)"""
+    yield '{"sector":%s,"data":[' % json.dumps(sector, ensure_ascii=False)
+    for j, row in enumerate(rows):
+        yield ('' if j == 0 else ',') + json.dumps({k: _clean(v) for k, v in row.items()}, ensure_ascii=False,
+                                                   separators=(',', ':'), allow_nan=False)
+    yield ']}'
+
+
+def summary_rows(data, columns=SUMMARY_COLUMNS):
+    """첫 화면용 컬럼만 남긴 행 (ScanTable이면 ScanTable, 행 dict 리스트면 리스트)"""
+    if isinstance(data, ScanTable):
+        return data.subset(columns)
+    return [{k: row[k] for k in columns if k in row} for row in data]
+
+
+def _precompress(path, raw=None):
+    """미리 압축된 변형 파일(.gz, 가능하면 .br) 저장 (raw가 없으면 path를 읽음)"""
+    if raw is None:
+        with open(path, 'rb') as f:
+            raw = f.read()
+    with open(path + ".gz", 'wb') as f:
+        f.write(gzip.compress(raw, compresslevel=9, mtime=0))
+    try:
+        import brotli
+    except ImportError:
+        return
+    with open(path + ".br", 'wb') as f:
+        f.write(brotli.compress(raw, quality=11))
+
+
+def _update_variants(path, changed, precompress, raw=None):
+    """
+    precompress면 원본이 바뀌었거나 압축 파일이 없을 때 다시 압축, 아니면 남아 있는 압축 파일 삭제
+    반환값: 압축 파일을 새로 썼으면 True
+    """
+    if not precompress:
+        for suffix in PRECOMPRESSED_SUFFIXES:
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        return False
+    if changed or not os.path.exists(path + ".gz"):
+        _precompress(path, raw)
+        return True
+    return False
+
+
+def write_frontend_payload(output_data, static_dir=STATIC_DIR, precompress=PRECOMPRESS):
+    """
+    result.json 구조(output_data)로 summary.json과 섹터별 샤드를 만듭니다.
+    precompress=True면 각 파일의 .gz/.br도 저장합니다.
+    반환값: {실제로 쓴 파일 경로: 바이트 수} (내용이 같아 건너뛴 파일은 빠짐)
+    """
+    written = {}
+    shard_dir = os.path.join(static_dir, SHARD_DIR)
+    os.makedirs(shard_dir, exist_ok=True)
+
+    # 1. 섹터별 샤드 (원본 정밀도, 행 번호만 섹터별로 모아 두고 샤드마다 행을 하나씩 직렬화)
+    data = output_data.get('data', [])
+    sectors = data.column('Sector') if isinstance(data, ScanTable) else [row.get('Sector') for row in data]
+    shards = {}
+    for i, sector in enumerate(sectors):
+        shards.setdefault(sector or 'N/A', []).append(i)
+
+    manifest = {}
+    for sector, positions in shards.items():
+        filename = f"{sector_slug(sector)}.json"
+        path = os.path.join(shard_dir, filename)
+        changed = changes.write_chunks_if_changed(path, _shard_chunks(sector, (data[i] for i in positions)))
+        if _update_variants(path, changed, precompress) or changed:
+            written[path] = os.path.getsize(path)
+        manifest[sector] = f"{SHARD_DIR}/{filename}"
+
+    # 지난 실행에만 있던 섹터 샤드 정리 (압축 파일 포함)
+    current = {os.path.basename(p) for p in manifest.values()}
+    for filename in os.listdir(shard_dir):
+        base = filename[:-3] if filename.endswith(PRECOMPRESSED_SUFFIXES) else filename
+        if base.endswith('.json') and base not in current:
+            os.remove(os.path.join(shard_dir, filename))
+
+    # 2. 첫 화면용 요약 (첫 화면 컬럼만, 컬럼형, 컬럼 하나씩 인코딩)
+    summary = {k: output_data[k] for k in SUMMARY_KEYS if k in output_data}
+    summary['data'] = summary_rows(summary.get('data', []))
+    text = ''.join(history_store.iter_snapshot_json(summary, extra_meta={'shards': manifest}))
+    path = os.path.join(static_dir, SUMMARY_FILE)
+    raw, changed = text.encode('utf-8'), changes.write_if_changed(path, text)
+    if _update_variants(path, changed, precompress, raw) or changed:
+        written[path] = len(raw)
+    return written
@@ -0,0 +1,241 @@
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from fetch_scheduler import FetchScheduler
+
+# 로컬 가격 저장소 (티커별 parquet 파일 + 마지막 저장일 인덱스)
+# GitHub Actions에서는 actions/cache로 cache/ 폴더를 다음 실행에 넘겨줍니다.
+PRICE_STORE_DIR = "cache/prices"
+PRICE_INDEX_FILE = "_index.json"
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# 증분 다운로드 시 겹쳐서 받는 영업일 수 (저장된 이력과 비교해 분할/배당 조정 여부 확인)
+OVERLAP_DAYS = 5
+# 겹치는 구간 종가의 허용 상대오차. 이보다 크면 과거 가격이 재조정된 것으로 보고 전체 재수집
+SPLIT_CHECK_TOLERANCE = 1e-4
+# 저장 이력 길이 (달력일): 신규 티커/재수집은 이만큼 받고, 저장할 때 마지막 날짜 기준 이보다 오래된 봉은 잘라냄
+# (가장 긴 창 = 등록된 지표의 최대 봉 수(52주 RS 신고가 252봉) + 여유, 파일이 매일 한 봉씩 끝없이 커지지 않도록)
+STORE_DAYS = 400
+WINDOW_DAYS = 365          # get_batch/window 기본 창 (달력일, RS 6mo·50DIV에 충분)
+HOLIDAY_MARGIN_DAYS = 14   # 봉 수 → 달력일 환산 시 휴장일 여유
+
+
+def bars_to_days(bars):
+    """영업일 봉 수 → 그만큼의 봉이 들어가는 달력일 수 (주말 + 휴장일 여유)"""
+    return -(-bars * 7 // 5) + HOLIDAY_MARGIN_DAYS if bars else 0
+
+
+def _intern_values(entry):
+    return {k: sys.intern(v) if isinstance(v, str) else v for k, v in entry.items()}
+
+
+def split_download_frame(data, tickers):
+    """
+    yf.download(group_by='ticker') 결과를 {티커: OHLCV DataFrame}으로 나눕니다.
+    값이 하나도 없는 행은 제거합니다.
+    """
+    frames = {}
+    if data is None or data.empty:
+        return frames
+    for t in tickers:
+        if isinstance(data.columns, pd.MultiIndex):
+            if t not in data.columns.get_level_values(0):
+                continue
+            df = data[t]
+        else:
+            # 티커가 1개인 배치
+            if len(tickers) != 1:
+                continue
+            df = data
+        df = df[[c for c in OHLCV_COLUMNS if c in df.columns]].dropna(how='all')
+        if not df.empty:
+            frames[t] = df
+    return frames
+
+
+class PriceStore:
+    """
+    티커별 일봉(OHLCV)을 로컬에 저장해 두고, 매 실행마다 빠진 구간만 받아 붙입니다.
+    - load(): 저장된 이력
+    - update(): 빠진 구간만 다운로드 → 병합 → 저장 (분할/배당 재조정 감지 시 전체 재수집)
+    - get_batch(): 최근 창(기본 1년)을 yf.download(group_by='ticker')와 같은 모양으로 반환
+    """
+
+    def __init__(self, root=PRICE_STORE_DIR, scheduler=None, offline=False, keep_days=STORE_DAYS):
+        self.root = root
+        self.keep_days = keep_days  # 저장 이력 길이 (달력일, None이면 자르지 않음)
+        # 다운로드는 FetchScheduler가 담당 (동시 배치, 요청 제한, 백오프)
+        self.scheduler = scheduler or FetchScheduler()
+        self.offline = offline
+        self.index = {}
+        self.stats = {'full_fetch': 0, 'incremental_fetch': 0, 'refetch_on_mismatch': 0, 'served_from_cache': 0}
+        self.fetch_failures = {}  # {티커: 'transient' | 'no_data'} 마지막 다운로드에서 빠진 티커
+        self._load_index()
+
+    # --- 인덱스 / 파일 I/O ---
+
+    def _index_path(self):
+        return os.path.join(self.root, PRICE_INDEX_FILE)
+
+    def _path(self, ticker):
+        return os.path.join(self.root, f"{ticker}.parquet")
+
+    def _load_index(self):
+        path = self._index_path()
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.index = json.load(f, object_hook=_intern_values)  # 날짜 문자열 공유
+            except Exception as e:
+                print(f"Price Store 인덱스 로드 에러: {e}")
+                self.index = {}
+
+    def save_index(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self._index_path() + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, separators=(',', ':'))
+        os.replace(tmp_path, self._index_path())
+
+    def load(self, ticker):
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return None
+        try:
+            return pd.read_parquet(path)
+        except Exception as e:
+            print(f"Price Store 로드 에러 ({ticker}): {e}")
+            return None
+
+    def _save(self, ticker, df, fetched_on):
+        if self.keep_days is not None:
+            df = df[df.index > df.index[-1] - pd.Timedelta(days=self.keep_days)]
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self._path(ticker) + ".tmp"
+        df.to_parquet(tmp_path)
+        os.replace(tmp_path, self._path(ticker))
+        self.index[ticker] = {
+            'last_date': df.index[-1].strftime('%Y-%m-%d'),
+            'rows': len(df),
+            'fetched_on': fetched_on,
+        }
+
+    # --- 증분 업데이트 ---
+
+    def _needs_fetch(self, ticker, today, force=False):
+        entry = self.index.get(ticker)
+        if not entry or not os.path.exists(self._path(ticker)):
+            return 'full'
+        if entry.get('fetched_on') == today and not force:
+            return None  # 오늘 이미 갱신됨 (같은 날 재실행)
+        return 'incremental'
+
+    @staticmethod
+    def _history_matches(stored, fetched):
+        """겹치는 날짜의 종가가 허용오차 안에서 같은지 확인 (분할/배당 재조정 감지)"""
+        common = stored.index.intersection(fetched.index)
+        if len(common) == 0:
+            return False
+        old = stored.loc[common, 'Close']
+        new = fetched.loc[common, 'Close']
+        valid = old.notna() & new.notna() & (old != 0)
+        if not valid.any():
+            return True
+        rel_diff = ((new[valid] - old[valid]) / old[valid]).abs()
+        return bool(rel_diff.max() <= SPLIT_CHECK_TOLERANCE)
+
+    def _fetch(self, tickers, **kwargs):
+        """
+        배치 다운로드가 끝날 때마다 (티커, OHLCV 프레임)을 yield
+        받은 프레임을 모아 두지 않으므로 메모리에는 진행 중인 배치(스케줄러 동시 요청 수)만 남습니다.
+        """
+        for batch, data in self.scheduler.download_all(tickers, **kwargs):
+            batch_frames = split_download_frame(data, batch)
+            # 실패 사유 기록: 배치 전체가 비었으면(요청 제한/네트워크) 일시적, 일부만 빠졌으면 데이터 없음
+            for t in batch:
+                if t in batch_frames:
+                    self.fetch_failures.pop(t, None)
+                else:
+                    self.fetch_failures[t] = 'transient' if data is None or data.empty else 'no_data'
+            yield from batch_frames.items()
+
+    def update(self, tickers, force=False):
+        """
+        티커들의 저장 이력을 최신으로 갱신합니다.
+        - 저장 이력 없음 → 최근 STORE_DAYS 전체 다운로드
+        - 저장 이력 있음 → (마지막 저장일 - OVERLAP_DAYS)부터 증분 다운로드
+          겹치는 구간 종가가 다르면(분할/배당 재조정) 전체 재수집
+        같은 시작일끼리 묶어서 한 번에 요청합니다.
+        force=True면 오늘 이미 갱신한 티커도 다시 요청합니다 (재시도용).
+        """
+        if self.offline:
+            return
+        today = datetime.utcnow().strftime('%Y-%m-%d')
+
+        full, by_start = [], {}
+        for t in tickers:
+            mode = self._needs_fetch(t, today, force)
+            if mode == 'full':
+                full.append(t)
+            elif mode == 'incremental':
+                last = datetime.strptime(self.index[t]['last_date'], '%Y-%m-%d')
+                start = (last - timedelta(days=OVERLAP_DAYS * 7 // 5 + 2)).strftime('%Y-%m-%d')
+                by_start.setdefault(start, []).append(t)
+            else:
+                self.stats['served_from_cache'] += 1
+
+        # 받은 배치는 바로 병합/저장 (신규 봉이 없거나 일시적 실패인 티커는 기존 이력 유지)
+        for start, group in by_start.items():
+            for t, new in self._fetch(group, start=start):
+                stored = self.load(t)
+                if stored is None or not self._history_matches(stored, new):
+                    full.append(t)
+                    self.stats['refetch_on_mismatch'] += 1
+                    continue
+                merged = pd.concat([stored[~stored.index.isin(new.index)], new]).sort_index()
+                self._save(t, merged, today)
+                self.stats['incremental_fetch'] += 1
+
+        if full:
+            full_start = (datetime.utcnow() - timedelta(days=STORE_DAYS)).strftime('%Y-%m-%d')
+            for t, frame in self._fetch(full, start=full_start):
+                self._save(t, frame, today)
+                self.stats['full_fetch'] += 1
+
+        self.save_index()
+
+    # --- 조회 ---
+
+    def window(self, ticker, period_days=WINDOW_DAYS):
+        """저장된 이력에서 마지막 날짜 기준 period_days 구간만 잘라 반환"""
+        df = self.load(ticker)
+        if df is None or df.empty:
+            return None
+        start = df.index[-1] - pd.Timedelta(days=period_days)
+        return df[df.index > start]
+
+    def get_batch(self, tickers, period_days=WINDOW_DAYS, refresh=True, fields=None):
+        """
+        update 후 로컬 데이터에서 period_days 창을 꺼내
+        yf.download(group_by='ticker')와 같은 (티커, 필드) MultiIndex 컬럼 DataFrame으로 반환합니다.
+        refresh=False면 update 없이 로컬 데이터만 사용합니다 (이미 전체 갱신을 마친 경우).
+        fields가 주어지면 그 필드만 남깁니다 (예: 지표가 쓰지 않는 Open/High/Low/Volume 제외).
+        """
+        if refresh:
+            self.update(tickers)
+        frames = {}
+        for t in tickers:
+            df = self.window(t, period_days)
+            if df is not None:
+                frames[t] = df if fields is None else df[[c for c in fields if c in df.columns]]
+        if not frames:
+            return pd.DataFrame()
+        panel = pd.concat(frames, axis=1).sort_index()
+        # 상장폐지 등으로 멈춘 티커가 배치 창을 과거로 늘리지 않도록 배치 최신일 기준으로 다시 자름
+        start = panel.index[-1] - pd.Timedelta(days=period_days)
+        return panel[panel.index > start]
@@ -0,0 +1,285 @@
+import argparse
+import bisect
+import gzip
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+import utils
+
+# 로컬 조회 서버 (선택 사항, HTTP는 표준 라이브러리 http.server)
+# 최신 result.json을 메모리에 올려 티커/섹터/업종/순위 인덱스를 만들고,
+# 필터/정렬/페이지 단위 질의에 JSON으로 답합니다 (ETag + gzip).
+# result.json이 다시 쓰이면 다음 요청에서 자동으로 다시 읽습니다.
+#
+#   python query_server.py --port 8765 [--history]
+#   GET /api/scan?top_pct=5&industry_rank_pct=20&max_50DIV=10&sort=RS_6mo&limit=50
+RESULT_FILE = "static/result.json"
+DEFAULT_PORT = 8765
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 5000
+RELOAD_CHECK_SECONDS = 1.0  # result.json 변경 확인 주기
+GZIP_MIN_BYTES = 1024
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _clean(value):
+    return None if isinstance(value, float) and (math.isnan(value) or math.isinf(value)) else value
+
+
+class ScanIndex:
+    """
+    스캔 결과 한 벌과 인덱스 (읽기 전용, 다시 읽을 때는 새 인스턴스로 통째로 교체)
+    - by_ticker: 티커 → 행
+    - by_sector / by_industry: 이름 → 행 리스트
+    - rank_order / rank_values: RS_Rank_Pct 오름차순 행 (상위 N% 질의는 이분 탐색)
+    업종 WRS 순위(Industry_WRS_Rank_Pct, Industry_WRS_MD_Rank_Pct)는 각 행에 붙여 둡니다.
+    """
+
+    def __init__(self, data, mtime=0.0):
+        self.meta = {k: v for k, v in data.items() if not isinstance(v, list)}
+        self.mtime = mtime
+        self.version = hashlib.sha1(f"{mtime}|{self.meta.get('last_updated')}".encode('utf-8')).hexdigest()[:12]
+        self.industries = data.get('wrs_data') or []
+        self.sectors = data.get('sector_data') or []
+
+        industry_ranks = self._industry_wrs_ranks(self.industries)
+        self.rows = []
+        for row in data.get('data') or []:
+            row = {k: _clean(v) for k, v in row.items()}
+            ranks = industry_ranks.get((row.get('Sector'), row.get('Industry')), {})
+            row['Industry_WRS_Rank_Pct'] = ranks.get('WRS')
+            row['Industry_WRS_MD_Rank_Pct'] = ranks.get('WRS_MD')
+            self.rows.append(row)
+
+        self.by_ticker = {row['Ticker']: row for row in self.rows}
+        self.by_sector, self.by_industry = {}, {}
+        for row in self.rows:
+            self.by_sector.setdefault(row.get('Sector'), []).append(row)
+            self.by_industry.setdefault(row.get('Industry'), []).append(row)
+
+        ranked = [row for row in self.rows if not _is_missing(row.get('RS_Rank_Pct'))]
+        self.rank_order = sorted(ranked, key=lambda r: r['RS_Rank_Pct'])
+        self.rank_values = [row['RS_Rank_Pct'] for row in self.rank_order]
+
+    @staticmethod
+    def _industry_wrs_ranks(industries):
+        """업종별 WRS(시총 가중) / WRS_MD 순위 퍼센타일 (값이 작을수록 상위)"""
+        keys = [(w.get('Sector'), w.get('Industry')) for w in industries]
+        wrs_ranks = utils.rank_percentiles([w.get('WRS_6mo') for w in industries])
+        ranks = {}
+        for key, w, wrs_rank in zip(keys, industries, wrs_ranks):
+            ranks[key] = {'WRS': wrs_rank, 'WRS_MD': w.get('WRS_MD_Rank_Pct')}
+        return ranks
+
+    @classmethod
+    def load(cls, path=RESULT_FILE):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data, os.path.getmtime(path))
+
+    # --- 질의 ---
+
+    def candidates(self, params):
+        """인덱스로 후보 행을 최대한 좁힘 (ticker → sector/industry → top_pct 순)"""
+        if 'ticker' in params:
+            tickers = [t.strip().upper() for t in params['ticker'].split(',')]
+            return [self.by_ticker[t] for t in tickers if t in self.by_ticker]
+        if 'industry' in params:
+            rows = self.by_industry.get(params['industry'], [])
+            if 'sector' in params:
+                rows = [r for r in rows if r.get('Sector') == params['sector']]
+            return rows
+        if 'sector' in params:
+            return self.by_sector.get(params['sector'], [])
+        if 'top_pct' in params:
+            return self.rank_order[:bisect.bisect_right(self.rank_values, float(params['top_pct']))]
+        return self.rows
+
+    def query(self, params):
+        """
+        필터/정렬/페이지 질의
+        - ticker=A,B / sector= / industry=
+        - top_pct=5: RS_Rank_Pct ≤ 5
+        - industry_rank_pct=20: 업종 WRS 순위 ≤ 20 (industry_rank=WRS_MD면 중앙값 기준)
+        - min_<컬럼>= / max_<컬럼>=: 숫자 컬럼 범위 (예: max_50DIV=10)
+        - sort=<컬럼>, order=asc|desc (기본 RS_Rank_Pct asc), limit/offset, fields=A,B
+        """
+        rows = self.candidates(params)
+        predicates = []
+        if 'top_pct' in params:
+            limit_pct = float(params['top_pct'])
+            predicates.append(lambda r: not _is_missing(r.get('RS_Rank_Pct')) and r['RS_Rank_Pct'] <= limit_pct)
+        if 'industry_rank_pct' in params:
+            column = 'Industry_WRS_MD_Rank_Pct' if params.get('industry_rank') == 'WRS_MD' else 'Industry_WRS_Rank_Pct'
+            industry_pct = float(params['industry_rank_pct'])
+            predicates.append(lambda r: not _is_missing(r.get(column)) and r[column] <= industry_pct)
+        for key, value in params.items():
+            for prefix, compare in (('min_', lambda v, b: v >= b), ('max_', lambda v, b: v <= b)):
+                if key.startswith(prefix):
+                    column, bound = key[len(prefix):], float(value)
+                    predicates.append(lambda r, c=column, b=bound, cmp=compare:
+                                      isinstance(r.get(c), (int, float)) and cmp(r[c], b))
+        if predicates:
+            rows = [r for r in rows if all(p(r) for p in predicates)]
+
+        sort_key = params.get('sort', 'RS_Rank_Pct')
+        descending = params.get('order', 'asc' if sort_key == 'RS_Rank_Pct' else 'desc') == 'desc'
+        # 숫자 → 문자열 → 값 없음 순 (Market Cap처럼 숫자와 'N/A' 문자열이 섞인 컬럼도 타입끼리만 비교)
+        numbers, texts, missing = [], [], []
+        for r in rows:
+            value = r.get(sort_key)
+            if _is_missing(value):
+                missing.append(r)
+            elif isinstance(value, (int, float)):
+                numbers.append(r)
+            elif isinstance(value, str):
+                texts.append(r)
+            else:
+                missing.append(r)
+        rows = sorted(numbers, key=lambda r: r[sort_key], reverse=descending) + \
+            sorted(texts, key=lambda r: r[sort_key], reverse=descending) + missing
+
+        offset = max(0, int(params.get('offset', 0)))
+        limit = min(MAX_LIMIT, max(0, int(params.get('limit', DEFAULT_LIMIT))))
+        page = rows[offset:offset + limit]
+        if 'fields' in params:
+            fields = params['fields'].split(',')
+            page = [{f: r.get(f) for f in fields} for r in page]
+        return {'version': self.version, 'last_updated': self.meta.get('last_updated'),
+                'total': len(rows), 'offset': offset, 'limit': limit, 'data': page}
+
+
+class QueryService:
+    """ScanIndex 보관 + 핫 리로드 (result.json mtime이 바뀌면 새 인덱스로 교체)"""
+
+    def __init__(self, path=RESULT_FILE, with_history=False):
+        self.path = path
+        self.with_history = with_history
+        self.history = None
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self.index = ScanIndex.load(path)
+        self._load_history()
+
+    def _load_history(self):
+        if not self.with_history:
+            return
+        import history_query
+        history = history_query.HistoryMatrix()
+        history.build()
+        self.history = history
+
+    def current(self):
+        now = time.monotonic()
+        if now - self._last_check >= RELOAD_CHECK_SECONDS:
+            with self._lock:
+                self._last_check = now
+                try:
+                    mtime = os.path.getmtime(self.path)
+                    if mtime != self.index.mtime:
+                        self.index = ScanIndex.load(self.path)
+                        self._load_history()
+                        print(f"[QueryServer] 새 스캔 로드: {self.index.meta.get('last_updated')} ({len(self.index.rows)}개)")
+                except (OSError, ValueError) as e:
+                    # 쓰는 도중이면 기존 인덱스로 계속 응답하고 다음 요청에서 다시 시도
+                    print(f"[QueryServer] 리로드 실패 (기존 데이터 유지): {e}")
+        return self.index
+
+    def trajectory(self, ticker, metric, days):
+        if self.history is None:
+            return None
+        series = self.history.trajectory(ticker, metric, days)
+        return [{'date': d.strftime('%Y-%m-%d'), metric: float(v)} for d, v in series.items()]
+
+
+def make_handler(service):
+
+    class QueryHandler(BaseHTTPRequestHandler):
+        server_version = "RSScannerQuery/1.0"
+
+        def log_message(self, format, *args):
+            pass  # 요청마다 로그를 찍지 않음
+
+        def _send_json(self, status, obj):
+            body = json.dumps(obj, ensure_ascii=False, separators=(',', ':'), allow_nan=False).encode('utf-8')
+            etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            encoding = None
+            if len(body) >= GZIP_MIN_BYTES and 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+                body = gzip.compress(body, compresslevel=5)
+                encoding = 'gzip'
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Vary', 'Accept-Encoding')
+            if encoding:
+                self.send_header('Content-Encoding', encoding)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            index = service.current()
+            try:
+                if url.path == '/api/scan':
+                    return self._send_json(200, index.query(params))
+                if url.path.startswith('/api/ticker/'):
+                    ticker = unquote(url.path[len('/api/ticker/'):]).upper()
+                    row = index.by_ticker.get(ticker)
+                    if row is None:
+                        return self._send_json(404, {'error': f"unknown ticker {ticker}"})
+                    out = {'version': index.version, 'data': row}
+                    history = service.trajectory(ticker, params.get('metric', 'RS_6mo'), int(params.get('days', 60)))
+                    if history is not None:
+                        out['history'] = history
+                    return self._send_json(200, out)
+                if url.path == '/api/industries':
+                    return self._send_json(200, {'version': index.version, 'data': index.industries})
+                if url.path == '/api/sectors':
+                    return self._send_json(200, {'version': index.version, 'data': index.sectors})
+                if url.path == '/api/meta':
+                    return self._send_json(200, dict(index.meta, version=index.version, rows=len(index.rows)))
+                return self._send_json(404, {'error': 'not found'})
+            except (ValueError, KeyError, TypeError) as e:
+                return self._send_json(400, {'error': str(e)})
+
+    return QueryHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="최신 스캔 결과 조회 서버")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--result', default=RESULT_FILE, help="스캔 결과 파일 (기본 static/result.json)")
+    parser.add_argument('--history', action='store_true', help="히스토리 아카이브도 로드 (/api/ticker/<T>에 추이 포함)")
+    args = parser.parse_args()
+
+    service = QueryService(args.result, with_history=args.history)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"[QueryServer] http://{args.host}:{args.port}/api/scan ({len(service.index.rows)}개 로드)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+import time
+
+from metrics import METRICS
+
+# 원격 CSV(구글 시트 export 등) 조회 + 로컬 캐시
+# - 요청은 하나의 requests.Session을 공유 (티커 시트, Market Condition 시트, 유니버스 CSV)
+# - 마지막으로 받은 본문을 cache/sheets/<키>.csv에 두고 ETag/Last-Modified로 조건부 요청 (304 → 캐시 사용)
+# - 요청이 실패하면(타임아웃, 5xx 등) 마지막으로 받은 본문을 그대로 사용
+CACHE_DIR = "cache/sheets"
+REQUEST_TIMEOUT = 15  # 초
+
+_session = None
+
+
+def get_session():
+    """공유 HTTP 세션 (처음 호출할 때 생성, requests도 이때 import)"""
+    global _session
+    if _session is None:
+        import requests
+        _session = requests.Session()
+        _session.headers['User-Agent'] = 'RS-Scanner/1.0'
+    return _session
+
+
+def _cache_paths(url, cache_dir):
+    key = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{key}.csv"), os.path.join(cache_dir, f"{key}.json")
+
+
+def _read_cache(url, cache_dir):
+    body_path, meta_path = _cache_paths(url, cache_dir)
+    if not (os.path.exists(body_path) and os.path.exists(meta_path)):
+        return None, {}
+    try:
+        with open(body_path, 'r', encoding='utf-8') as f:
+            body = f.read()
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return body, json.load(f)
+    except (OSError, ValueError):
+        return None, {}
+
+
+def _write_cache(url, cache_dir, body, response):
+    os.makedirs(cache_dir, exist_ok=True)
+    body_path, meta_path = _cache_paths(url, cache_dir)
+    meta = {
+        'url': url,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'fetched': time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime()),
+    }
+    for path, content in ((body_path, body), (meta_path, json.dumps(meta, ensure_ascii=False))):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+
+def fetch_text(url, cache_dir=CACHE_DIR, timeout=REQUEST_TIMEOUT):
+    """
+    URL 본문(UTF-8 텍스트)을 가져옵니다.
+    반환값: (본문, 상태) — 상태는 'fresh'(새로 받음) / 'not_modified'(304, 캐시) / 'stale'(요청 실패, 캐시)
+    요청도 실패하고 캐시도 없으면 (None, 'failed')
+    """
+    cached_body, meta = _read_cache(url, cache_dir)
+    headers = {}
+    if cached_body is not None:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+    try:
+        with METRICS.timer('sheet_load'):
+            response = get_session().get(url, headers=headers, timeout=timeout)
+        METRICS.incr('sheet.requests')
+        if response.status_code == 304 and cached_body is not None:
+            METRICS.incr('sheet.not_modified')
+            return cached_body, 'not_modified'
+        response.raise_for_status()
+        METRICS.incr('sheet.bytes', len(response.content))
+        response.encoding = 'utf-8'  # 한글 깨짐 방지
+        body = response.text
+        try:
+            _write_cache(url, cache_dir, body, response)
+        except OSError as e:
+            print(f"시트 캐시 저장 실패: {e}")
+        return body, 'fresh'
+    except Exception as e:
+        METRICS.incr('sheet.failures')
+        if cached_body is not None:
+            print(f"⚠️ 원격 CSV 요청 실패 → 캐시 사용 ({meta.get('fetched')}): {e}")
+            return cached_body, 'stale'
+        print(f"원격 CSV 요청 실패 (캐시 없음): {e}")
+        return None, 'failed'
@@ -0,0 +1,332 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import metadata
+import rs_engine
+import utils
+from price_store import PriceStore
+
+# 과거 날짜 리플레이 / 백테스트 (네트워크 없음)
+# 로컬 가격 저장소(cache/prices) 전체를 날짜 × 티커 종가 행렬 하나로 읽고,
+# shift/rolling 연산으로 모든 날짜의 RS / 50DIV / RS 순위 / 업종 WRS를 한 번에 계산합니다.
+# (날짜마다 파이프라인을 다시 돌리지 않음)
+# 상위 RS 코호트의 향후 수익률로 RS 기간(20/60/120봉)을 검증하고,
+# --backfill이면 빠진 날짜의 히스토리 스냅샷을 채웁니다.
+#
+#   python replay.py --start 2025-06-01 --end 2025-12-31
+#   python replay.py --windows 20 60 120 250 --top-pct 5 --horizons 5 20 60
+#   python replay.py --start 2025-12-01 --backfill
+REPLAY_FILE = "static/replay.json"
+DEFAULT_TOP_PCT = 10           # 상위 코호트: RS 순위 상위 10%
+DEFAULT_HORIZONS = [5, 20, 60]  # 향후 수익률 기간 (영업일)
+TOP_INDUSTRIES = 5             # 날짜별로 기록할 WRS 중앙값 상위 업종 수
+BACKFILL_MARKET_CONDITION = "N/A"
+BACKFILL_TIME = "21:00:00 UTC"  # 백필 스냅샷의 last_updated 시각 (정규 실행 시각)
+
+
+def load_close_matrix(price_store, tickers):
+    """
+    저장된 전체 이력 → 종가 행렬 (날짜 × Yahoo 티커, float64)
+    저장소에 없는 티커는 빠집니다.
+    """
+    columns = {}
+    for ticker in tickers:
+        df = price_store.load(ticker)
+        if df is not None and not df.empty and 'Close' in df.columns:
+            columns[ticker] = df['Close']
+    if not columns:
+        return pd.DataFrame()
+    close = pd.concat(columns, axis=1).sort_index().astype('float64')
+    return close.loc[:, ~close.columns.duplicated()]
+
+
+def rolling_returns(close, window):
+    """
+    모든 날짜의 window봉 수익률 (rs_engine.compute_window_returns를 날짜마다 계산한 것과 같음)
+    기준가가 0이면 0, 기준가/현재가가 없으면 NaN
+    """
+    prev = close.shift(window)
+    returns = (close - prev) / prev
+    return returns.mask(prev == 0, 0.0)
+
+
+def rolling_divergence(close, window=rs_engine.DIV_WINDOW):
+    """모든 날짜의 이동평균 괴리율(%) (rs_engine.compute_ma_divergence와 같은 기준)"""
+    ma = close.rolling(window, min_periods=1).mean()
+    div = ((close - ma) / ma * 100).round(2)
+    div = div.mask(ma == 0)
+    div.iloc[:window - 1] = np.nan  # 이력이 window보다 짧은 날은 계산하지 않음
+    return div
+
+
+def rank_pct(frame):
+    """날짜(행)마다 utils.rank_percentiles(method='min')와 같은 퍼센타일 순위 (값이 클수록 상위)"""
+    ranks = frame.rank(axis=1, ascending=False, method='min')
+    return (ranks.div(frame.count(axis=1), axis=0) * 100).round(2)
+
+
+def window_labels(windows):
+    """봉 수 리스트 → {라벨: 봉 수} (기본 RS 기간과 같으면 1mo/3mo/6mo 라벨 사용)"""
+    known = {bars: label for label, bars in rs_engine.RS_WINDOWS.items()}
+    return {known.get(bars, f"{bars}d"): bars for bars in windows}
+
+
+class Replay:
+    """
+    과거 날짜 전체의 스캔 결과 행렬
+    - close: 종가 (날짜 × 티커, 기본 벤치마크 거래일 기준)
+    - rs[label] / rank[label]: 기간별 RS, RS 순위 퍼센타일
+    - div: 50DIV
+    - industry_md / industry_wrs: 업종별 RS 중앙값 / 시총 가중 RS (날짜 × (Sector, Industry), 가장 긴 기간 기준)
+    업종 분류와 발행주식수는 현재 메타데이터 캐시 값을 모든 날짜에 씁니다.
+    """
+
+    def __init__(self, ticker_info_list, price_store=None, windows=None, sector_cache=None):
+        self.price_store = price_store or PriceStore(offline=True)
+        self.windows = window_labels(windows or list(rs_engine.RS_WINDOWS.values()))
+        self.sector_cache = sector_cache or utils.SECTOR_CACHE
+        self.yf_to_original = {utils.sanitize_ticker_for_yf(item['Ticker']): item['Ticker']
+                               for item in ticker_info_list}
+        self.close = None
+        self.benchmark = None
+        self.rs = {}
+        self.rank = {}
+        self.div = None
+        self.industry_md = None
+        self.industry_wrs = None
+
+    @property
+    def primary_label(self):
+        return max(self.windows, key=self.windows.get)
+
+    def build(self):
+        primary = rs_engine.PRIMARY_BENCHMARK
+        stored = self.price_store.load(primary)
+        if stored is None or stored.empty or 'Close' not in stored.columns:
+            raise ValueError(f"{primary} 가격 이력이 저장소에 없음 (먼저 fetch_and_save.py 실행)")
+        bench = stored['Close'].dropna().astype('float64')
+
+        close = load_close_matrix(self.price_store, list(self.yf_to_original))
+        # 기본 벤치마크 거래일 기준으로 정렬 → shift(window)가 '거래일 window개 전'과 같음
+        self.close = close.reindex(bench.index)
+        self.close.columns = [self.yf_to_original[c] for c in self.close.columns]
+        self.benchmark = bench
+
+        for label, bars in self.windows.items():
+            bench_returns = rolling_returns(bench.to_frame(primary), bars)[primary]
+            self.rs[label] = rolling_returns(self.close, bars).sub(bench_returns, axis=0)
+            self.rank[label] = rank_pct(self.rs[label])
+        self.div = rolling_divergence(self.close)
+        self._build_industries()
+        return self
+
+    def _metadata(self):
+        """현재 메타데이터 캐시 → (업종 키 Series, 발행주식수 Series) (분류 없는 티커는 제외)"""
+        groups, shares = {}, {}
+        for ticker in self.close.columns:
+            entry = self.sector_cache.get(ticker) or {}
+            sector, industry = entry.get('Sector'), entry.get('Industry')
+            if sector and industry and str(sector) not in ('N/A', 'nan') and str(industry) not in ('N/A', 'nan'):
+                groups[ticker] = (sector, industry)
+            if entry.get('Shares'):
+                shares[ticker] = float(entry['Shares'])
+        return pd.Series(groups, dtype='object'), pd.Series(shares, dtype='float64')
+
+    def _build_industries(self):
+        groups, shares = self._metadata()
+        if groups.empty:
+            self.industry_md = self.industry_wrs = pd.DataFrame(index=self.close.index)
+            return
+        rs = self.rs[self.primary_label][groups.index]
+        keys = pd.MultiIndex.from_tuples(groups.values, names=['Sector', 'Industry'])
+        by_group = rs.T.set_axis(keys).groupby(level=['Sector', 'Industry'])
+        self.industry_md = by_group.median().T
+
+        market_cap = self.close[groups.index].mul(shares.reindex(groups.index), axis=1)
+        weights = market_cap.where(rs.notna() & (market_cap > 0))
+        weighted = (rs * weights).T.set_axis(keys).groupby(level=['Sector', 'Industry']).sum(min_count=1)
+        total = weights.T.set_axis(keys).groupby(level=['Sector', 'Industry']).sum(min_count=1)
+        self.industry_wrs = (weighted / total).T
+
+    def dates(self, start=None, end=None):
+        """계산 가능한 날짜 (가장 긴 RS 기간만큼의 이력이 쌓인 뒤) 중 start~end"""
+        valid = self.rs[self.primary_label].notna().any(axis=1)
+        dates = self.close.index[valid.values]
+        if start:
+            dates = dates[dates >= pd.Timestamp(start)]
+        if end:
+            dates = dates[dates <= pd.Timestamp(end)]
+        return dates
+
+    # --- 백테스트 ---
+
+    def forward_returns(self, horizon):
+        """향후 horizon봉 수익률 (날짜 × 티커), 뒤쪽 horizon개 날짜는 NaN"""
+        return self.close.shift(-horizon) / self.close - 1
+
+    def cohort_stats(self, dates, top_pct=DEFAULT_TOP_PCT, horizons=DEFAULT_HORIZONS):
+        """
+        RS 기간별 상위 top_pct% 코호트의 향후 수익률
+        - cohort: 코호트 평균, universe: RS가 있는 전체 평균, benchmark: 기본 벤치마크
+        - excess: cohort - universe, hit_rate: excess > 0인 날짜 비율
+        """
+        forward = {h: self.forward_returns(h).loc[dates] for h in horizons}
+        bench_forward = {h: (self.benchmark.shift(-h) / self.benchmark - 1).reindex(dates) for h in horizons}
+        stats = {}
+        for label in self.windows:
+            rank = self.rank[label].loc[dates]
+            in_cohort = rank <= top_pct
+            in_universe = rank.notna()
+            stats[label] = {}
+            for horizon in horizons:
+                fwd, bench_fwd = forward[horizon], bench_forward[horizon]
+                cohort = fwd.where(in_cohort).mean(axis=1)
+                universe = fwd.where(in_universe).mean(axis=1)
+                excess = (cohort - universe).dropna()
+                stats[label][f"{horizon}d"] = {
+                    'days': int(len(excess)),
+                    'cohort': _round(cohort.loc[excess.index].mean()),
+                    'universe': _round(universe.loc[excess.index].mean()),
+                    'benchmark': _round(bench_fwd.loc[excess.index].mean()),
+                    'excess': _round(excess.mean()),
+                    'hit_rate': _round((excess > 0).mean()) if len(excess) else None,
+                    'avg_cohort_size': _round(in_cohort.loc[excess.index].sum(axis=1).mean(), 1),
+                }
+        return stats
+
+    def top_industries(self, dates, k=TOP_INDUSTRIES):
+        """날짜별 WRS 중앙값 상위 k개 업종 ["Sector / Industry", ...]"""
+        out = {}
+        if self.industry_md is None or self.industry_md.empty:
+            return out
+        for date, row in self.industry_md.loc[dates].iterrows():
+            top = row.dropna().nlargest(k)
+            out[date.strftime('%Y-%m-%d')] = [f"{s} / {i}" for s, i in top.index]
+        return out
+
+    # --- 백필 ---
+
+    def rows_for(self, date):
+        """
+        한 날짜의 result.json 행 (get_market_cap_and_rs와 같은 기본 컬럼)
+        기본 RS 기간(1mo/3mo/6mo)으로 만든 Replay에서만 쓸 수 있습니다.
+        """
+        missing = [label for label in rs_engine.RS_WINDOWS if label not in self.rs]
+        if missing:
+            raise ValueError(f"백필에는 기본 RS 기간이 필요함 (없음: {', '.join(missing)})")
+        price = self.close.loc[date]
+        rs = {label: self.rs[label].loc[date] for label in rs_engine.RS_WINDOWS}
+        div = self.div.loc[date]
+        rows = []
+        for ticker in self.close.columns[price.notna().values]:  # RS를 못 구한 행도 정규 실행처럼 포함 (NaN)
+            entry = self.sector_cache.get(ticker) or {}
+            market_cap = (entry.get('Shares') or 0) * price[ticker]
+            rows.append({
+                'Ticker': ticker,
+                'Price': float(price[ticker]),
+                'Market Cap': f"{market_cap / 1e9:.2f}B" if market_cap else "N/A",
+                metadata.MARKET_CAP_VALUE: float(market_cap) if market_cap else None,
+                'RS_6mo': float(rs['6mo'][ticker]),
+                'RS_3mo': float(rs['3mo'][ticker]),
+                'RS_1mo': float(rs['1mo'][ticker]),
+                '50DIV': None if pd.isna(div[ticker]) else float(div[ticker]),
+                'Sector': entry.get('Sector') or 'N/A',
+                'Industry': entry.get('Industry') or 'N/A',
+            })
+        return rows
+
+
+def _round(value, digits=6):
+    return None if value is None or pd.isna(value) else round(float(value), digits)
+
+
+def backfill(replay, dates, history_dir="static/history", index_file="static/history_index.json"):
+    """히스토리에 없는 날짜만 스냅샷으로 저장 (오래된 날짜부터, 기존 스냅샷은 건드리지 않음)"""
+    import fetch_and_save
+    import history_store
+
+    existing = set(history_store.list_history(history_dir))
+    written = []
+    for date in dates:
+        date_str = date.strftime('%Y-%m-%d')
+        if date_str in existing:
+            continue
+        output_data = fetch_and_save.build_output_data(replay.rows_for(date), BACKFILL_MARKET_CONDITION,
+                                                       mode="replay")
+        output_data['last_updated'] = f"{date_str} {BACKFILL_TIME}"
+        history_store.write_snapshot(output_data, date_str, history_dir)
+        written.append(date_str)
+    if written:
+        fetch_and_save.update_history_index(history_dir, index_file)
+    return written
+
+
+def load_universe(price_store):
+    """직전 result.json의 티커 목록, 없으면 가격 저장소의 전체 티커 (벤치마크 제외)"""
+    import intraday
+    ticker_info_list = intraday.load_universe()
+    if ticker_info_list:
+        return ticker_info_list
+    benchmarks = set(rs_engine.benchmark_tickers())
+    return [{'Ticker': t} for t in sorted(price_store.index) if t not in benchmarks]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="과거 날짜 RS 순위 리플레이 / 백테스트 (로컬 가격 저장소)")
+    parser.add_argument('--start', default=None, help="시작일 (YYYY-MM-DD, 기본: 계산 가능한 첫 날)")
+    parser.add_argument('--end', default=None, help="종료일 (YYYY-MM-DD, 기본: 마지막 저장일)")
+    parser.add_argument('--windows', type=int, nargs='+', default=None, help="RS 기간 (봉 수, 기본 20 60 120)")
+    parser.add_argument('--top-pct', type=float, default=DEFAULT_TOP_PCT, help="상위 코호트 기준 (RS 순위 %%)")
+    parser.add_argument('--horizons', type=int, nargs='+', default=DEFAULT_HORIZONS, help="향후 수익률 기간 (봉 수)")
+    parser.add_argument('--backfill', action='store_true', help="히스토리에 없는 날짜의 스냅샷 저장")
+    parser.add_argument('--out', default=REPLAY_FILE, help=f"결과 파일 (기본 {REPLAY_FILE})")
+    args = parser.parse_args()
+    utils.quiet_warnings()
+
+    start_time = time.time()
+    store = PriceStore(offline=True)
+    ticker_info_list = load_universe(store)
+    print(f"[{time.strftime('%X')}] 리플레이 대상: {len(ticker_info_list)}개")
+
+    replay = Replay(ticker_info_list, store, args.windows).build()
+    dates = replay.dates(args.start, args.end)
+    if len(dates) == 0:
+        print("⚠️ 계산 가능한 날짜 없음 (가격 이력이 가장 긴 RS 기간보다 짧음)")
+        return
+    print(f"[{time.strftime('%X')}] 행렬 계산 완료: {replay.close.shape[1]}개 × {len(dates)}일 "
+          f"({dates[0]:%Y-%m-%d} ~ {dates[-1]:%Y-%m-%d}), {time.time() - start_time:.1f}초")
+
+    cohorts = replay.cohort_stats(dates, args.top_pct, args.horizons)
+    for label, by_horizon in cohorts.items():
+        summary = ", ".join(f"{h} excess {s['excess']:+.2%} hit {s['hit_rate']:.0%}"
+                            for h, s in by_horizon.items() if s['excess'] is not None)
+        print(f"  RS {label} ({replay.windows[label]}봉) 상위 {args.top_pct:g}%: {summary or '향후 수익률 없음'}")
+
+    output = {
+        "last_updated": time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime()),
+        "start": dates[0].strftime('%Y-%m-%d'),
+        "end": dates[-1].strftime('%Y-%m-%d'),
+        "days": len(dates),
+        "tickers": int(replay.close.shape[1]),
+        "windows": replay.windows,
+        "top_pct": args.top_pct,
+        "cohorts": cohorts,
+        "top_industries": replay.top_industries(dates),
+    }
+    os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(output, f, ensure_ascii=False, separators=(',', ':'))
+    print(f"[{time.strftime('%X')}] 결과 저장: {args.out}")
+
+    if args.backfill:
+        written = backfill(replay, dates)
+        print(f"[{time.strftime('%X')}] 히스토리 백필: {len(written)}일 {written[:3]}{' ...' if len(written) > 3 else ''}")
+
+
+if __name__ == "__main__":
+    main()
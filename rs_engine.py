@@ -0,0 +1,170 @@
+import pandas as pd
+
+# RS 계산 기간 (영업일 기준)
+# 1mo = 20영업일, 3mo = 60영업일, 6mo = 120영업일
+RS_WINDOWS = {
+    '1mo': 20,
+    '3mo': 60,
+    '6mo': 120,
+}
+
+DIV_WINDOW = 50  # 50일 이동평균 괴리율 (50DIV)
+
+# 벤치마크
+# - PRIMARY_BENCHMARK: 기본 RS 컬럼(RS_6mo 등)의 기준
+# - EXTRA_BENCHMARKS: 같은 패스에서 추가로 계산할 벤치마크 → RS_6mo_SPY 같은 컬럼
+# - SECTOR_ETFS: 섹터(Yahoo 분류) → SPDR 섹터 ETF → RS_6mo_Sector 컬럼
+PRIMARY_BENCHMARK = 'QQQ'
+EXTRA_BENCHMARKS = ['SPY', 'IWM']
+SECTOR_ETFS = {
+    'Technology': 'XLK',
+    'Communication Services': 'XLC',
+    'Consumer Cyclical': 'XLY',
+    'Consumer Defensive': 'XLP',
+    'Energy': 'XLE',
+    'Financial Services': 'XLF',
+    'Healthcare': 'XLV',
+    'Industrials': 'XLI',
+    'Basic Materials': 'XLB',
+    'Real Estate': 'XLRE',
+    'Utilities': 'XLU',
+}
+
+
+def benchmark_tickers():
+    """한 번에 받아 둘 벤치마크 티커 전체 (기본 + 추가 + 섹터 ETF, 중복 제거)"""
+    return list(dict.fromkeys([PRIMARY_BENCHMARK] + EXTRA_BENCHMARKS + list(SECTOR_ETFS.values())))
+
+
+def extract_field_matrix(batch_data, field, tickers=None):
+    """
+    yf.download(group_by='ticker') 결과에서 필드 하나(Close, High, Volume 등)의 행렬(날짜 × 티커)을 뽑아냅니다.
+    - MultiIndex 컬럼: (티커, 필드) 구조에서 field 레벨만 선택
+    - 단일 컬럼 구조: 티커가 1개인 배치 → tickers[0] 이름으로 컬럼 지정
+    """
+    if batch_data is None or batch_data.empty:
+        return pd.DataFrame()
+
+    if isinstance(batch_data.columns, pd.MultiIndex):
+        fields = batch_data.columns.get_level_values(1)
+        if field not in fields:
+            return pd.DataFrame()
+        matrix = batch_data.xs(field, axis=1, level=1)
+    else:
+        if field not in batch_data.columns:
+            return pd.DataFrame()
+        name = tickers[0] if tickers else field
+        matrix = batch_data[[field]].rename(columns={field: name})
+
+    # 중복 컬럼(같은 티커가 두 번 요청된 경우) 제거
+    matrix = matrix.loc[:, ~matrix.columns.duplicated()]
+    return matrix.astype('float64')
+
+
+def extract_close_matrix(batch_data, tickers=None):
+    """종가 행렬(날짜 × 티커) (extract_field_matrix의 Close)"""
+    return extract_field_matrix(batch_data, 'Close', tickers)
+
+
+def compute_window_returns(close, windows=RS_WINDOWS):
+    """
+    모든 티커의 기간 수익률을 한 번에 계산합니다.
+    기존 calc_return과 동일하게 '마지막 행'과 'window+1번째 전 행'을 위치 기준으로 비교합니다.
+    데이터 길이가 window+1보다 짧으면 해당 기간은 전부 NaN.
+    """
+    latest = close.iloc[-1] if len(close) else pd.Series(dtype='float64')
+    returns = {}
+    for label, window in windows.items():
+        if len(close) < window + 1:
+            returns[label] = pd.Series(float('nan'), index=close.columns)
+            continue
+        prev = close.iloc[-(window + 1)]
+        ret = (latest - prev) / prev
+        # 기존 로직: 기준가가 0이면 수익률 0
+        ret[prev == 0] = 0.0
+        returns[label] = ret
+    return pd.DataFrame(returns, index=close.columns)
+
+
+def compute_benchmark_returns(benchmark_close, windows=RS_WINDOWS):
+    """
+    벤치마크(QQQ) 수익률을 배치 전체에서 딱 한 번만 계산합니다.
+    데이터가 6mo 기간보다 짧거나 계산이 안 되면 0 처리 (기존 로직 유지)
+    """
+    max_window = max(windows.values())
+    if benchmark_close is None or len(benchmark_close) < max_window + 1:
+        return {label: 0.0 for label in windows}
+
+    frame = benchmark_close.to_frame('benchmark') if isinstance(benchmark_close, pd.Series) else benchmark_close
+    rets = compute_window_returns(frame.iloc[:, :1], windows).iloc[0]
+    return {label: (0.0 if pd.isna(v) else float(v)) for label, v in rets.items()}
+
+
+def compute_ma_divergence(close, window=DIV_WINDOW):
+    """
+    이동평균 괴리율(%)을 전 종목에 대해 계산합니다.
+    데이터가 window보다 짧거나 이동평균이 0이면 None.
+    """
+    if len(close) < window:
+        return pd.Series(float('nan'), index=close.columns)
+    latest = close.iloc[-1]
+    ma = close.iloc[-window:].mean()
+    div = ((latest - ma) / ma * 100).round(2)
+    div[ma == 0] = float('nan')
+    return div
+
+
+def compute_rs_frame(close, benchmark_close, windows=RS_WINDOWS, extra_returns=None):
+    """
+    종가 행렬(날짜 × 티커)과 벤치마크 종가로 전 종목의 Price / RS / 50DIV를 계산합니다.
+    반환값: 티커를 인덱스로 하는 DataFrame (Price, RS_6mo, RS_3mo, RS_1mo, 50DIV)
+
+    RS = 종목 수익률 - 벤치마크 수익률
+    종목 데이터가 기간보다 짧아 수익률 자체가 없으면 0 (기존 process_single_ticker 동작 유지)
+    extra_returns({벤치마크: {기간: 수익률}})가 주어지면 종목 수익률을 재사용해
+    RS_6mo_SPY 같은 벤치마크별 컬럼을 뒤에 덧붙입니다.
+    """
+    if close is None or close.empty:
+        return pd.DataFrame(columns=['Price'] + [f'RS_{label}' for label in windows] + ['50DIV'])
+
+    stock_returns = compute_window_returns(close, windows)
+    bench_returns = compute_benchmark_returns(benchmark_close, windows)
+
+    frame = pd.DataFrame(index=close.columns)
+    frame['Price'] = close.iloc[-1]
+    for label in sorted(windows, key=windows.get, reverse=True):
+        if len(close) < windows[label] + 1:
+            frame[f'RS_{label}'] = 0.0
+        else:
+            frame[f'RS_{label}'] = stock_returns[label] - bench_returns[label]
+    frame['50DIV'] = compute_ma_divergence(close)
+
+    for name, returns in (extra_returns or {}).items():
+        for label in sorted(windows, key=windows.get, reverse=True):
+            if len(close) < windows[label] + 1:
+                frame[f'RS_{label}_{name}'] = 0.0
+            else:
+                frame[f'RS_{label}_{name}'] = stock_returns[label] - returns[label]
+    return frame
+
+
+def attach_sector_rs(results, primary_returns, etf_returns, windows=RS_WINDOWS):
+    """
+    섹터 ETF 대비 RS 컬럼을 결과 표(ScanTable)에 붙입니다 (RS_6mo_Sector 등, 메타데이터 단계 이후).
+    종목 수익률 = RS(기본 벤치마크) + 기본 벤치마크 수익률 이므로 가격을 다시 읽지 않고
+    RS_Sector = RS + 기본 벤치마크 수익률 - 섹터 ETF 수익률 로 계산합니다.
+    섹터 ETF가 없거나 수익률을 못 구했으면 None.
+    """
+    labels = sorted(windows, key=windows.get, reverse=True)
+    etfs = [SECTOR_ETFS.get(sector) for sector in results.column('Sector')]
+    results.set_column('Sector_ETF', etfs)
+    for label in labels:
+        values = []
+        for etf, rs in zip(etfs, results.column(f'RS_{label}')):
+            returns = etf_returns.get(etf)
+            if returns is None or rs is None or rs != rs:
+                values.append(None)
+            else:
+                values.append(rs + primary_returns[label] - returns[label])
+        results.set_column(f'RS_{label}_Sector', values)
+    return results
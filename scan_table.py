@@ -0,0 +1,295 @@
+import json
+import sys
+from array import array
+
+# 스캔 결과 행 저장소 (컬럼형)
+# 티커마다 dict를 두는 대신 컬럼별로 모아 둡니다.
+# - 실수 컬럼: array('d') (값당 8바이트) + None 표시 bytearray (행당 1바이트, NaN과 None을 구분해 result.json 출력 유지)
+# - 불리언 컬럼(지표 플래그): array('b') (1/0, None은 -1)
+# - 그 밖의 컬럼(Ticker, Sector 등 문자열, 정수): 리스트 (Sector/Industry처럼 반복되는 문자열은 sys.intern으로 한 객체 공유)
+# 행 dict(키 + 실수 객체) 대신이라 5만 티커 기준 행 메모리가 1/8 정도로 줄어듭니다.
+# 행 단위로 필요할 때는 row(i) / 순회로 dict를 하나씩 만들어 씁니다 (result.json 스트리밍 저장 등).
+FLOAT = 'float'
+FLAG = 'flag'
+OBJECT = 'object'
+INTERNED_COLUMNS = ('Sector', 'Industry', 'Sector_ETF')
+TABLE_FORMAT = "scan-table-v1"
+NAN = float('nan')
+
+
+def _kind_of(value):
+    if isinstance(value, bool):
+        return FLAG
+    if value is None or isinstance(value, float):
+        return FLOAT
+    return OBJECT
+
+
+class ScanTable:
+    """
+    결과 행(dict)과 같은 키/값을 컬럼형으로 보관
+    - append(row) / extend(rows): 행 추가 (같은 Ticker가 있으면 그 자리에서 교체)
+    - row(i), 순회, table[i]: 행 dict (호출할 때마다 새로 만듦, 수정해도 표에는 반영되지 않음)
+    - column(name) / set_column(name, values): 컬럼 단위 읽기/쓰기 (순위, 메타데이터 붙이기 등)
+    - to_frame(columns): 집계용 DataFrame
+    """
+
+    def __init__(self):
+        self.columns = []      # 컬럼 이름 (행 dict의 키 순서)
+        self._kinds = {}
+        self._data = {}
+        self._none = {}        # 실수 컬럼의 None 표시 (bytearray, 1이면 None)
+        self._positions = {}   # {Ticker: 행 번호}
+        self._size = 0
+
+    @classmethod
+    def from_rows(cls, rows):
+        table = cls()
+        table.extend(rows)
+        return table
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self.row(i)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError(i)
+        return self.row(i)
+
+    def __contains__(self, ticker):
+        return ticker in self._positions
+
+    @property
+    def tickers(self):
+        return list(self._data.get('Ticker', []))
+
+    @property
+    def nbytes(self):
+        """컬럼 버퍼 크기 (리스트는 포인터 크기만, 참고용)"""
+        columns = sum(len(data) * (data.itemsize if isinstance(data, array) else 8) for data in self._data.values())
+        return columns + sum(len(mask) for mask in self._none.values())
+
+    # --- 저장 ---
+
+    def _add_column(self, name, kind):
+        size = self._size
+        if kind == FLOAT:
+            data = array('d', [NAN]) * size
+            self._none[name] = bytearray(b'\x01') * size
+        elif kind == FLAG:
+            data = array('b', [-1]) * size
+        else:
+            data = [None] * size
+        self.columns.append(name)
+        self._kinds[name] = kind
+        self._data[name] = data
+
+    def _to_object(self, name):
+        """실수/플래그 컬럼에 다른 타입 값이 들어오면 리스트 컬럼으로 전환"""
+        values = self.column(name)
+        self._kinds[name] = OBJECT
+        self._data[name] = values
+        self._none.pop(name, None)
+
+    def _store(self, name, i, value):
+        kind = self._kinds[name]
+        data = self._data[name]
+        if kind == FLOAT:
+            if value is None:
+                data[i] = NAN
+                self._none[name][i] = 1
+                return
+            if isinstance(value, float):
+                data[i] = value
+                self._none[name][i] = 0
+                return
+        elif kind == FLAG:
+            if value is None or isinstance(value, bool):
+                data[i] = -1 if value is None else int(value)
+                return
+        else:
+            data[i] = sys.intern(value) if type(value) is str and name in INTERNED_COLUMNS else value
+            return
+        self._to_object(name)
+        self._store(name, i, value)
+
+    def _grow(self):
+        i = self._size
+        self._size += 1
+        for name in self.columns:
+            kind = self._kinds[name]
+            if kind == FLOAT:
+                self._data[name].append(NAN)
+                self._none[name].append(1)
+            elif kind == FLAG:
+                self._data[name].append(-1)
+            else:
+                self._data[name].append(None)
+        return i
+
+    def append(self, row):
+        """행 하나 추가 (같은 Ticker가 이미 있으면 교체, 행에 없는 컬럼은 None)"""
+        ticker = row.get('Ticker')
+        i = self._positions.get(ticker)
+        if i is None:
+            i = self._grow()
+            if ticker is not None:
+                self._positions[ticker] = i
+        else:
+            for name in self.columns:
+                if name not in row:
+                    self._store(name, i, None)
+        for name, value in row.items():
+            if name not in self._kinds:
+                self._add_column(name, _kind_of(value))
+            self._store(name, i, value)
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+        return self
+
+    def set_column(self, name, values):
+        """컬럼 전체 쓰기 (없는 컬럼이면 맨 뒤에 추가, 빈 표면 values 길이만큼 행 생성)"""
+        values = list(values)
+        if not self.columns and self._size == 0:
+            for _ in values:
+                self._grow()
+        if len(values) != self._size:
+            raise ValueError(f"{name}: 길이 {len(values)} != 행 수 {self._size}")
+        if name not in self._kinds:
+            first = next((v for v in values if v is not None), None)
+            self._add_column(name, _kind_of(first))
+        for i, value in enumerate(values):
+            self._store(name, i, value)
+        if name == 'Ticker':
+            self._positions = {t: i for i, t in enumerate(values) if t is not None}
+        return self
+
+    def reorder(self, tickers):
+        """주어진 티커 순서로 재배열 (표에 없는 티커는 건너뛰고, 목록에 없는 행은 버림)"""
+        order = [self._positions[t] for t in tickers if t in self._positions]
+        order = list(dict.fromkeys(order))
+        for name in self.columns:
+            data = self._data[name]
+            kind = self._kinds[name]
+            if kind == OBJECT:
+                self._data[name] = [data[j] for j in order]
+            else:
+                self._data[name] = array(data.typecode, (data[j] for j in order))
+            if kind == FLOAT:
+                missing = self._none[name]
+                self._none[name] = bytearray(missing[j] for j in order)
+        self._size = len(order)
+        self._positions = {t: i for i, t in enumerate(self._data.get('Ticker', [])) if t is not None}
+        return self
+
+    def select(self, tickers):
+        """주어진 티커의 행만 새 표로 (티커 순서대로)"""
+        table = ScanTable()
+        for t in tickers:
+            i = self._positions.get(t)
+            if i is not None:
+                table.append(self.row(i))
+        return table
+
+    def subset(self, columns):
+        """주어진 컬럼만 가진 새 표 (행 순서 유지, 표에 없는 컬럼은 건너뜀)"""
+        table = ScanTable()
+        for name in columns:
+            if name in self._kinds:
+                table.set_column(name, self.column(name))
+        return table
+
+    # --- 읽기 ---
+
+    def _value(self, name, i):
+        kind = self._kinds[name]
+        if kind == FLOAT:
+            return None if self._none[name][i] else self._data[name][i]
+        if kind == FLAG:
+            value = self._data[name][i]
+            return None if value < 0 else bool(value)
+        return self._data[name][i]
+
+    def row(self, i):
+        return {name: self._value(name, i) for name in self.columns}
+
+    def get_row(self, ticker):
+        i = self._positions.get(ticker)
+        return None if i is None else self.row(i)
+
+    def column(self, name):
+        """컬럼 값 리스트 (없는 컬럼은 None으로 채움)"""
+        if name not in self._kinds:
+            return [None] * self._size
+        kind = self._kinds[name]
+        if kind == OBJECT:
+            return list(self._data[name])
+        return [self._value(name, i) for i in range(self._size)]
+
+    def to_frame(self, columns=None):
+        """DataFrame (실수 컬럼은 None도 NaN인 float64, 나머지는 object)"""
+        import numpy as np
+        import pandas as pd
+
+        data = {}
+        for name in columns or self.columns:
+            if self._kinds.get(name) == FLOAT:
+                data[name] = np.frombuffer(self._data[name], dtype='float64').copy() if self._size else \
+                    np.empty(0, dtype='float64')
+            else:
+                data[name] = self.column(name)
+        return pd.DataFrame(data, columns=list(columns or self.columns))
+
+    # --- 직렬화 ---
+
+    def dump(self, f):
+        """{"format", "columns": {이름: 값 리스트}}를 컬럼 하나씩 파일에 씀 (체크포인트용)"""
+        f.write('{"format":%s,"columns":{' % json.dumps(TABLE_FORMAT))
+        for k, name in enumerate(self.columns):
+            if k:
+                f.write(',')
+            f.write(json.dumps(name, ensure_ascii=False) + ':')
+            f.write(json.dumps(self.column(name), ensure_ascii=False, separators=(',', ':')))
+        f.write('}}')
+
+    @classmethod
+    def load(cls, obj):
+        """dump()로 저장한 구조 또는 행 dict 리스트 → ScanTable"""
+        if isinstance(obj, dict) and obj.get('format') == TABLE_FORMAT:
+            table = cls()
+            for name, values in obj['columns'].items():
+                table.set_column(name, values)
+            return table
+        return cls.from_rows(obj)
+
+
+def as_table(rows):
+    """행 dict 리스트면 ScanTable로 (이미 ScanTable이면 그대로)"""
+    return rows if isinstance(rows, ScanTable) else ScanTable.from_rows(rows)
+
+
+def iter_json(obj, **options):
+    """
+    result.json 구조를 조각(str) 단위로 직렬화 (json.dumps와 같은 결과, 공백 없음)
+    최상위 값 중 ScanTable/리스트는 행 하나씩 직렬화해서 전체 문자열을 메모리에 만들지 않습니다.
+    """
+    options = dict({'ensure_ascii': False, 'separators': (',', ':')}, **options)
+    yield '{'
+    for k, (key, value) in enumerate(obj.items()):
+        head = ('' if k == 0 else ',') + json.dumps(key, **options) + ':'
+        if isinstance(value, (ScanTable, list)):
+            yield head + '['
+            for j, item in enumerate(value):
+                yield ('' if j == 0 else ',') + json.dumps(item, **options)
+            yield ']'
+        else:
+            yield head + json.dumps(value, **options)
+    yield '}'
@@ -0,0 +1,128 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+
+
+def _intern_values(entry):
+    return {k: sys.intern(v) if isinstance(v, str) else v for k, v in entry.items()}
+
+
+class SectorCache:
+    """
+    Sector/Industry/발행주식수 캐시 (static/sector_search.json)
+    - 지연 로드: 처음 접근할 때 파일을 읽음 (import 시 JSON 파싱 없음)
+    - 스레드 안전: 모든 읽기/쓰기는 RLock으로 보호
+    - dirty 추적: 변경이 없으면 save()는 파일을 건드리지 않음
+    - 원자적 저장: 임시 파일에 쓰고 fsync 후 os.replace → 중간에 죽어도 기존 파일은 온전함
+    - 간결한 인코딩: 공백 없는 JSON, 티커당 한 줄 (git diff가 티커 단위로 나옴)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._data = None
+        self._dirty = False
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def _ensure_loaded(self):
+        if self._data is not None:
+            return
+        with self._lock:
+            if self._data is not None:
+                return
+            data = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        # 섹터/업종/날짜 문자열은 티커마다 반복되므로 한 객체를 공유
+                        data = json.load(f, object_hook=_intern_values)
+                    print(f"Sector Cache Loaded: {len(data)} items")
+                except Exception as e:
+                    print(f"Cache Load Error: {e}")
+                    data = {}
+            self._data = data
+
+    def load(self):
+        """명시적 로드 (이미 로드됐으면 아무것도 안 함)"""
+        self._ensure_loaded()
+
+    def get(self, ticker, default=None):
+        self._ensure_loaded()
+        with self._lock:
+            entry = self._data.get(ticker)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return dict(entry)
+
+    def peek(self, ticker, default=None):
+        """get과 같지만 적중/미스 통계에 세지 않음 (같은 티커를 한 실행에서 다시 볼 때)"""
+        self._ensure_loaded()
+        with self._lock:
+            entry = self._data.get(ticker)
+            return default if entry is None else dict(entry)
+
+    def __getitem__(self, ticker):
+        entry = self.get(ticker)
+        if entry is None:
+            raise KeyError(ticker)
+        return entry
+
+    def __setitem__(self, ticker, entry):
+        self._ensure_loaded()
+        with self._lock:
+            if self._data.get(ticker) != entry:
+                self._data[ticker] = dict(entry)
+                self._dirty = True
+
+    def __contains__(self, ticker):
+        self._ensure_loaded()
+        with self._lock:
+            return ticker in self._data
+
+    def __len__(self):
+        self._ensure_loaded()
+        with self._lock:
+            return len(self._data)
+
+    def items(self):
+        self._ensure_loaded()
+        with self._lock:
+            return [(k, dict(v)) for k, v in self._data.items()]
+
+    @property
+    def dirty(self):
+        return self._dirty
+
+    def save(self, force=False):
+        """변경된 경우에만 임시 파일 + rename으로 원자적 저장"""
+        with self._lock:
+            if self._data is None or (not self._dirty and not force):
+                return False
+            directory = os.path.dirname(self.path) or '.'
+            os.makedirs(directory, exist_ok=True)
+
+            fd, tmp_path = tempfile.mkstemp(prefix='.sector_cache.', suffix='.tmp', dir=directory)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write('{\n')
+                    lines = [
+                        json.dumps(ticker, ensure_ascii=False) + ':' +
+                        json.dumps(self._data[ticker], ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+                        for ticker in sorted(self._data)
+                    ]
+                    f.write(',\n'.join(lines))
+                    f.write('\n}\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self._dirty = False
+            return True
@@ -0,0 +1,61 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aggregation
+import metadata
+from scan_table import ScanTable
+from sector_cache import SectorCache
+
+
+def _rows():
+    return [
+        {'Ticker': 'AAA', 'Price': 10.0, 'RS_6mo': 0.2, 'RS_3mo': 0.1, 'RS_1mo': -0.1},
+        {'Ticker': 'BBB', 'Price': 20.0, 'RS_6mo': -0.1, 'RS_3mo': 0.3, 'RS_1mo': 0.2},
+        {'Ticker': 'CCC', 'Price': 5.0, 'RS_6mo': 0.4, 'RS_3mo': None, 'RS_1mo': 0.0},
+        {'Ticker': 'DDD', 'Price': 7.0, 'RS_6mo': 0.9, 'RS_3mo': 0.9, 'RS_1mo': 0.9},
+    ]
+
+
+def _cache(tmp_path):
+    cache = SectorCache(str(tmp_path / 'sector_cache.json'))
+    cache['AAA'] = {'Sector': 'Energy', 'Industry': 'Oil', 'Shares': 3_000_000_000}
+    cache['BBB'] = {'Sector': 'Energy', 'Industry': 'Oil', 'Shares': 500_000_000}
+    cache['CCC'] = {'Sector': 'Energy', 'Industry': 'Oil'}            # 발행주식수 없음 → 'N/A'
+    cache['DDD'] = {'Sector': 'N/A', 'Industry': 'N/A', 'Shares': 1}   # 섹터 없음 → 집계 제외
+    return cache
+
+
+def test_weighted_rs_uses_numeric_market_cap(tmp_path):
+    results = metadata.attach_metadata(ScanTable.from_rows(_rows()), _cache(tmp_path))
+    assert results.column('Market Cap') == ['30.00B', '10.00B', 'N/A', '0.00B']
+    assert results.column(metadata.MARKET_CAP_VALUE)[:3] == [30e9, 10e9, None]
+
+    industries, sectors = aggregation.aggregate(results)
+
+    assert len(industries) == 1 and len(sectors) == 1
+    oil = industries[0]
+    assert (oil['Sector'], oil['Industry'], oil['Count']) == ('Energy', 'Oil', 3)
+    assert oil['WRS_6mo'] == pytest.approx((0.2 * 30 - 0.1 * 10) / 40)   # CCC는 시총 없음 → 가중치 제외
+    assert oil['WRS_6mo_MD'] == pytest.approx(0.2)
+    assert oil['Breadth_6mo'] == pytest.approx(66.67)
+    assert oil['Count_3mo'] == 2
+
+
+def test_display_string_is_not_parsed_when_numeric_value_exists(tmp_path):
+    results = metadata.attach_metadata(ScanTable.from_rows(_rows()), _cache(tmp_path))
+    results.set_column('Market Cap', ['?'] * len(results))   # 표시 형식이 바뀌어도 집계는 그대로
+
+    frame = aggregation.rows_to_frame(results)
+    assert list(frame['MC'].fillna(-1)) == [30e9, 10e9, -1]
+
+
+def test_legacy_rows_without_numeric_value_parse_display_string():
+    rows = [dict(row, Sector='Energy', Industry='Oil', **{'Market Cap': mc})
+            for row, mc in zip(_rows(), ['1.5T', '250M', 'N/A', None])]
+
+    frame = aggregation.rows_to_frame(rows)
+    assert list(frame['MC'].fillna(-1)) == [1.5e12, 250e6, -1, -1]
@@ -0,0 +1,88 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import changes
+import fetch_and_save
+import history_store
+
+NAN = float('nan')
+
+
+def _row(ticker, rs, sector='Technology', industry='Software'):
+    return {'Ticker': ticker, 'Sector': sector, 'Industry': industry, 'Market Cap': 1e9,
+            'RS_6mo': rs, 'RS_3mo': rs, 'RS_1mo': rs}
+
+
+def _write_previous(output_dir):
+    """wrs_data/data에 NaN이 들어 있는 예전 result.json (json.dump 기본값 → NaN 리터럴)"""
+    previous = {
+        "last_updated": "2026-01-01 00:00:00 UTC",
+        "total_count": 2,
+        "market_condition": "Uptrend",
+        "wrs_data": [
+            {'Sector': 'Technology', 'Industry': 'Software', 'WRS_6mo_MD': NAN, 'WRS_MD_Rank_Pct': 10.0},
+            {'Sector': 'Energy', 'Industry': 'Oil', 'WRS_6mo_MD': NAN, 'WRS_MD_Rank_Pct': NAN},
+        ],
+        "sector_data": [],
+        "data": [
+            {'Ticker': 'AAA', 'RS_Rank_Pct': NAN, 'Sector': 'Technology', 'Industry': 'Software'},
+            {'Ticker': 'BBB', 'RS_Rank_Pct': 90.0, 'Sector': 'Technology', 'Industry': 'Software'},
+        ],
+    }
+    path = os.path.join(output_dir, "result.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(previous, f)
+    return path
+
+
+def test_diff_with_nan_in_previous_result(tmp_path):
+    previous = changes.load_previous(_write_previous(str(tmp_path)))
+    current = {
+        "last_updated": "2026-01-02 00:00:00 UTC",
+        "market_condition": "Uptrend",
+        "wrs_data": [{'Sector': 'Technology', 'Industry': 'Software', 'WRS_6mo_MD': 0.1, 'WRS_MD_Rank_Pct': 50.0}],
+        "data": [{'Ticker': 'AAA', 'RS_Rank_Pct': 5.0, 'Sector': 'Technology', 'Industry': 'Software'},
+                 {'Ticker': 'BBB', 'RS_Rank_Pct': 10.0, 'Sector': 'Technology', 'Industry': 'Software'}],
+    }
+    diff = changes.diff_scans(previous, current)
+
+    assert [m['Ticker'] for m in diff['rank_moves']] == ['BBB']  # NaN 순위(AAA)는 비교 대상에서 빠짐
+    move = diff['industry_moves'][0]
+    assert move['WRS_6mo_MD_from'] is None and move['WRS_6mo_MD_to'] == 0.1
+    path = changes.write_changes(diff, str(tmp_path))
+    with open(path, 'r', encoding='utf-8') as f:
+        assert json.load(f)['summary']['industries_removed'] == 1
+
+
+def test_publish_outputs_with_nan_previous_result(tmp_path):
+    output_dir = str(tmp_path / "static")
+    os.makedirs(output_dir)
+    _write_previous(output_dir)
+    rows = [_row('AAA', 0.2), _row('BBB', -0.1), _row('CCC', NAN, 'Energy', 'Oil')]
+
+    fetch_and_save.publish_outputs(rows, "Uptrend", output_dir, str(tmp_path / "cache"))
+
+    with open(os.path.join(output_dir, "result.json"), 'r', encoding='utf-8') as f:
+        assert json.load(f)['total_count'] == 3
+    with open(os.path.join(output_dir, changes.CHANGES_FILE), 'r', encoding='utf-8') as f:
+        assert json.load(f)['summary']['added'] == 1
+    assert history_store.list_history(os.path.join(output_dir, "history"))
+
+
+def test_unchanged_scan_still_archives_history(tmp_path):
+    output_dir = str(tmp_path / "static")
+    rows = [_row('AAA', 0.2), _row('BBB', -0.1)]
+    fetch_and_save.publish_outputs(rows, "Uptrend", output_dir, str(tmp_path / "cache"))
+    history_dir = os.path.join(output_dir, "history")
+    for name in os.listdir(history_dir):
+        os.remove(os.path.join(history_dir, name))
+
+    fetch_and_save.publish_outputs(rows, "Uptrend", output_dir, str(tmp_path / "cache"))
+
+    assert history_store.list_history(history_dir)
+    with open(os.path.join(output_dir, "history_index.json"), 'r', encoding='utf-8') as f:
+        assert json.load(f)['dates']
+    assert os.path.exists(os.path.join(output_dir, "trends.json"))
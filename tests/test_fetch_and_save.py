@@ -0,0 +1,84 @@
+import argparse
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fetch_and_save
+import utils
+from scan_table import ScanTable
+
+
+def _args(**overrides):
+    args = dict(run_id=None, fresh=False, offline=True, workers=1)
+    args.update(overrides)
+    return argparse.Namespace(**args)
+
+
+def test_compute_failure_keeps_checkpoints_and_outputs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("cache/runs/2026-10-17_keepme")
+    os.makedirs("out")
+    with open("out/result.json", 'w', encoding='utf-8') as f:
+        f.write('{"total_count":1}')
+    with open("universes.json", 'w', encoding='utf-8') as f:
+        json.dump({"universes": [{"name": "w", "source": "tickers", "tickers": ["AAA"], "output_dir": "out"}]}, f)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(utils, 'get_market_cap_and_rs', fail)
+
+    with pytest.raises(SystemExit) as exit_info:
+        fetch_and_save.run_universes("universes.json", _args())
+
+    assert exit_info.value.code == 1
+    assert os.path.isdir("cache/runs/2026-10-17_keepme")
+    with open("out/result.json", 'r', encoding='utf-8') as f:
+        assert f.read() == '{"total_count":1}'
+
+
+def _rows(n):
+    return [{'Ticker': f"T{i}", 'Sector': 'Energy', 'Industry': 'Oil', 'Market Cap': 1e9,
+             'RS_6mo': 0.01 * i, 'RS_3mo': 0.0, 'RS_1mo': 0.0} for i in range(n)]
+
+
+@pytest.mark.parametrize('rows', [[], _rows(3)])
+def test_publish_refuses_empty_or_shrunken_results(tmp_path, rows):
+    output_dir = str(tmp_path / "static")
+    fetch_and_save.publish_outputs(_rows(10), "Uptrend", output_dir, str(tmp_path / "cache"))
+    before = {name: os.path.getmtime(os.path.join(output_dir, name)) for name in os.listdir(output_dir)}
+    history = sorted(os.listdir(os.path.join(output_dir, "history")))
+
+    with pytest.raises(ValueError):
+        fetch_and_save.publish_outputs(rows, "Uptrend", output_dir, str(tmp_path / "cache"))
+
+    assert {name: os.path.getmtime(os.path.join(output_dir, name)) for name in os.listdir(output_dir)} == before
+    assert sorted(os.listdir(os.path.join(output_dir, "history"))) == history
+
+
+def test_universes_share_one_price_pass(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open("universes.json", 'w', encoding='utf-8') as f:
+        json.dump({"universes": [
+            {"name": "a", "source": "tickers", "tickers": ["T0", "T1", "T2"], "output_dir": "out/a"},
+            {"name": "b", "source": "tickers", "tickers": ["T2", "T3"], "output_dir": "out/b"},
+        ]}, f)
+    calls = []
+
+    def compute(union, **kwargs):
+        calls.append([item['Ticker'] for item in union])
+        return ScanTable.from_rows(_rows(4))
+    monkeypatch.setattr(utils, 'get_market_cap_and_rs', compute)
+    monkeypatch.setattr(utils, 'get_market_condition_from_sheet', lambda: "Uptrend")
+
+    fetch_and_save.run_universes("universes.json", _args())
+
+    assert calls == [["T0", "T1", "T2", "T3"]]
+    for name, tickers in [("a", ["T0", "T1", "T2"]), ("b", ["T2", "T3"])]:
+        with open(f"out/{name}/result.json", 'r', encoding='utf-8') as f:
+            result = json.load(f)
+        assert [row['Ticker'] for row in result['data']] == tickers
+        assert result['wrs_data'][0]['Count'] == len(tickers)   # 집계는 유니버스 안에서
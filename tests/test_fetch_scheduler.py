@@ -0,0 +1,93 @@
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fetch_scheduler
+from fetch_scheduler import FetchScheduler
+
+
+class _Provider:
+    """배치마다 (티커, Close) 프레임 반환, fail(batch, call)이 예외/None을 정하면 그대로 흉내"""
+
+    def __init__(self, fail=None, latency=0.0):
+        self.fail = fail
+        self.latency = latency
+        self.calls = []
+        self.active = self.peak = 0
+        self.lock = threading.Lock()
+
+    def download(self, tickers, **kwargs):
+        with self.lock:
+            self.calls.append(list(tickers))
+            call = len(self.calls)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.latency)
+            outcome = self.fail(tickers, call) if self.fail else None
+            if isinstance(outcome, Exception):
+                raise outcome
+            if outcome == 'empty':
+                return pd.DataFrame()
+            index = pd.bdate_range('2026-01-01', periods=2)
+            return pd.concat({t: pd.DataFrame({'Close': [1.0, 2.0]}, index=index) for t in tickers}, axis=1)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def _scheduler(provider, **kwargs):
+    kwargs = dict({'rate': 1000.0, 'burst': 1000}, **kwargs)
+    return FetchScheduler(provider, **kwargs)
+
+
+def _tickers(n):
+    return [f"T{i:03d}" for i in range(n)]
+
+
+def test_every_ticker_yielded_once_with_bounded_concurrency():
+    provider = _Provider(latency=0.02)
+    scheduler = _scheduler(provider, max_in_flight=3, batch_size=10, min_batch_size=10, max_batch_size=10)
+
+    seen = [t for batch, data in scheduler.download_all(_tickers(95)) for t in batch]
+
+    assert sorted(seen) == _tickers(95)
+    assert provider.peak <= 3
+    assert len(provider.calls) == 10
+
+
+def test_rate_limited_batch_is_requeued(monkeypatch):
+    monkeypatch.setattr(fetch_scheduler, 'BASE_BACKOFF', 0.0)
+    provider = _Provider(fail=lambda batch, call: Exception('429 Too Many Requests') if call == 1 else None)
+    scheduler = _scheduler(provider, max_in_flight=1, batch_size=20, min_batch_size=5)
+
+    results = list(scheduler.download_all(_tickers(20)))
+
+    assert sorted(t for batch, data in results for t in batch) == _tickers(20)
+    assert all(not data.empty for batch, data in results)
+    assert scheduler.stats['throttled'] == 1 and scheduler.stats['requeued'] == 1
+    assert [len(batch) for batch in provider.calls] == [20, 10, 10]   # 제한 후 배치 크기 절반
+
+
+def test_gives_up_after_max_attempts(monkeypatch):
+    monkeypatch.setattr(fetch_scheduler, 'BASE_BACKOFF', 0.0)
+    provider = _Provider(fail=lambda batch, call: 'empty' if 'BAD' in batch else None)
+    scheduler = _scheduler(provider, max_in_flight=1, batch_size=1, min_batch_size=1, max_batch_size=1,
+                           max_attempts=3)
+
+    results = list(scheduler.download_all(['AAA', 'BAD']))
+
+    assert sum(batch == ['BAD'] for batch in provider.calls) == 3
+    assert [data.empty for batch, data in results if batch == ['BAD']] == [True]
+    assert scheduler.stats['gave_up'] == 1
+
+
+def test_fast_batches_grow_batch_size():
+    scheduler = _scheduler(_Provider(), max_in_flight=1, batch_size=10, max_batch_size=40)
+    list(scheduler.download_all(_tickers(100)))
+    assert scheduler.batch_size > 10
@@ -0,0 +1,65 @@
+import json
+import os
+import sys
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import history_store
+from history_query import HistoryMatrix
+
+
+def _result(day, wrs=True):
+    rows = [{'Ticker': t, 'Sector': 'Energy', 'Industry': 'Oil', 'Price': 10.0 + day,
+             'RS_6mo': 0.1 * day * (i + 1), 'RS_Rank_Pct': rank}
+            for i, (t, rank) in enumerate([('AAA', 50 - 10 * day), ('BBB', 20 + day)])]
+    return {'last_updated': f'2026-01-0{day} 21:00:00 UTC', 'total_count': len(rows),
+            'wrs_data': [{'Sector': 'Energy', 'Industry': 'Oil', 'WRS_6mo_MD': 0.1 * day}] if wrs else [],
+            'data': rows}
+
+
+def _write_history(static_dir, days, **kwargs):
+    history_dir = os.path.join(static_dir, 'history')
+    index_file = os.path.join(static_dir, 'history_index.json')
+    dates = []
+    if os.path.exists(index_file):
+        with open(index_file, 'r', encoding='utf-8') as f:
+            dates = json.load(f)['dates']
+    for day in days:
+        date = f'2026-01-0{day}'
+        path = history_store.write_snapshot(_result(day, **kwargs), date, history_dir)
+        dates.append({'date': date, 'filename': f"history/{os.path.basename(path)}"})
+    with open(index_file, 'w', encoding='utf-8') as f:
+        json.dump({'dates': dates}, f)
+
+
+def _matrix(tmp_path):
+    static_dir = str(tmp_path / 'static')
+    return HistoryMatrix(os.path.join(static_dir, 'history_index.json'), static_dir, str(tmp_path / 'cache'))
+
+
+def test_build_appends_only_new_dates_without_warnings(tmp_path):
+    static_dir = str(tmp_path / 'static')
+    _write_history(static_dir, [1, 2], wrs=False)   # 업종 행이 없는 날 → 빈 프레임
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        assert _matrix(tmp_path).build() == 2
+
+        _write_history(static_dir, [3])
+        matrix = _matrix(tmp_path)
+        assert matrix.build() == 1    # 캐시에 있는 두 날짜는 다시 읽지 않음
+
+    assert list(matrix.trajectory('AAA', 'Price')) == [11.0, 12.0, 13.0]
+    assert matrix.trajectory('ZZZ').empty
+    assert len(matrix.wrs) == 1
+
+
+def test_top_rank_improvers_orders_by_rank_gain(tmp_path):
+    _write_history(str(tmp_path / 'static'), [1, 2, 3])
+    matrix = _matrix(tmp_path)
+    matrix.build()
+
+    out = matrix.top_rank_improvers(n=5, days=2)
+    assert list(out['Ticker']) == ['AAA', 'BBB']
+    assert list(out['Improvement']) == [20, -2]
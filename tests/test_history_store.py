@@ -0,0 +1,51 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import history_store
+from scan_table import ScanTable
+
+
+def _result(rs_shift=0.0):
+    rows = [{'Ticker': f"T{i}", 'Sector': 'Energy' if i % 3 else 'Technology', 'Industry': 'Oil',
+             'RS_6mo': round(0.123456 * i + rs_shift, 6), '50DIV': 1.25, 'Market Cap': 'N/A' if i == 2 else '1.50B'}
+            for i in range(8)]
+    return {'last_updated': '2026-01-02 21:00:00 UTC', 'total_count': len(rows), 'market_condition': 'Uptrend',
+            'wrs_data': [{'Sector': 'Energy', 'Industry': 'Oil', 'WRS_6mo_MD': 0.5}], 'data': rows}
+
+
+def test_delta_snapshot_round_trip(tmp_path):
+    history_dir = str(tmp_path)
+    keyframe, current = _result(), _result(rs_shift=0.01)
+    history_store.write_snapshot(keyframe, '2026-01-02', history_dir)
+    path = history_store.write_snapshot(dict(current, data=ScanTable.from_rows(current['data'])), '2026-01-05',
+                                        history_dir)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        snapshot = json.load(f)
+    assert snapshot['base'] == '2026-01-02'
+    assert snapshot['tables']['data']['columns']['Ticker'] == {'type': 'base'}   # 키프레임과 같은 컬럼은 참조
+    assert snapshot['tables']['data']['columns']['RS_6mo']['type'] == 'num'      # 바뀐 컬럼은 그대로
+    assert history_store.load_snapshot('2026-01-05', history_dir) == current
+    assert history_store.load_snapshot('2026-01-02', history_dir) == keyframe
+
+
+def test_old_keyframe_is_not_used_as_base(tmp_path):
+    history_dir = str(tmp_path)
+    history_store.write_snapshot(_result(), '2026-01-02', history_dir)
+    path = history_store.write_snapshot(_result(), '2026-02-02', history_dir)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        assert 'base' not in json.load(f)
+
+
+def test_migrate_legacy_replaces_full_copies(tmp_path):
+    history_dir = str(tmp_path)
+    with open(os.path.join(history_dir, "result_2026-01-02.json"), 'w', encoding='utf-8') as f:
+        json.dump(_result(), f, indent=2)
+
+    assert history_store.migrate_legacy(history_dir) == 1
+    assert history_store.list_history(history_dir) == {'2026-01-02': 'snap_2026-01-02.json'}
+    assert history_store.load_snapshot('2026-01-02', history_dir) == _result()
@@ -0,0 +1,60 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import indicators
+import price_store
+from price_store import PriceStore
+
+
+def _panel(days, tickers=('AAA', 'BBB')):
+    index = pd.bdate_range(end='2025-12-31', periods=days)
+    frames = {}
+    for k, t in enumerate(tickers):
+        close = pd.Series(np.linspace(10, 20 + k, days), index=index)
+        frames[t] = pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+                                  'Volume': 1000.0})
+    return pd.concat(frames, axis=1)
+
+
+def test_store_covers_largest_registered_window():
+    largest = max(indicator.window or 0 for indicator in indicators.REGISTRY.values())
+    assert indicators.history_days(list(indicators.REGISTRY)) <= price_store.STORE_DAYS
+    assert price_store.bars_to_days(largest) <= price_store.STORE_DAYS
+
+
+def test_history_window_serves_52_week_bars(tmp_path):
+    store = PriceStore(str(tmp_path), offline=True)
+    store._save('AAA', _panel(300)['AAA'], '2025-12-31')
+
+    window = store.window('AAA', indicators.history_days(['RS_52W_High']))
+
+    assert len(window) >= indicators.RS_HIGH_WINDOW
+
+
+def test_required_fields_follow_enabled_inputs():
+    assert indicators.required_fields([]) == ['Close']
+    assert indicators.required_fields(['ATR_Pct', 'Vol_Surge']) == ['Close', 'High', 'Low', 'Volume']
+
+
+def test_short_history_yields_nan_without_computing():
+    data = _panel(100)
+    close = data.xs('Close', axis=1, level=1)
+    frame = indicators.compute(data, close, close['AAA'], enabled=['20DIV', '200DIV'])
+
+    assert frame['20DIV'].notna().all()
+    assert frame['200DIV'].isna().all()
+
+
+def test_rs_52w_high_uses_full_window():
+    data = _panel(260)
+    close = data.xs('Close', axis=1, level=1)
+    benchmark = pd.Series(10.0, index=close.index)
+
+    frame = indicators.compute(data, close, benchmark, enabled=['RS_52W_High'])
+
+    assert frame['RS_52W_High'].tolist() == [True, True]
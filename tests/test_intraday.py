@@ -0,0 +1,89 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import intraday
+import utils
+from price_store import PriceStore
+from sector_cache import SectorCache
+
+LAST_CLOSE = pd.Timestamp('2026-06-29')
+SESSION = pd.Timestamp('2026-06-30')
+
+
+def _close():
+    index = pd.bdate_range(end=LAST_CLOSE, periods=3)
+    return pd.DataFrame({'AAA': [1.0, 2.0, 3.0], 'BBB': [4.0, 5.0, np.nan]}, index=index)
+
+
+def test_live_price_appends_session_row():
+    close = intraday.apply_live_prices(_close(), {'AAA': (SESSION, 3.5), 'ZZZ': (SESSION, 9.0)}, SESSION)
+
+    assert close.index[-1] == SESSION and len(close) == 4
+    assert close.loc[SESSION, 'AAA'] == 3.5
+    assert close.loc[SESSION, 'BBB'] == 5.0      # 현재가 없음 → 직전 종가 유지
+    assert 'ZZZ' not in close.columns
+
+
+def test_live_price_replaces_existing_session_row():
+    original = _close()
+    close = intraday.apply_live_prices(original, {'BBB': (LAST_CLOSE, 6.0)}, LAST_CLOSE)
+
+    assert len(close) == 3 and close.loc[LAST_CLOSE, 'BBB'] == 6.0
+    assert np.isnan(original.loc[LAST_CLOSE, 'BBB'])   # 원본은 그대로
+
+
+def test_session_date_drops_timezone():
+    quotes = {'AAA': (pd.Timestamp('2026-06-30 15:55', tz='America/New_York'), 1.0),
+              'BBB': (pd.Timestamp('2026-06-29 15:55', tz='America/New_York'), 1.0)}
+    assert intraday.session_date(quotes) == SESSION
+
+
+class _QuoteScheduler:
+    """당일 5분봉 흉내: 티커마다 prices[티커]를 마지막 종가로"""
+
+    def __init__(self, prices):
+        self.prices = prices
+        self.stats = {}
+
+    def download_all(self, tickers, **kwargs):
+        index = pd.DatetimeIndex([SESSION + pd.Timedelta(hours=h) for h in (10, 15)])
+        frames = {t: pd.DataFrame({'Close': [np.nan, self.prices[t]]}, index=index)
+                  for t in tickers if t in self.prices}
+        yield list(tickers), pd.concat(frames, axis=1)
+
+
+def test_intraday_rows_use_stored_history_and_live_price(tmp_path, monkeypatch):
+    cache = SectorCache(str(tmp_path / 'sector_search.json'))
+    cache['AAA'] = {'Sector': 'Energy', 'Industry': 'Oil', 'Shares': 1_000_000_000}
+    monkeypatch.setattr(utils, 'SECTOR_CACHE', cache)
+
+    index = pd.bdate_range(end=LAST_CLOSE, periods=200)
+    store = PriceStore(str(tmp_path / 'prices'), scheduler=_QuoteScheduler({'QQQ': 110.0, 'AAA': 40.0}),
+                       offline=True)
+    for ticker, close in {'QQQ': np.linspace(100, 109, 200), 'AAA': np.linspace(10, 30, 200)}.items():
+        store._save(ticker, pd.DataFrame({'Close': close}, index=index), '2026-06-29')
+
+    results, as_of = intraday.compute_intraday_rows([{'Ticker': 'AAA'}, {'Ticker': 'MISSING'}], price_store=store)
+
+    row = results.get_row('AAA')
+    stock = pd.Series(np.append(np.linspace(10, 30, 200), 40.0))
+    bench = pd.Series(np.append(np.linspace(100, 109, 200), 110.0))
+    expected = (stock.iloc[-1] / stock.iloc[-21] - 1) - (bench.iloc[-1] / bench.iloc[-21] - 1)
+    assert len(results) == 1 and row['Price'] == 40.0
+    assert row['RS_1mo'] == pytest.approx(expected)
+    assert row['Market Cap'] == '40.00B'
+    assert as_of.startswith('2026-06-30 15:00')
+
+
+def test_load_universe_from_previous_result(tmp_path):
+    path = tmp_path / 'result.json'
+    assert intraday.load_universe(str(path)) == []
+    path.write_text(json.dumps({'data': [{'Ticker': 'AAA'}, {'Ticker': None}, {'Ticker': 'BBB'}]}), encoding='utf-8')
+    assert intraday.load_universe(str(path)) == [{'Ticker': 'AAA'}, {'Ticker': 'BBB'}]
@@ -0,0 +1,49 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metadata
+from scan_table import ScanTable
+from sector_cache import SectorCache
+
+
+def test_cache_lookups_counted_once_per_ticker(tmp_path):
+    cache = SectorCache(str(tmp_path / "sector_search.json"))
+    cache['AAA'] = {'Sector': 'Technology', 'Industry': 'Software', 'Shares': 100,
+                    'sector_updated': '2999-01-01', 'shares_updated': '2999-01-01'}
+    results = ScanTable.from_rows([{'Ticker': 'AAA', 'Price': 10.0}, {'Ticker': 'BBB', 'Price': 5.0}])
+
+    fetched = lambda t: {'Sector': 'Energy', 'Industry': 'Oil', 'Shares': 50}
+    metadata.refresh_metadata(cache, {'AAA': 'AAA', 'BBB': 'BBB'}, fetch_fn=fetched)
+    metadata.attach_metadata(results, cache, count=False)
+
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert results.column('Sector') == ['Technology', 'Energy']
+
+
+def test_missing_values_are_cached_for_the_ttl(tmp_path):
+    cache = SectorCache(str(tmp_path / "sector_search.json"))
+    calls = []
+
+    def fetch_etf(t):
+        calls.append(t)
+        return {'Sector': 'ETF', 'Industry': 'ETF', 'Shares': None}
+
+    def fetch_unknown(t):
+        calls.append(t)
+        return {'Sector': 'N/A', 'Industry': 'N/A', 'Shares': None}
+
+    for _ in range(2):
+        metadata.refresh_metadata(cache, {'SPY': 'SPY'}, fetch_fn=fetch_etf)
+        metadata.refresh_metadata(cache, {'PFD': 'PFD'}, fetch_fn=fetch_unknown)
+
+    assert calls == ['SPY', 'PFD']
+    assert not metadata.needs_refresh(cache.peek('PFD'))
+
+
+def test_stale_entry_is_refreshed():
+    entry = {'Sector': 'Energy', 'Industry': 'Oil', 'Shares': 1,
+             'sector_updated': '2000-01-01', 'shares_updated': '2000-01-01'}
+    assert metadata.needs_refresh(entry)
+    assert metadata.needs_refresh({'Sector': 'Energy', 'Industry': 'Oil'})  # 조회 시각 없는 예전 항목
@@ -0,0 +1,61 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parallel_compute
+from price_store import PriceStore
+
+BARS = 150
+
+
+def _store(tmp_path, tickers):
+    index = pd.bdate_range(end='2026-06-30', periods=BARS)
+    store = PriceStore(str(tmp_path / 'prices'), offline=True)
+    rng = np.random.default_rng(3)
+    for ticker in tickers:
+        close = 100 * np.cumprod(1 + rng.normal(0, 0.01, BARS))
+        store._save(ticker, pd.DataFrame({'Close': close, 'High': close, 'Low': close}, index=index), '2026-06-30')
+    store.save_index()
+    return store, pd.Series(np.linspace(100, 120, BARS), index=index)
+
+
+def _batches(tickers, size=4):
+    return [(i // size, tickers[i:i + size]) for i in range(0, len(tickers), size)]
+
+
+def _collect(results):
+    """배치 번호 순 (행, 실패 사유) — NaN도 비교되도록 JSON 문자열로"""
+    ordered = sorted(results, key=lambda r: r[0])
+    return json.dumps([(index, rows, failures, error) for index, rows, failures, _, _, error in ordered])
+
+
+def test_process_pool_matches_single_process(tmp_path, monkeypatch):
+    tickers = [f"T{i:02d}" for i in range(38)] + ['MISSING']
+    store, bench = _store(tmp_path, tickers[:-1])
+    batches = _batches(tickers)
+
+    single = list(parallel_compute.compute_batches(batches, store, bench, workers=1))
+    monkeypatch.setattr(parallel_compute, 'PARALLEL_MIN_TICKERS', 1)
+    monkeypatch.setattr(parallel_compute, 'BATCHES_PER_TASK', 2)
+    parallel = list(parallel_compute.compute_batches(batches, store, bench, workers=2))
+
+    assert sorted(r[0] for r in parallel) == [index for index, _ in batches]   # 배치마다 정확히 한 번
+    assert _collect(parallel) == _collect(single)
+    assert single[-1][2] == {'MISSING': 'no_data'}
+
+
+def test_batch_error_marks_whole_batch_transient(tmp_path):
+    class _Broken:
+        fetch_failures = {}
+
+        def get_batch(self, *args, **kwargs):
+            raise OSError('disk')
+
+    index, rows, failures, _, _, error = parallel_compute.run_batch(7, ['AAA', 'BBB'], _Broken(), None)
+    assert (index, rows, error) == (7, [], 'disk')
+    assert failures == {'AAA': 'transient', 'BBB': 'transient'}
@@ -0,0 +1,54 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import history_store
+import payload
+from scan_table import ScanTable
+
+
+def _rows():
+    return [{'Ticker': f"T{i}", 'Sector': 'Energy' if i % 2 else 'Technology', 'Industry': 'X', 'Price': 10.0 + i,
+             'Market Cap': 1e9, 'RS_6mo': 0.1 * i, 'RS_3mo': 0.0, 'RS_1mo': 0.0, 'RS_Rank_Pct': 50.0,
+             '50DIV': 1.5, 'RS_6mo_SPY': 0.2, 'Sector_ETF': 'XLK'} for i in range(6)]
+
+
+def test_summary_has_only_first_screen_columns(tmp_path):
+    static_dir = str(tmp_path)
+    output_data = {'last_updated': '2026-01-01 00:00:00 UTC', 'total_count': 6, 'data': ScanTable.from_rows(_rows())}
+    payload.write_frontend_payload(output_data, static_dir)
+
+    with open(os.path.join(static_dir, payload.SUMMARY_FILE), 'r', encoding='utf-8') as f:
+        summary = history_store.decode_snapshot(json.load(f), static_dir)
+    assert set(summary['data'][0]) == set(payload.SUMMARY_COLUMNS)
+    assert [row['Ticker'] for row in summary['data']] == [row['Ticker'] for row in _rows()]
+
+    shard_dir = os.path.join(static_dir, payload.SHARD_DIR)
+    with open(os.path.join(shard_dir, "energy.json"), 'r', encoding='utf-8') as f:
+        assert 'RS_6mo_SPY' in json.load(f)['data'][0]
+    assert not [name for name in os.listdir(shard_dir) if name.endswith('.gz')]  # 기본은 압축 파일 없음
+
+
+def test_precompressed_variants_only_when_enabled(tmp_path):
+    static_dir = str(tmp_path)
+    summary = os.path.join(static_dir, payload.SUMMARY_FILE)
+    payload.write_frontend_payload({'data': _rows()}, static_dir, precompress=True)
+    assert os.path.exists(summary + ".gz")
+    assert os.path.exists(os.path.join(static_dir, payload.SHARD_DIR, "energy.json.gz"))
+
+    payload.write_frontend_payload({'data': _rows()}, static_dir)
+
+    assert not os.path.exists(summary + ".gz")
+    assert not os.path.exists(os.path.join(static_dir, payload.SHARD_DIR, "energy.json.gz"))
+
+
+def test_stale_shard_and_precompressed_variants_removed(tmp_path):
+    static_dir = str(tmp_path)
+    payload.write_frontend_payload({'data': _rows()}, static_dir, precompress=True)
+    payload.write_frontend_payload({'data': [r for r in _rows() if r['Sector'] == 'Energy']}, static_dir,
+                                   precompress=True)
+
+    remaining = sorted(os.listdir(os.path.join(static_dir, payload.SHARD_DIR)))
+    assert all(name.startswith('energy.json') for name in remaining)
@@ -0,0 +1,87 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import price_store
+from price_store import PriceStore
+
+
+class _StubScheduler:
+    """download_all 호출 기록 + respond(kwargs)가 돌려준 단일 티커 프레임 반환"""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.calls = []
+
+    def download_all(self, tickers, **kwargs):
+        self.calls.append((list(tickers), kwargs))
+        yield list(tickers), self.respond(kwargs)
+
+
+def _frame(days, end=None, scale=1.0):
+    end = end or pd.Timestamp.utcnow().normalize().tz_localize(None)
+    index = pd.bdate_range(end=end, periods=days)
+    close = pd.Series(range(1, days + 1), index=index, dtype='float64') * scale
+    return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 100.0})
+
+
+def _age_index(store, ticker):
+    """저장 기록을 어제 받은 것처럼 (다음 실행 흉내)"""
+    store.index[ticker]['fetched_on'] = '2000-01-01'
+
+
+def test_force_refetches_ticker_already_updated_today(tmp_path):
+    scheduler = _StubScheduler(lambda kwargs: _frame(30))
+    store = PriceStore(str(tmp_path), scheduler=scheduler)
+
+    store.update(['AAA'])
+    store.update(['AAA'])               # 같은 날 재실행 → 요청 없음
+    assert len(scheduler.calls) == 1
+
+    store.update(['AAA'], force=True)   # 재시도 → 다시 요청
+    assert len(scheduler.calls) == 2
+
+
+def test_incremental_fetch_appends_only_new_bars(tmp_path):
+    full = _frame(60)
+    stored = full.iloc[:-3]
+    responses = iter([stored, full.iloc[-10:]])
+    scheduler = _StubScheduler(lambda kwargs: next(responses))
+    store = PriceStore(str(tmp_path), scheduler=scheduler)
+    store.update(['AAA'])
+    _age_index(store, 'AAA')
+
+    store.update(['AAA'])
+
+    assert 'start' in scheduler.calls[-1][1]
+    assert store.stats['incremental_fetch'] == 1 and store.stats['full_fetch'] == 1
+    pd.testing.assert_frame_equal(store.load('AAA'), full, check_freq=False)
+
+
+def test_split_adjusted_history_triggers_full_refetch(tmp_path):
+    before = _frame(60)
+    after = _frame(62, scale=0.5)  # 2:1 분할 → 과거 종가가 전부 절반으로 재조정
+    responses = iter([before, after.iloc[-10:], after])
+    scheduler = _StubScheduler(lambda kwargs: next(responses))
+    store = PriceStore(str(tmp_path), scheduler=scheduler)
+    store.update(['AAA'])
+    _age_index(store, 'AAA')
+
+    store.update(['AAA'])
+
+    assert store.stats['refetch_on_mismatch'] == 1 and store.stats['full_fetch'] == 2
+    pd.testing.assert_frame_equal(store.load('AAA'), after, check_freq=False)
+
+
+def test_saved_history_is_pruned_to_store_days(tmp_path):
+    scheduler = _StubScheduler(lambda kwargs: _frame(600))
+    store = PriceStore(str(tmp_path), scheduler=scheduler)
+
+    store.update(['AAA'])
+
+    saved = store.load('AAA')
+    assert (saved.index[-1] - saved.index[0]).days < price_store.STORE_DAYS
+    assert len(saved) < 600
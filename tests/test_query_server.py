@@ -0,0 +1,16 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from query_server import ScanIndex
+
+
+def test_sort_mixed_types_puts_text_and_missing_last():
+    rows = [{'Ticker': 'A', 'Market Cap': 'N/A'}, {'Ticker': 'B', 'Market Cap': 5e9},
+            {'Ticker': 'C', 'Market Cap': None}, {'Ticker': 'D', 'Market Cap': 2e9}]
+    index = ScanIndex({'last_updated': 'x', 'wrs_data': [], 'data': rows})
+
+    result = index.query({'sort': 'Market Cap', 'order': 'desc'})
+
+    assert [r['Ticker'] for r in result['data']] == ['B', 'D', 'A', 'C']
@@ -0,0 +1,71 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import remote_csv
+import utils
+
+URL = "https://example.com/sheet.csv"
+
+
+class _Response:
+    def __init__(self, status_code, text='', headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode('utf-8')
+        self.headers = headers or {}
+        self.encoding = None
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class _Session:
+    """응답(또는 예외)을 차례로 돌려주고 요청 헤더를 기록"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests.append(dict(headers or {}))
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def test_conditional_get_reuses_cached_body(tmp_path, monkeypatch):
+    session = _Session(_Response(200, 'AAPL\nMSFT\n', {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jun 2026'}),
+                       _Response(304))
+    monkeypatch.setattr(remote_csv, '_session', session)
+
+    assert remote_csv.fetch_text(URL, str(tmp_path)) == ('AAPL\nMSFT\n', 'fresh')
+    assert remote_csv.fetch_text(URL, str(tmp_path)) == ('AAPL\nMSFT\n', 'not_modified')
+    assert session.requests == [{}, {'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 01 Jun 2026'}]
+
+
+def test_failed_request_falls_back_to_last_body(tmp_path, monkeypatch):
+    monkeypatch.setattr(remote_csv, '_session', _Session(_Response(200, 'AAPL\n'), _Response(503),
+                                                         TimeoutError('timeout')))
+
+    remote_csv.fetch_text(URL, str(tmp_path))
+    assert remote_csv.fetch_text(URL, str(tmp_path)) == ('AAPL\n', 'stale')
+    assert remote_csv.fetch_text(URL, str(tmp_path)) == ('AAPL\n', 'stale')
+
+
+def test_failed_request_without_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(remote_csv, '_session', _Session(TimeoutError('timeout')))
+    assert remote_csv.fetch_text(URL, str(tmp_path)) == (None, 'failed')
+
+
+def test_sheet_tickers_use_last_list_instead_of_stub(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(remote_csv, '_session', _Session(_Response(200, 'lrn\nAAPL\nAAPL\n'),
+                                                         ConnectionError('down'), ConnectionError('down')))
+
+    assert utils.get_tickers_from_google_sheet(URL) == [{'Ticker': 'LRN'}, {'Ticker': 'AAPL'}]
+    assert utils.get_tickers_from_google_sheet(URL) == [{'Ticker': 'LRN'}, {'Ticker': 'AAPL'}]
+    assert utils.get_tickers_from_google_sheet(URL + "?other") == []   # 캐시도 없으면 빈 목록 (임시 10개 목록 없음)
@@ -0,0 +1,85 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metadata
+import replay
+import rs_engine
+import utils
+from price_store import PriceStore
+from sector_cache import SectorCache
+
+BARS = 150
+RATES = [0.001 * (i + 1) for i in range(10)]   # T9가 가장 빨리 오름 → 모든 날짜에서 RS 1위
+
+
+def _setup(tmp_path):
+    index = pd.bdate_range(end='2026-06-30', periods=BARS)
+    store = PriceStore(str(tmp_path / 'prices'), offline=True)
+    store._save('QQQ', pd.DataFrame({'Close': 100.0}, index=index), '2026-06-30')
+    for i, rate in enumerate(RATES):
+        close = 100.0 * (1 + rate) ** np.arange(BARS)
+        store._save(f"T{i}", pd.DataFrame({'Close': close}, index=index), '2026-06-30')
+
+    cache = SectorCache(str(tmp_path / 'sector_search.json'))
+    for i in range(10):
+        industry = ('Energy', 'Oil') if i < 5 else ('Technology', 'Software')
+        cache[f"T{i}"] = {'Sector': industry[0], 'Industry': industry[1], 'Shares': 1_000_000}
+    return store, cache, [{'Ticker': f"T{i}"} for i in range(10)]
+
+
+def test_cohort_stats_measure_forward_excess_return(tmp_path):
+    store, cache, universe = _setup(tmp_path)
+    run = replay.Replay(universe, store, windows=[5, 10], sector_cache=cache).build()
+    dates = run.dates()
+
+    stats = run.cohort_stats(dates, top_pct=10, horizons=[5])
+
+    assert list(stats) == ['5d', '10d'] and len(dates) == BARS - 10
+    cohort = (1 + RATES[-1]) ** 5 - 1
+    average = np.mean([(1 + r) ** 5 - 1 for r in RATES])
+    s = stats['10d']['5d']
+    assert s['days'] == len(dates) - 5                 # 마지막 5일은 향후 수익률 없음
+    assert s['cohort'] == pytest.approx(cohort, abs=1e-6)
+    assert s['universe'] == pytest.approx(average, abs=1e-6)
+    assert s['excess'] == pytest.approx(cohort - average, abs=1e-6)
+    assert s['benchmark'] == 0.0
+    assert s['hit_rate'] == 1.0 and s['avg_cohort_size'] == 1.0
+
+
+def test_industry_median_and_top_industries(tmp_path):
+    store, cache, universe = _setup(tmp_path)
+    run = replay.Replay(universe, store, windows=[5, 10], sector_cache=cache).build()
+    last = run.dates()[-1]
+
+    expected = np.median([(1 + r) ** 10 - 1 for r in RATES[5:]])
+    assert run.industry_md.loc[last, ('Technology', 'Software')] == pytest.approx(expected)
+    assert run.top_industries([last], k=1) == {'2026-06-30': ['Technology / Software']}
+
+
+def test_rows_for_matches_daily_pipeline(tmp_path):
+    store, cache, universe = _setup(tmp_path)
+    run = replay.Replay(universe, store, sector_cache=cache).build()
+    last = run.dates()[-1]
+
+    rows = {row['Ticker']: row for row in run.rows_for(last)}
+    batch = store.get_batch([item['Ticker'] for item in universe], refresh=False)
+    expected = rs_engine.compute_rs_frame(rs_engine.extract_close_matrix(batch), store.window('QQQ')['Close'])
+
+    for ticker, row in rows.items():
+        for column in ['Price', 'RS_6mo', 'RS_3mo', 'RS_1mo', '50DIV']:
+            assert row[column] == pytest.approx(expected.loc[ticker, column])
+    assert rows['T9'][metadata.MARKET_CAP_VALUE] == pytest.approx(rows['T9']['Price'] * 1_000_000)
+    assert utils.rank_percentiles([rows[t]['RS_6mo'] for t in rows])[-1] == run.rank['6mo'].loc[last, 'T9']
+
+
+def test_rows_for_requires_default_windows(tmp_path):
+    store, cache, universe = _setup(tmp_path)
+    run = replay.Replay(universe, store, windows=[5, 10], sector_cache=cache).build()
+    with pytest.raises(ValueError):
+        run.rows_for(run.dates()[-1])
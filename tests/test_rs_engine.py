@@ -0,0 +1,111 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rs_engine
+from scan_table import ScanTable
+
+WINDOWS = {'1mo': 2, '3mo': 4, '6mo': 6}
+
+
+def _close():
+    index = pd.bdate_range('2026-01-01', periods=8)
+    return pd.DataFrame({
+        'AAA': [10, 11, 12, 13, 14, 15, 16, 17],
+        'BBB': [20, 19, 18, 17, 16, 15, 14, 13],
+        'ZERO': [0, 0, 1, 2, 3, 4, 5, 6],
+        'SHORT': [np.nan] * 4 + [5, 6, 7, 8],
+    }, index=index, dtype='float64')
+
+
+def _calc_return(series, window):
+    """기존 티커별 calc_return (마지막 행 vs window+1번째 전 행)"""
+    prev, last = series.iloc[-(window + 1)], series.iloc[-1]
+    return 0.0 if prev == 0 else (last - prev) / prev
+
+
+def test_window_returns_match_per_ticker_calculation():
+    close = _close()
+    returns = rs_engine.compute_window_returns(close, WINDOWS)
+
+    for ticker in ['AAA', 'BBB', 'ZERO']:
+        for label, window in WINDOWS.items():
+            assert returns.loc[ticker, label] == pytest.approx(_calc_return(close[ticker], window))
+    assert returns.loc['SHORT', '1mo'] == pytest.approx(2 / 6)
+    assert np.isnan(returns.loc['SHORT', '6mo'])    # 기준 행이 NaN
+
+
+def test_rs_frame_subtracts_benchmark_once_for_all_tickers():
+    close = _close()
+    bench = pd.Series(np.linspace(100, 107, 8), index=close.index)
+
+    frame = rs_engine.compute_rs_frame(close, bench, WINDOWS)
+
+    assert list(frame.columns) == ['Price', 'RS_6mo', 'RS_3mo', 'RS_1mo', '50DIV']
+    bench_6mo = _calc_return(bench, 6)
+    assert frame.loc['AAA', 'RS_6mo'] == pytest.approx(_calc_return(close['AAA'], 6) - bench_6mo)
+    assert frame.loc['BBB', 'Price'] == 13.0
+    assert frame['50DIV'].isna().all()    # 50일보다 짧은 이력
+
+
+def test_short_benchmark_counts_as_zero_return():
+    close = _close()
+    frame = rs_engine.compute_rs_frame(close, close['AAA'].iloc[-3:], WINDOWS)
+    assert frame.loc['AAA', 'RS_1mo'] == pytest.approx(_calc_return(close['AAA'], 2))
+
+
+def test_ma_divergence_percent():
+    close = pd.DataFrame({'AAA': [10.0] * 49 + [15.0]})
+    assert rs_engine.compute_ma_divergence(close)['AAA'] == pytest.approx(round((15 - 10.1) / 10.1 * 100, 2))
+
+
+def test_field_matrix_from_multiindex_and_single_ticker_download():
+    index = pd.bdate_range('2026-01-01', periods=3)
+    multi = pd.concat({'AAA': pd.DataFrame({'Close': [1.0, 2.0, 3.0], 'Volume': 1.0}, index=index),
+                       'BBB': pd.DataFrame({'Close': [4.0, 5.0, 6.0], 'Volume': 1.0}, index=index)}, axis=1)
+    single = pd.DataFrame({'Close': [1.0, 2.0, 3.0]}, index=index)
+
+    assert list(rs_engine.extract_close_matrix(multi).columns) == ['AAA', 'BBB']
+    assert list(rs_engine.extract_close_matrix(single, ['AAA']).columns) == ['AAA']
+    assert rs_engine.extract_field_matrix(single, 'High', ['AAA']).empty
+
+
+def test_extra_benchmarks_reuse_stock_returns():
+    close = _close()
+    spy = pd.Series(np.linspace(50, 60, 8), index=close.index)
+    extra = {'SPY': rs_engine.compute_benchmark_returns(spy, WINDOWS)}
+
+    frame = rs_engine.compute_rs_frame(close, None, WINDOWS, extra_returns=extra)
+
+    assert list(frame.columns[5:]) == ['RS_6mo_SPY', 'RS_3mo_SPY', 'RS_1mo_SPY']
+    for label, window in WINDOWS.items():
+        expected = _calc_return(close['AAA'], window) - _calc_return(spy, window)
+        assert frame.loc['AAA', f'RS_{label}_SPY'] == pytest.approx(expected)
+
+
+def test_sector_rs_from_primary_rs_without_prices():
+    primary = {'6mo': 0.10, '3mo': 0.05, '1mo': 0.01}
+    etf_returns = {'XLE': {'6mo': 0.30, '3mo': 0.00, '1mo': -0.02}}
+    results = ScanTable.from_rows([
+        {'Ticker': 'AAA', 'Sector': 'Energy', 'RS_6mo': 0.2, 'RS_3mo': 0.1, 'RS_1mo': None},
+        {'Ticker': 'BBB', 'Sector': 'Technology', 'RS_6mo': 0.2, 'RS_3mo': 0.1, 'RS_1mo': 0.0},   # XLK 수익률 없음
+        {'Ticker': 'CCC', 'Sector': 'N/A', 'RS_6mo': 0.2, 'RS_3mo': 0.1, 'RS_1mo': 0.0},
+    ])
+
+    rs_engine.attach_sector_rs(results, primary, etf_returns, windows=WINDOWS)
+
+    assert results.column('Sector_ETF') == ['XLE', 'XLK', None]
+    assert results.column('RS_6mo_Sector')[0] == pytest.approx(0.2 + 0.10 - 0.30)   # 종목 수익률 - XLE 수익률
+    assert results.column('RS_1mo_Sector') == [None, None, None]
+    assert results.column('RS_3mo_Sector')[1:] == [None, None]
+
+
+def test_benchmark_tickers_are_unique_and_primary_first():
+    tickers = rs_engine.benchmark_tickers()
+    assert tickers[0] == rs_engine.PRIMARY_BENCHMARK
+    assert len(tickers) == len(set(tickers)) and set(rs_engine.SECTOR_ETFS.values()) <= set(tickers)
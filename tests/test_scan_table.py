@@ -0,0 +1,83 @@
+import io
+import json
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scan_table
+from scan_table import ScanTable
+
+
+def _rows():
+    return [
+        {'Ticker': 'AAA', 'Price': 10.5, 'RS_6mo': None, 'Sector': 'Energy', 'RS_Line_New_High': True,
+         'Market Cap': '1.50B'},
+        {'Ticker': 'BBB', 'Price': float('nan'), 'RS_6mo': -0.25, 'Sector': 'Energy', 'RS_Line_New_High': None,
+         'Market Cap': 'N/A'},
+        {'Ticker': 'CCC', 'Price': 3.0, 'RS_6mo': 0.5, 'Sector': None, 'RS_Line_New_High': False,
+         'Market Cap': '0.20B', 'Extra': 'late column'},
+    ]
+
+
+def _same(a, b):
+    """NaN끼리도 같다고 보는 행 비교"""
+    return json.dumps(a, sort_keys=True) == json.dumps(b, sort_keys=True)
+
+
+def test_rows_round_trip_with_none_nan_and_flags():
+    table = ScanTable.from_rows(_rows())
+
+    expected = [dict({k: None for k in table.columns}, **row) for row in _rows()]   # 없던 컬럼은 None
+    assert _same(list(table), expected)
+    assert table.column('RS_Line_New_High') == [True, None, False]
+    assert table.column('RS_6mo')[0] is None and math.isnan(table.column('Price')[1])
+    assert table.columns[-1] == 'Extra'
+
+
+def test_same_ticker_replaces_row_in_place():
+    table = ScanTable.from_rows(_rows())
+    table.append({'Ticker': 'BBB', 'Price': 7.0})
+
+    assert len(table) == 3 and table.tickers == ['AAA', 'BBB', 'CCC']
+    assert table.get_row('BBB')['Price'] == 7.0 and table.get_row('BBB')['RS_6mo'] is None
+
+
+def test_mixed_values_switch_column_to_objects():
+    table = ScanTable.from_rows([{'Ticker': 'A', 'Value': 1.5}, {'Ticker': 'B', 'Value': 'N/A'}])
+    assert table.column('Value') == [1.5, 'N/A']
+
+
+def test_reorder_select_and_subset():
+    table = ScanTable.from_rows(_rows())
+
+    assert ScanTable.from_rows(_rows()).reorder(['CCC', 'ZZZ', 'AAA']).tickers == ['CCC', 'AAA']
+    assert table.select(['CCC', 'AAA']).tickers == ['CCC', 'AAA']
+    assert table.subset(['Ticker', 'Price', 'Nope']).columns == ['Ticker', 'Price']
+    assert table.get_row('CCC')['Sector'] is None
+
+
+def test_dump_load_round_trip():
+    table = ScanTable.from_rows(_rows())
+    buffer = io.StringIO()
+    table.dump(buffer)
+
+    loaded = ScanTable.load(json.loads(buffer.getvalue()))
+    assert loaded.columns == table.columns
+    assert _same(list(loaded), list(table))
+    assert _same(list(ScanTable.load(_rows())), list(table))
+
+
+def test_iter_json_matches_json_dumps():
+    table = ScanTable.from_rows([row for row in _rows() if row['Ticker'] != 'BBB'])   # NaN 없는 행
+    obj = {'last_updated': '2026-01-02', 'wrs_data': [{'Sector': '에너지'}], 'data': table}
+
+    text = ''.join(scan_table.iter_json(obj))
+    assert text == json.dumps(dict(obj, data=list(table)), ensure_ascii=False, separators=(',', ':'))
+
+
+def test_to_frame_uses_float64_for_float_columns():
+    frame = ScanTable.from_rows(_rows()).to_frame(['Ticker', 'RS_6mo', 'Missing'])
+    assert str(frame['RS_6mo'].dtype) == 'float64' and frame['RS_6mo'].isna().tolist() == [True, False, False]
+    assert frame['Missing'].isna().all()
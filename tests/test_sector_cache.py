@@ -0,0 +1,89 @@
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sector_cache import SectorCache
+
+
+def test_save_round_trip_one_line_per_ticker(tmp_path):
+    path = str(tmp_path / 'sector_search.json')
+    cache = SectorCache(path)
+    cache['BBB'] = {'Sector': 'Energy', 'Industry': 'Oil', 'Shares': 10}
+    cache['AAA'] = {'Sector': 'Technology', 'Industry': 'Software'}
+
+    assert cache.save()
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert lines[1].startswith('"AAA":') and lines[2].startswith('"BBB":') and len(lines) == 4
+    assert dict(SectorCache(path).items()) == dict(cache.items())
+
+
+def test_save_skips_unchanged_cache(tmp_path):
+    path = str(tmp_path / 'sector_search.json')
+    cache = SectorCache(path)
+    cache['AAA'] = {'Sector': 'Energy'}
+    cache.save()
+
+    reloaded = SectorCache(path)
+    reloaded['AAA'] = {'Sector': 'Energy'}   # 같은 값 → 변경 아님
+    assert not reloaded.dirty
+    assert not reloaded.save()
+
+
+def test_failed_save_keeps_previous_file(tmp_path):
+    path = str(tmp_path / 'sector_search.json')
+    cache = SectorCache(path)
+    cache['AAA'] = {'Sector': 'Energy'}
+    cache.save()
+
+    cache['BBB'] = {'Sector': object()}      # 직렬화 실패
+    with pytest.raises(TypeError):
+        cache.save()
+
+    with open(path, 'r', encoding='utf-8') as f:
+        assert json.load(f) == {'AAA': {'Sector': 'Energy'}}
+    assert os.listdir(str(tmp_path)) == ['sector_search.json']   # 임시 파일도 남지 않음
+
+
+def test_corrupt_file_loads_as_empty(tmp_path):
+    path = tmp_path / 'sector_search.json'
+    path.write_text('{"AAA": ', encoding='utf-8')
+    assert len(SectorCache(str(path))) == 0
+
+
+def test_counts_hits_and_misses_but_not_peeks(tmp_path):
+    cache = SectorCache(str(tmp_path / 'sector_search.json'))
+    cache['AAA'] = {'Sector': 'Energy'}
+
+    cache.get('AAA')
+    cache.get('ZZZ')
+    cache.peek('AAA')
+    cache.peek('ZZZ')
+
+    assert (cache.hits, cache.misses) == (1, 1)
+    entry = cache.get('AAA')
+    entry['Sector'] = 'changed'               # 돌려준 dict를 고쳐도 캐시는 그대로
+    assert cache.peek('AAA') == {'Sector': 'Energy'}
+
+
+def test_concurrent_writes(tmp_path):
+    cache = SectorCache(str(tmp_path / 'sector_search.json'))
+
+    def worker(k):
+        for i in range(200):
+            cache[f"T{k}_{i}"] = {'Shares': i}
+
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(cache) == 800
+    cache.save()
+    assert len(SectorCache(cache.path)) == 800
@@ -0,0 +1,42 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import universes
+
+
+def test_load_config_rejects_duplicate_names(tmp_path):
+    path = tmp_path / 'universes.json'
+    path.write_text(json.dumps({'universes': [{'name': 'a'}, {'name': 'b'}, {'name': 'a'}]}), encoding='utf-8')
+    with pytest.raises(ValueError):
+        universes.load_config(str(path))
+
+
+def test_ticker_and_csv_sources_are_normalized(tmp_path):
+    csv = tmp_path / 'sp.csv'
+    csv.write_text('Name,Symbol\nApple,aapl\nNvidia, NVDA \nDup,AAPL\nBlank,\n', encoding='utf-8')
+
+    assert universes.load_universe({'name': 'w', 'source': 'tickers', 'tickers': ['msft', ' ', 'MSFT', 'nan']}) == \
+        [{'Ticker': 'MSFT'}]
+    assert universes.load_universe({'name': 'sp', 'source': 'csv', 'path': str(csv), 'column': 'Symbol'}) == \
+        [{'Ticker': 'AAPL'}, {'Ticker': 'NVDA'}]
+    assert universes.load_universe({'name': 'x', 'source': 'ftp'}) == []
+    assert universes.load_universe({'name': 'y', 'source': 'csv', 'path': str(tmp_path / 'missing.csv')}) == []
+
+
+def test_merge_keeps_first_occurrence_order():
+    merged = universes.merge_universes([[{'Ticker': 'A'}, {'Ticker': 'B'}], [{'Ticker': 'C'}, {'Ticker': 'A'}]])
+    assert [item['Ticker'] for item in merged] == ['A', 'B', 'C']
+
+
+def test_diff_snapshot_reports_added_and_removed(tmp_path):
+    snapshot_dir = str(tmp_path)
+    first = universes.diff_snapshot('w', [{'Ticker': 'A'}, {'Ticker': 'B'}], snapshot_dir)
+    second = universes.diff_snapshot('w', [{'Ticker': 'B'}, {'Ticker': 'C'}], snapshot_dir)
+
+    assert first == {'previous': None, 'added': ['A', 'B'], 'removed': []}
+    assert second['added'] == ['C'] and second['removed'] == ['A'] and second['previous'] is not None
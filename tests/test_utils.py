@@ -0,0 +1,103 @@
+import json
+import os
+import random
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+
+
+def test_min_ranks_match_per_item_percentile_rank():
+    rng = random.Random(7)
+    values = [rng.choice([None, float('nan')]) if i % 9 == 0 else round(rng.uniform(-1, 1), 1) for i in range(200)]
+    clean = [v for v in values if v == v]
+
+    ranks = utils.rank_percentiles(values)
+
+    for value, rank in zip(values, ranks):
+        if value is None or value != value:
+            assert rank is None
+        else:
+            assert rank == utils.calculate_percentile_rank(value, clean)
+
+
+@pytest.mark.parametrize('method, expected', [
+    ('min', [25.0, 50.0, 50.0, 100.0]),
+    ('average', [25.0, 62.5, 62.5, 100.0]),
+    ('dense', [33.33, 66.67, 66.67, 100.0]),
+])
+def test_tie_methods(method, expected):
+    assert utils.rank_percentiles([3, 2, 2, 1], method) == expected
+
+
+def test_unknown_method_and_all_missing():
+    with pytest.raises(ValueError):
+        utils.rank_percentiles([1], 'max')
+    assert utils.rank_percentiles([None, float('nan')]) == [None, None]
+
+
+def test_rank_within_groups():
+    ranks = utils.rank_percentiles_by_group([1, 2, 3, 4, 5], ['A', 'B', 'A', 'B', None])
+    assert ranks == [100.0, 100.0, 50.0, 50.0, None]
+
+
+def _series(bars, end='2026-06-30', missing_tail=0):
+    index = pd.bdate_range(end=end, periods=bars)
+    values = [100.0 + i for i in range(bars)]
+    return pd.Series(values[:bars - missing_tail] + [np.nan] * missing_tail, index=index)
+
+
+REFERENCE = pd.Timestamp('2026-06-30')
+
+
+@pytest.mark.parametrize('series, fetch_reason, expected', [
+    (_series(200), None, None),
+    (None, None, 'no_data'),
+    (None, 'transient', 'transient'),                      # 다운로드 자체 실패 → 재시도
+    (pd.Series([np.nan] * 5, dtype='float64'), None, 'no_data'),
+    (_series(200, missing_tail=2), None, 'transient'),     # 최근 봉 몇 개만 빠짐
+    (_series(200, end='2026-05-01'), None, 'delisted'),
+    (_series(60), None, 'short_history'),
+])
+def test_classify_failure(series, fetch_reason, expected):
+    assert utils.classify_failure(series, REFERENCE, fetch_reason) == expected
+
+
+def test_process_batch_records_and_clears_failures():
+    index = pd.bdate_range(end=REFERENCE, periods=200)
+    frames = {'BRK-B': _series(200), 'NEW': _series(30), 'OLD': _series(200, end='2026-03-02').reindex(index)}
+    batch = pd.concat({t: pd.DataFrame({'Close': s}) for t, s in frames.items()}, axis=1)
+    failures = {'BRK.B': 'transient'}
+
+    rows = utils.process_batch(['BRK.B', 'NEW', 'OLD', 'GONE'], batch, _series(200), failures,
+                               fetch_failures={'GONE': 'transient'})
+
+    assert failures == {'NEW': 'short_history', 'OLD': 'delisted', 'GONE': 'transient'}
+    assert [row['Ticker'] for row in rows] == ['BRK.B', 'NEW', 'OLD']   # 원래 티커 이름으로 반환
+    assert rows[0]['Market Cap'] == 'N/A' and rows[0]['Price'] == 299.0
+
+
+IMPORT_PROBE = """
+import json, sys, warnings
+filters = list(warnings.filters)
+import {module}
+heavy = [m for m in ('pandas', 'numpy', 'requests', 'yfinance', 'rs_engine', 'price_store', 'indicators')
+         if m in sys.modules]
+import utils
+print(json.dumps({{'heavy': heavy, 'filters_changed': warnings.filters != filters,
+                  'cache_loaded': utils.SECTOR_CACHE._data is not None}}))
+"""
+
+
+@pytest.mark.parametrize('module', ['utils', 'fetch_and_save'])
+def test_import_has_no_heavy_dependencies_or_side_effects(module, tmp_path):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, '-c', IMPORT_PROBE.format(module=module)], cwd=str(tmp_path),
+                         env=dict(os.environ, PYTHONPATH=root), capture_output=True, text=True, check=True)
+    assert json.loads(out.stdout) == {'heavy': [], 'filters_changed': False, 'cache_loaded': False}
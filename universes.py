@@ -0,0 +1,112 @@
+import io
+import json
+import os
+from datetime import datetime
+
+import remote_csv
+import utils
+
+# 여러 유니버스(티커 목록) 설정
+# universes.json 예시 (universes.example.json 참고):
+#   {"universes": [
+#       {"name": "sheet", "source": "sheet", "url": "<구글 시트 CSV URL>", "output_dir": "static"},
+#       {"name": "sp500", "source": "csv", "path": "universes/sp500.csv", "column": "Symbol"},
+#       {"name": "watchlist", "source": "tickers", "tickers": ["AAPL", "NVDA"]}
+#   ]}
+# - source: sheet(구글 시트 CSV, A열) / csv(url 또는 path, column 컬럼) / tickers(직접 나열)
+# - output_dir: 결과 폴더 (기본 static/universes/<name>)
+UNIVERSE_CONFIG = "universes.json"
+UNIVERSE_OUTPUT_ROOT = "static/universes"
+UNIVERSE_CACHE_ROOT = "cache/history"  # 유니버스별 히스토리 행렬 캐시 (cache/history/<name>)
+SNAPSHOT_DIR = "cache/universes"        # 유니버스별 직전 티커 목록 (전날 대비 편입/제외 비교)
+
+
+def load_config(path=UNIVERSE_CONFIG):
+    """설정 파일 → 유니버스 스펙 리스트 (이름 중복 불가)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        specs = json.load(f).get('universes', [])
+    names = [spec['name'] for spec in specs]
+    duplicated = {n for n in names if names.count(n) > 1}
+    if duplicated:
+        raise ValueError(f"유니버스 이름 중복: {', '.join(sorted(duplicated))}")
+    return specs
+
+
+def _normalize(tickers):
+    """공백 제거, 대문자, 중복 제거 (순서 유지) → [{'Ticker': ...}]"""
+    cleaned = [str(t).strip().upper() for t in tickers if str(t).strip() and str(t).lower() != 'nan']
+    return [{'Ticker': t} for t in dict.fromkeys(cleaned)]
+
+
+def load_universe(spec):
+    """유니버스 스펙 하나 → ticker_info_list (실패하면 빈 리스트)"""
+    import pandas as pd
+
+    source = spec.get('source', 'tickers')
+    try:
+        if source == 'sheet':
+            return utils.get_tickers_from_google_sheet(spec['url'])
+        if source == 'csv':
+            if spec.get('url'):
+                text, _ = remote_csv.fetch_text(spec['url'])  # 조건부 요청, 실패 시 마지막으로 받은 본문
+                if text is None:
+                    return []
+                df = pd.read_csv(io.StringIO(text))
+            else:
+                df = pd.read_csv(spec['path'])
+            column = spec.get('column') or df.columns[0]
+            return _normalize(df[column].dropna().tolist())
+        if source == 'tickers':
+            return _normalize(spec.get('tickers', []))
+        raise ValueError(f"알 수 없는 source: {source}")
+    except Exception as e:
+        print(f"유니버스 로드 에러 ({spec.get('name')}): {e}")
+        return []
+
+
+def output_dir(spec):
+    return spec.get('output_dir') or os.path.join(UNIVERSE_OUTPUT_ROOT, spec['name'])
+
+
+def history_cache_dir(spec):
+    return os.path.join(UNIVERSE_CACHE_ROOT, spec['name'])
+
+
+def merge_universes(ticker_lists):
+    """여러 유니버스의 합집합 (겹치는 티커는 한 번만, 처음 나온 순서 유지)"""
+    merged = {}
+    for ticker_info_list in ticker_lists:
+        for item in ticker_info_list:
+            merged.setdefault(item['Ticker'], item)
+    return list(merged.values())
+
+
+def diff_snapshot(name, ticker_info_list, snapshot_dir=SNAPSHOT_DIR):
+    """
+    직전 실행의 티커 목록과 비교해 편입/제외 티커를 구하고 오늘 목록으로 교체합니다.
+    반환값: {'previous': 직전 날짜 또는 None, 'added': [...], 'removed': [...]}
+    (직전 목록이 없으면 전부 added)
+    """
+    tickers = [item['Ticker'] for item in ticker_info_list]
+    path = os.path.join(snapshot_dir, f"{name}.json")
+    previous = {}
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            previous = {}
+    old = set(previous.get('tickers', []))
+    current = set(tickers)
+    diff = {
+        'previous': previous.get('date'),
+        'added': [t for t in tickers if t not in old],
+        'removed': sorted(old - current),
+    }
+
+    os.makedirs(snapshot_dir, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'date': datetime.utcnow().strftime('%Y-%m-%d'), 'tickers': tickers}, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    return diff
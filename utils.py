@@ -1,21 +1,26 @@
-import pandas as pd
-import requests
-import yfinance as yf
 import time
 import io
+import json
 import warnings
-from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
 
-# 경고 메시지 숨김 (Pyarrow 등)
-warnings.filterwarnings("ignore", category=DeprecationWarning)
-warnings.filterwarnings("ignore", category=FutureWarning)
+import remote_csv
+from scan_table import ScanTable
+from sector_cache import SectorCache
+from metrics import METRICS, hit_rate
 
-import json
-import os
+# pandas/requests/rs_engine/price_store는 쓰는 함수 안에서 import (yfinance는 다운로드 시점에)
+# → 티커 변환, 순위 계산 같은 가벼운 함수만 쓰는 스크립트는 import 비용이 거의 없음
 
-# 전역 캐시 변수
+# 전역 캐시 (처음 접근할 때 로드됨, load_sector_cache()로 명시적 로드)
 SECTOR_CACHE_FILE = "static/sector_search.json"
-SECTOR_CACHE = {}
+SECTOR_CACHE = SectorCache(SECTOR_CACHE_FILE)
+
+# 실패 티커 재시도/리포트
+FAILURE_REPORT_FILE = "static/failures.json"
+DELISTED_LAG_DAYS = 10      # 마지막 봉이 기준일(QQQ 최신일)보다 이만큼(달력일) 넘게 오래되면 상장폐지/거래정지로 분류
+RETRY_ROUNDS = 3            # 일시적 실패 재시도 횟수
+RETRY_BACKOFF_SECONDS = 2   # 재시도 대기 (2, 4, 8초 ...)
 
 def sanitize_ticker_for_yf(ticker):
     """
@@ -31,30 +36,21 @@ def sanitize_ticker_for_yf(ticker):
         return ticker.replace('.', '-')
     return ticker
 
+def quiet_warnings():
+    """경고 메시지 숨김 (Pyarrow 등) - import 시점이 아니라 실행 스크립트 시작 시 호출"""
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+    warnings.filterwarnings("ignore", category=FutureWarning)
+
 def load_sector_cache():
-    global SECTOR_CACHE
-    if os.path.exists(SECTOR_CACHE_FILE):
-        try:
-            with open(SECTOR_CACHE_FILE, 'r', encoding='utf-8') as f:
-                SECTOR_CACHE = json.load(f)
-            print(f"Sector Cache Loaded: {len(SECTOR_CACHE)} items")
-        except Exception as e:
-            print(f"Cache Load Error: {e}")
-            SECTOR_CACHE = {}
+    SECTOR_CACHE.load()
 
 def save_sector_cache():
     try:
-        if not os.path.exists('static'):
-            os.makedirs('static')
-        with open(SECTOR_CACHE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(SECTOR_CACHE, f, ensure_ascii=False, indent=2)
-        print(f"Sector Cache Saved: {len(SECTOR_CACHE)} items")
+        if SECTOR_CACHE.save():
+            print(f"Sector Cache Saved: {len(SECTOR_CACHE)} items")
     except Exception as e:
         print(f"Cache Save Error: {e}")
 
-# 초기 로드
-load_sector_cache()
-
 def calculate_percentile_rank(value, all_values):
     """
     퍼센타일 순위 계산 (값이 클수록 순위가 높음, top X% 반환)
@@ -71,22 +67,92 @@ def calculate_percentile_rank(value, all_values):
     except ValueError:
         return None
 
+def _is_missing(value):
+    """None / NaN 판별 (NaN은 자기 자신과 같지 않음)"""
+    return value is None or value != value
+
+def rank_percentiles(values, method='min'):
+    """
+    값 리스트 전체의 퍼센타일 순위를 정렬 한 번(O(n log n))으로 계산합니다.
+    calculate_percentile_rank와 같은 기준 (값이 클수록 상위, top X% 반환)
+
+    동점 처리(method):
+    - 'min': 동점은 가장 좋은 순위 공유 (기존 calculate_percentile_rank와 동일)
+    - 'average': 동점 순위의 평균
+    - 'dense': 동점을 한 순위로 묶고 다음 값은 바로 다음 순위 (분모는 고유값 개수)
+    None/NaN은 순위 계산에서 빠지고 결과도 None입니다.
+    반환값: 입력 순서와 같은 길이의 리스트
+    """
+    if method not in ('min', 'average', 'dense'):
+        raise ValueError(f"지원하지 않는 method: {method}")
+
+    values = list(values)
+    result = [None] * len(values)
+    valid_idx = [i for i, v in enumerate(values) if not _is_missing(v)]
+    if not valid_idx:
+        return result
+
+    order = sorted(valid_idx, key=lambda i: values[i], reverse=True)
+    n = len(order)
+    distinct = 0
+    pos = 0
+    ranks = {}
+    while pos < n:
+        # 같은 값 구간 [pos, end)
+        end = pos + 1
+        while end < n and values[order[end]] == values[order[pos]]:
+            end += 1
+        distinct += 1
+        if method == 'min':
+            rank = pos + 1
+        elif method == 'average':
+            rank = (pos + 1 + end) / 2
+        else:
+            rank = distinct
+        for k in range(pos, end):
+            ranks[order[k]] = rank
+        pos = end
+
+    denominator = distinct if method == 'dense' else n
+    for i, rank in ranks.items():
+        result[i] = round((rank / denominator) * 100, 2)
+    return result
+
+def rank_percentiles_by_group(values, groups, method='min'):
+    """
+    그룹(예: Sector) 안에서의 퍼센타일 순위를 계산합니다.
+    그룹 키가 None/NaN인 항목은 결과도 None입니다.
+    반환값: 입력 순서와 같은 길이의 리스트
+    """
+    values = list(values)
+    members = {}
+    for i, g in enumerate(groups):
+        if _is_missing(g):
+            continue
+        members.setdefault(g, []).append(i)
+
+    result = [None] * len(values)
+    for idx in members.values():
+        for i, pct in zip(idx, rank_percentiles([values[i] for i in idx], method)):
+            result[i] = pct
+    return result
+
 def get_market_condition_from_sheet():
     """
     구글 시트의 특정 셀(A1)에서 Market Condition 텍스트 읽기
+    (remote_csv: 공유 세션 + 조건부 요청, 실패 시 마지막으로 받은 값)
     """
+    import pandas as pd
+
     try:
         # gid 파라미터를 포함한 CSV export URL
         url = "https://docs.google.com/spreadsheets/d/17JU4KoC-Out5NqGy3qtN7LSunMUsH5xS2qJSk1fBDGQ/export?format=csv&gid=1044365555"
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        
-        # UTF-8 인코딩 명시 (한글 깨짐 방지)
-        response.encoding = 'utf-8'
+        text, _ = remote_csv.fetch_text(url)
+        if text is None:
+            return "N/A"
         
         # CSV 첫 줄, 첫 컬럼 읽기
-        csv_data = io.StringIO(response.text)
-        df = pd.read_csv(csv_data, header=None, encoding='utf-8')
+        df = pd.read_csv(io.StringIO(text), header=None)
         
         if not df.empty and len(df.columns) > 0:
             market_condition = str(df.iloc[0, 0]).strip()
@@ -100,15 +166,22 @@ def get_tickers_from_google_sheet(url):
     """
     구글 시트 CSV URL에서 티커 목록을 가져옵니다.
     A열에 티커가 있다고 가정합니다.
+    시트는 cache/sheets/에 캐시하고 조건부 요청(ETag/Last-Modified)으로 받으며,
+    요청이 실패하면 마지막으로 받은 목록을 사용합니다. 둘 다 없으면 빈 리스트.
     """
+    import pandas as pd
+
     try:
-        response = requests.get(url)
-        response.raise_for_status()
+        text, status = remote_csv.fetch_text(url)
+        if text is None:
+            return []
+        if status != 'fresh':
+            print(f"티커 시트: {'변경 없음 (캐시 사용)' if status == 'not_modified' else '마지막으로 받은 목록 사용'}")
         
         # CSV 데이터를 pandas DataFrame으로 읽기 (헤더 없음 가정)
         # 만약 첫 줄이 티커라면 header=None을 써야 함.
         # 사용자가 "A 열에서 티커를 긁어다가"라고 했고, 확인 결과 첫 줄부터 티커임 (LRN)
-        df = pd.read_csv(io.StringIO(response.text), header=None)
+        df = pd.read_csv(io.StringIO(text), header=None)
         
         # 첫 번째 컬럼을 티커로 간주
         if df.empty:
@@ -131,6 +204,8 @@ def get_tickers_from_excel(file_path):
     """
     레거시 호환성을 위한 엑셀 읽기 함수 (현재는 사용되지 않을 수 있음)
     """
+    import pandas as pd
+
     try:
         df = pd.read_excel(file_path, sheet_name=0)
         tickers = df.iloc[:, 0].dropna().tolist() # 첫 번째 컬럼
@@ -139,271 +214,320 @@ def get_tickers_from_excel(file_path):
         print(f"엑셀 로드 에러: {e}")
         return []
 
-def get_market_cap_and_rs(ticker_info_list, batch_size=20):
+def get_market_cap_and_rs(ticker_info_list, batch_size=20, price_store=None, offline=False, checkpoint=None,
+                          new_tickers=None, workers=None):
     """
     티커 리스트를 받아 Market Cap과 RS를 계산합니다.
-    20개씩 배치로 처리하여 yfinance 부하를 조절합니다.
+    가격 다운로드는 FetchScheduler(동시 배치 + 요청 제한)가 맡고, 계산/메타데이터 조회는 batch_size개씩 처리합니다.
+    RS/50DIV는 배치 종가 행렬 전체를 rs_engine으로 한 번에 계산합니다.
+    가격은 PriceStore에서 증분으로 갱신하며, offline=True면 네트워크 없이 로컬 데이터만 사용합니다.
+    RS는 기본 벤치마크(QQQ) 외에 추가 벤치마크(RS_6mo_SPY 등)와 섹터 ETF(RS_6mo_Sector)에 대해서도 계산합니다.
+    checkpoint(RunCheckpoint)가 주어지면 끝난 배치/단계 결과를 저장하고, 재실행 시 저장된 결과를 재사용합니다.
+    new_tickers(전날 대비 새로 편입된 티커)는 메타데이터를 먼저 조회합니다.
+    workers: 가격 계산 프로세스 수 (parallel_compute 참고)
+    반환값: ScanTable (결과 행을 컬럼형으로, 유니버스 순서)
     """
-    results = []
-    total_tickers = len(ticker_info_list)
+    import metadata
+    import rs_engine
+    from price_store import PriceStore
+
+    # 로컬 가격 저장소: 빠진 날짜 구간만 받아서 붙이고, 1년치 창은 로컬에서 꺼냄
+    if price_store is None:
+        price_store = PriceStore(offline=offline)
+
+    # 벤치마크(QQQ/SPY/IWM/섹터 ETF)는 실행당 한 번만 받고 수익률도 한 번만 계산
+    with METRICS.timer('benchmarks'):
+        benchmarks = load_benchmarks(price_store)
+    primary_close = benchmarks.get(rs_engine.PRIMARY_BENCHMARK)
+    max_window = max(rs_engine.RS_WINDOWS.values())
+    benchmark_returns = {name: rs_engine.compute_benchmark_returns(close)
+                         for name, close in benchmarks.items() if close is not None and len(close) > max_window}
+    extra_returns = {name: benchmark_returns[name] for name in rs_engine.EXTRA_BENCHMARKS if name in benchmark_returns}
+
+    if checkpoint is not None and checkpoint.has_stage('prices'):
+        # 가격 단계(배치 + 재시도)가 이미 끝난 실행 → 메타데이터 단계부터
+        print(f"[Checkpoint] 가격 단계 결과 재사용 ({checkpoint.run_id})")
+        results = ScanTable.load(checkpoint.load_stage('prices'))
+    else:
+        with METRICS.timer('prices'):
+            results = _compute_price_rows(ticker_info_list, batch_size, price_store, offline, checkpoint,
+                                          primary_close, extra_returns, workers)
+        if checkpoint is not None:
+            checkpoint.save_stage('prices', results)
+
+    # --- 메타데이터 단계 (가격 계산과 분리) ---
+    # Sector/Industry/발행주식수는 TTL 캐시에서 읽고, 만료/누락된 티커만 일괄 조회
+    # 시총은 실시간 호출 대신 캐시된 발행주식수 × 최신 종가
+    # 조회 도중 죽어도 재실행 시 다시 받지 않도록 일정 개수마다 캐시 저장
+    with METRICS.timer('metadata'):
+        if not offline:
+            metadata.refresh_metadata(SECTOR_CACHE, {t: sanitize_ticker_for_yf(t) for t in results.tickers},
+                                      on_chunk=save_sector_cache, first=new_tickers)
+        # 캐시 적중/미스는 티커당 한 번만: refresh_metadata에서 셌으면 여기서는 세지 않음
+        metadata.attach_metadata(results, SECTOR_CACHE, count=offline)
+
+    # 섹터 ETF 대비 RS (섹터는 메타데이터 단계 이후에 알 수 있음)
+    rs_engine.attach_sector_rs(results, rs_engine.compute_benchmark_returns(primary_close), benchmark_returns)
+
+    # 작업 완료 후 캐시 저장
+    save_sector_cache()
+
+    METRICS.set('sector_cache', {'hits': SECTOR_CACHE.hits, 'misses': SECTOR_CACHE.misses,
+                                 'hit_rate': hit_rate(SECTOR_CACHE.hits, SECTOR_CACHE.misses)})
+    METRICS.set('price_store', dict(price_store.stats))
+    METRICS.set('scheduler', dict(price_store.scheduler.stats))
     
-    # QQQ 데이터 미리 확보 (벤치마크)
-    print("벤치마크 (QQQ) 데이터 다운로드 중...")
-    try:
-        # 120영업일(6mo) 확보를 위해 1년치 데이터 요청
-        qqq_data = yf.download("QQQ", period="1y", progress=False)
-        if len(qqq_data) < 121:
-            print("경고: QQQ 데이터가 충분하지 않아 RS 계산이 부정확할 수 있습니다.")
-    except Exception as e:
-        print(f"QQQ 다운로드 실패: {e}")
-        qqq_data = pd.DataFrame()
+    return results
+
+def _compute_price_rows(ticker_info_list, batch_size, price_store, offline, checkpoint, qqq_close, extra_returns=None,
+                        workers=None):
+    """
+    가격 단계: 가격 갱신 → 배치별 RS/50DIV 계산 → 일시적 실패 티커만 재시도
+    체크포인트에 있는 배치는 계산하지 않고 저장된 결과를 사용합니다.
+    결과는 배치가 끝날 때마다 ScanTable(컬럼형)에 옮기고 배치 프레임/행 dict는 바로 버립니다.
+    실패 사유는 failures.json으로 따로 저장합니다.
+    workers: 계산 프로세스 수 (None이면 parallel_compute.COMPUTE_WORKERS, 1이면 한 프로세스)
+    """
+    import indicators
+    import parallel_compute
 
+    results = ScanTable()
+    failures = {}  # {원래 티커: 실패 사유}
+    total_tickers = len(ticker_info_list)
+
+    done_batches = set(checkpoint.completed_batches()) if checkpoint is not None else set()
+    if done_batches:
+        print(f"[Checkpoint] 완료된 배치 {len(done_batches)}개 재사용 ({checkpoint.run_id})")
+
+    # 1. 주가 데이터 일괄 갱신 (Price & RS용, 체크포인트에 없는 배치만)
+    # FetchScheduler가 여러 배치를 동시에 받고 요청 제한/백오프를 처리하므로 배치 간 sleep 불필요
+    pending_yf_tickers = [
+        sanitize_ticker_for_yf(item['Ticker'])
+        for i in range(0, total_tickers, batch_size) if i // batch_size not in done_batches
+        for item in ticker_info_list[i:i+batch_size]
+    ]
+    if pending_yf_tickers:
+        print(f"가격 데이터 갱신 중... ({len(pending_yf_tickers)}개)")
+        with METRICS.timer('price_update'):
+            price_store.update(pending_yf_tickers)
+
+    # 2. 배치별 RS/50DIV 일괄 계산 + 실패 사유 분류
+    # 체크포인트에 있는 배치는 저장된 결과 사용, 나머지는 parallel_compute로 (티커가 많으면 프로세스 풀)
+    pending_batches = []
     for i in range(0, total_tickers, batch_size):
-        batch = ticker_info_list[i:i+batch_size]
-        batch_tickers = [item['Ticker'] for item in batch]
-        print(f"Processing batch {i} to {min(i+batch_size, total_tickers)}: {batch_tickers}")
-        
-        try:
-            # 1. 주가 데이터 일괄 다운로드 (Price & RS용)
-            # Yahoo Finance용 포맷으로 변환
-            sanitized_batch_tickers = [sanitize_ticker_for_yf(t) for t in batch_tickers]
-            
-            # 6개월(120영업일) 데이터를 위해 1년치 가져옴
-            data = yf.download(sanitized_batch_tickers, period="1y", progress=False, group_by='ticker')
-            
-            # 2. 각 티커별 정보 처리
-            # 메타데이터(시총 등)는 별도 호출이 필요할 수 있으나, 
-            # yfinance 최신 버전에서는 download로 시총을 못 가져오므로 Ticker.info 접근 필요
-            # 속도를 위해 ThreadPool 사용
-            
-            with ThreadPoolExecutor(max_workers=5) as executor:
-                future_to_ticker = {executor.submit(process_single_ticker, ticker, data, qqq_data): ticker for ticker in batch_tickers}
-                
-                for future in future_to_ticker:
-                    res = future.result()
-                    if res:
-                        results.append(res)
-                        
-        except Exception as e:
-            print(f"Batch 처리 중 에러: {e}")
-            
-        # 딜레이 (옵션)
-        time.sleep(1)
+        batch_index = i // batch_size
+        if batch_index in done_batches:
+            batch_rows, batch_failures = checkpoint.load_batch(batch_index)
+            METRICS.incr('checkpoint.batches_reused')
+            results.extend(batch_rows)
+            failures.update(batch_failures)
+            continue
+        pending_batches.append((batch_index, [item['Ticker'] for item in ticker_info_list[i:i+batch_size]]))
+
+    for batch_index, batch_results, batch_failures, load_seconds, compute_seconds, error in \
+            parallel_compute.compute_batches(pending_batches, price_store, qqq_close, extra_returns, workers):
+        METRICS.add_time('batch_load', load_seconds)
+        METRICS.add_time('batch_compute', compute_seconds)
+        start = batch_index * batch_size
+        print(f"Processed batch {start} to {min(start + batch_size, total_tickers)}: {len(batch_results)}개")
+        results.extend(batch_results)
+        failures.update(batch_failures)
+        if error is not None:
+            # 배치 전체가 일시적 실패로 기록됨 → 체크포인트에 남기지 않고 재시도 대상
+            print(f"Batch 처리 중 에러: {error}")
+            METRICS.incr('batch.errors')
+        elif checkpoint is not None:
+            checkpoint.save_batch(batch_index, batch_results, batch_failures)
     
     # --- Retry Logic (재시도) ---
-    # 1. 실패하거나 RS가 NaN인 티커 식별
-    # results에는 {Ticker, RS_6mo, ...} 딕셔너리가 들어있음.
-    processed_tickers = set()
-    for r in results:
-        if r and 'Ticker' in r:
-            # RS_6mo 기준 검증
-            rs_val = r.get('RS_6mo')
-            is_valid = False
-            if rs_val is not None:
-                try:
-                    if str(rs_val).lower() != 'nan':
-                        processed_tickers.add(r['Ticker'])
-                except:
-                    pass
-
-    all_tickers = {item['Ticker'] for item in ticker_info_list}
-    failed_tickers = list(all_tickers - processed_tickers)
-    
-    if failed_tickers:
-        print(f"\n[Retry] RS 수집 실패/NaN {len(failed_tickers)}개 발견. 배치 재시도 중...")
-        
-        # 재시도도 배치로 처리
-        retry_batch_size = 20
-        for i in range(0, len(failed_tickers), retry_batch_size):
-            batch = failed_tickers[i:i+retry_batch_size]
-            print(f" -> Retry batch {batch}")
-            
+    # 일시적 실패(요청 제한/네트워크, 최근 봉 누락)만 지수 백오프로 재시도
+    # 데이터 없음/상장폐지/이력 부족은 다시 받아도 같으므로 재시도하지 않음
+    retry_summary = {'rounds': 0, 'attempted': 0, 'recovered': 0}
+    for attempt in range(RETRY_ROUNDS):
+        transient = [t for t, reason in failures.items() if reason == 'transient']
+        if not transient or offline:
+            break
+        wait = RETRY_BACKOFF_SECONDS * (2 ** attempt)
+        print(f"\n[Retry {attempt + 1}/{RETRY_ROUNDS}] 일시적 실패 {len(transient)}개, {wait:.0f}초 후 재시도...")
+        time.sleep(wait)
+        retry_summary['rounds'] += 1
+        retry_summary['attempted'] += len(transient)
+
+        # 로컬 저장소를 통해 다시 받음 (이력이 있으면 빠진 구간만 증분 요청)
+        # 오늘 이미 받은 티커도 다시 요청해야 하므로 force=True (아니면 같은 캐시로 다시 계산할 뿐)
+        with METRICS.timer('retry_download'):
+            price_store.update([sanitize_ticker_for_yf(t) for t in transient], force=True)
+        for start in range(0, len(transient), batch_size):
+            batch = transient[start:start + batch_size]
             try:
-                # 배치 다운로드 (Sanitized Ticker 사용)
-                sanitized_retry_batch = [sanitize_ticker_for_yf(t) for t in batch]
-                data = yf.download(sanitized_retry_batch, period="1y", progress=False, group_by='ticker')
-                
-                # 병렬 처리 (메인 로직 재사용)
-                with ThreadPoolExecutor(max_workers=5) as executor:
-                    future_to_ticker = {executor.submit(process_single_ticker, t, data, qqq_data): t for t in batch}
-                    
-                    for future in future_to_ticker:
-                        res = future.result()
-                        if res:
-                            rs_res = res.get('RS_6mo')
-                            if rs_res is not None and str(rs_res).lower() != 'nan':
-                                # 성공 시 기존 결과 제거 후 추가
-                                results = [r for r in results if r['Ticker'] != res['Ticker']]
-                                results.append(res)
-                                print(f"    -> {res['Ticker']} 복구 성공 (RS_6mo: {res['RS_6mo']})")
-                            else:
-                                print(f"    -> {res['Ticker']} 복구 실패")
-                                
+                data = price_store.get_batch([sanitize_ticker_for_yf(t) for t in batch], refresh=False,
+                                             period_days=indicators.history_days(),
+                                             fields=indicators.required_fields())
+                for res in process_batch(batch, data, qqq_close, failures, price_store.fetch_failures, extra_returns):
+                    results.append(res)  # 같은 티커 행은 그 자리에서 교체
+                    if res['Ticker'] not in failures:
+                        retry_summary['recovered'] += 1
+                        print(f"    -> {res['Ticker']} 복구 성공 (RS_6mo: {res['RS_6mo']})")
             except Exception as e:
                 print(f"Retry Batch 에러: {e}")
-            
-            time.sleep(1) # 배치 간 딜레이
 
-    # 작업 완료 후 캐시 저장
-    save_sector_cache()
-    
-    return results
+    if failures:
+        print(f"[Failures] {len(failures)}개 실패 (복구 {retry_summary['recovered']}개)")
+    METRICS.set('retry', retry_summary)
+    METRICS.set('failures_by_reason', dict(Counter(failures.values())))
+    write_failure_report(failures, retry_summary)
+    if checkpoint is not None:
+        checkpoint.save_stage('failures', failures)
 
-def process_single_ticker(original_ticker, batch_data, qqq_data):
+    # 병렬 계산/체크포인트 재사용과 관계없이 유니버스 순서로 반환 (히스토리 델타가 행 순서에 의존)
+    METRICS.set('scan_table_mb', round(results.nbytes / 1e6, 2))
+    return results.reorder(item['Ticker'] for item in ticker_info_list)
+
+def load_benchmarks(price_store):
     """
-    단일 티커에 대한 RS 계산 및 Info 처리를 수행합니다.
+    벤치마크 종가를 한 번에 갱신하고 {티커: 종가 Series 또는 None}으로 반환합니다.
+    (rs_engine.benchmark_tickers(): 기본 + 추가 벤치마크 + 섹터 ETF)
     """
+    import indicators
+    import rs_engine
+
+    tickers = rs_engine.benchmark_tickers()
+    print(f"벤치마크 데이터 다운로드 중... ({', '.join(tickers)})")
     try:
-        # Sanitize for API usage locally
-        yf_ticker = sanitize_ticker_for_yf(original_ticker)
-        
-        # 데이터 추출 (MultiIndex 처리)
-        if isinstance(batch_data.columns, pd.MultiIndex):
-             # batch_data['Close'][ticker] 와 같은 형태로 접근
-             if yf_ticker in batch_data.columns.levels[0]:
-                 df = batch_data[yf_ticker]
-             else:
-                 # 티커가 하나뿐일 경우 구조가 다를 수 있음 처리
-                 # download시 list로 넘겼으므로 보통 MultiIndex임.
-                 # 데이터가 없는 경우
-                 return None
-        else:
-            # 티커가 1개인 배치였을 경우
-            df = batch_data
-            
-        # Close Price 확인
-        if 'Close' not in df.columns or df.empty:
-            return None
-            
-        hist = df['Close']
-        
-        # --- RS Calculation Logic Update ---
-        # 기간: 
-        # 1mo = 20영업일
-        # 3mo = 60영업일
-        # 6mo = 120영업일
-        
-        idx_latest = -1
-        idx_1mo = -21
-        idx_3mo = -61
-        idx_6mo = -121
-        
-        # 데이터 길이 체크
-        data_len = len(hist)
-        qqq_len = len(qqq_data) if not qqq_data.empty else 0
-        
-        # Helper Inner Function
-        def calc_return(series, idx_start, idx_end):
-            try:
-                if len(series) < abs(idx_start): return None
-                curr = float(series.iloc[idx_end])
-                prev = float(series.iloc[idx_start])
-                if prev == 0: return 0
-                return (curr - prev) / prev
-            except:
-                return None
-
-        # 1. Calculate Returns
-        stock_ret_1mo = calc_return(hist, idx_1mo, idx_latest)
-        stock_ret_3mo = calc_return(hist, idx_3mo, idx_latest)
-        stock_ret_6mo = calc_return(hist, idx_6mo, idx_latest)
-        
-        # 2. Benchmark Returns
-        if qqq_len < 121:
-            # QQQ 데이터 부족 시 0 처리 혹은 None
-            qqq_ret_1mo = 0
-            qqq_ret_3mo = 0
-            qqq_ret_6mo = 0
-        else:
-            q_hist = qqq_data['Close']
-            qqq_ret_1mo = calc_return(q_hist, idx_1mo, idx_latest) or 0
-            qqq_ret_3mo = calc_return(q_hist, idx_3mo, idx_latest) or 0
-            qqq_ret_6mo = calc_return(q_hist, idx_6mo, idx_latest) or 0
+        # 120영업일(6mo) 확보를 위해 1년치 데이터 사용
+        price_store.update(tickers)
+    except Exception as e:
+        print(f"벤치마크 다운로드 실패: {e}")
 
-        # 3. RS Calculation (Difference)
-        # RS = Stock_Return - QQQ_Return
-        
-        rs_1mo = (stock_ret_1mo - qqq_ret_1mo) if stock_ret_1mo is not None else 0
-        rs_3mo = (stock_ret_3mo - qqq_ret_3mo) if stock_ret_3mo is not None else 0
-        rs_6mo = (stock_ret_6mo - qqq_ret_6mo) if stock_ret_6mo is not None else 0
-        
-        latest_price = float(hist.iloc[-1]) if not hist.empty else 0
-        
-        # 메타데이터 (Market Cap, Sector, Industry)
-        # For Metadata, loop up using sanitied ticker
-        t = yf.Ticker(yf_ticker)
-        
-        # 1. Sector/Industry (Cache Check) uses ORIGINAL ticker key usually, 
-        # but for API fetch we must use yf_ticker.
-        # Let's keep cache key as valid yf_ticker to avoid confusion, OR use original.
-        # User list has original. Let's try to stick to original for cache key if possible, 
-        # but the cached data implies 'what returns from API'.
-        # Actually simplest is: Use ORIGINAL for UI/Result, use YF_TICKER for API.
-        
-        cached = SECTOR_CACHE.get(original_ticker) 
-        sector = "N/A"
-        industry = "N/A"
-        
-        # Check Cache
-        if cached and cached.get('Sector') not in ['N/A', 'nan', 'NONE'] and cached.get('Industry') not in ['N/A', 'nan', 'NONE']:
-            sector = cached['Sector']
-            industry = cached['Industry']
-        else:
-            # Fetch Metadata
-            if sector == "N/A" and industry == "N/A":
-                try:
-                    info = t.info 
-                    
-                    quote_type = info.get('quoteType', '').upper()
-                    
-                    if 'ETF' in quote_type:
-                        sector = 'ETF'
-                        industry = 'ETF' # User requested both to be ETF
-                    elif 'ETN' in quote_type: 
-                        sector = 'ETN'
-                        industry = 'ETN' # User requested both to be ETN
-                    else:
-                        sector = info.get('sector', 'N/A')
-                        industry = info.get('industry', 'N/A')
-
-                    if not sector: sector = 'N/A'
-                    if not industry: industry = 'N/A'
-                        
-                    # Save to Cache using ORIGINAL key for consistency
-                    SECTOR_CACHE[original_ticker] = {'Sector': sector, 'Industry': industry}
-                except:
-                    sector = 'N/A'
-                    industry = 'N/A'
-
-        # 2. Market Cap (Fast Info)
-        market_cap = 0
+    closes = {}
+    period_days = indicators.history_days()  # RS 라인 지표(52주 신고가 등)도 종목과 같은 기간
+    for ticker in tickers:
         try:
-            market_cap = t.fast_info['market_cap']
-        except:
-            pass
-        
-        # 3. 50-day Moving Average Divergence (50DIV)
-        div_50 = None
-        try:
-            if len(hist) >= 50:
-                ma_50 = hist.iloc[-50:].mean()
-                if ma_50 != 0:
-                    div_50 = round(((latest_price - ma_50) / ma_50) * 100, 2)
+            closes[ticker] = extract_benchmark_close(price_store.window(ticker, period_days))
         except Exception as e:
-            print(f"50DIV 계산 에러 ({original_ticker}): {e}")
-            
-        return {
-            'Ticker': original_ticker, # Return original for UI
-            'Price': float(latest_price),
-            'Market Cap': f"{market_cap / 1e9:.2f}B" if market_cap else "N/A",
-            'RS_6mo': float(rs_6mo),
-            'RS_3mo': float(rs_3mo),
-            'RS_1mo': float(rs_1mo),
-            '50DIV': div_50,  # 50일 이동평균 괴리율
-            'Sector': sector,
-            'Industry': industry
+            print(f"벤치마크 로드 실패 ({ticker}): {e}")
+            closes[ticker] = None
+
+    primary = closes.get(rs_engine.PRIMARY_BENCHMARK)
+    if primary is None or len(primary) < max(rs_engine.RS_WINDOWS.values()) + 1:
+        print(f"경고: {rs_engine.PRIMARY_BENCHMARK} 데이터가 충분하지 않아 RS 계산이 부정확할 수 있습니다.")
+    missing = [t for t, close in closes.items() if close is None]
+    if missing:
+        print(f"경고: 벤치마크 데이터 없음 ({', '.join(missing)}) → 해당 RS 컬럼 생략")
+    return closes
+
+def extract_benchmark_close(benchmark_data):
+    """
+    벤치마크 download 결과에서 종가 Series만 꺼냅니다.
+    (yfinance 버전에 따라 단일 티커도 MultiIndex 컬럼으로 내려옴)
+    """
+    import pandas as pd
+
+    if benchmark_data is None or benchmark_data.empty or 'Close' not in benchmark_data.columns.get_level_values(0):
+        return None
+    close = benchmark_data['Close']
+    if isinstance(close, pd.DataFrame):
+        close = close.iloc[:, 0]
+    return close.astype('float64')
+
+def process_batch(original_tickers, batch_data, benchmark_close, failures=None, fetch_failures=None, extra_returns=None):
+    """
+    배치 단위로 RS/50DIV를 벡터 연산으로 계산해 결과 리스트를 반환합니다.
+    - 가격 계산: rs_engine.compute_rs_frame (배치 전체 1회, 벤치마크 수익률도 1회)
+    - Market Cap/Sector/Industry는 자리만 잡아두고 메타데이터 단계(metadata.attach_metadata)에서 채움
+    failures(dict)가 주어지면 RS_6mo를 못 구한 티커의 실패 사유를 기록합니다 (classify_failure 참고).
+    extra_returns({벤치마크: {기간: 수익률}})가 주어지면 벤치마크별 RS 컬럼(RS_6mo_SPY 등)을 덧붙입니다.
+    indicators.json에서 켠 추가 지표(20DIV, ATR_Pct 등)는 같은 배치 행렬로 한 번에 계산해 맨 뒤에 붙입니다.
+    """
+    import pandas as pd
+    import indicators
+    import rs_engine
+
+    yf_to_original = {sanitize_ticker_for_yf(t): t for t in original_tickers}
+    close = rs_engine.extract_close_matrix(batch_data, list(yf_to_original))
+
+    # 요청하지 않은 컬럼은 무시 (다운로드 결과에 없는 티커는 기존처럼 결과에서 제외 → 재시도 대상)
+    if not close.empty:
+        close = close.loc[:, [c for c in close.columns if c in yf_to_original]]
+
+    if failures is not None:
+        reference_date = benchmark_close.index[-1] if benchmark_close is not None and len(benchmark_close) else None
+        for yf_ticker, original in yf_to_original.items():
+            series = close[yf_ticker] if yf_ticker in close.columns else None
+            fetch_reason = (fetch_failures or {}).get(yf_ticker)
+            reason = classify_failure(series, reference_date, fetch_reason)
+            if reason:
+                failures[original] = reason
+            else:
+                failures.pop(original, None)
+
+    if close.empty:
+        return []
+    rs_frame = rs_engine.compute_rs_frame(close, benchmark_close, extra_returns=extra_returns)
+    extra_columns = list(rs_frame.columns[5:])  # Price, RS_6mo, RS_3mo, RS_1mo, 50DIV 뒤의 벤치마크별 RS
+    indicator_frame = indicators.compute(batch_data, close, benchmark_close)
+    flag_columns = {col for col in indicator_frame.columns if indicator_frame[col].dtype == bool}
+    indicator_rows = indicator_frame.to_dict('index')
+
+    results = []
+    for yf_ticker, row in rs_frame.iterrows():
+        div_50 = row['50DIV']
+        item = {
+            'Ticker': yf_to_original[yf_ticker], # Return original for UI
+            'Price': float(row['Price']),
+            'Market Cap': "N/A",
+            'RS_6mo': float(row['RS_6mo']),
+            'RS_3mo': float(row['RS_3mo']),
+            'RS_1mo': float(row['RS_1mo']),
+            '50DIV': None if pd.isna(div_50) else float(div_50),  # 50일 이동평균 괴리율
+            'Sector': "N/A",
+            'Industry': "N/A"
         }
+        for col in extra_columns:
+            item[col] = float(row[col])
+        for col, value in indicator_rows.get(yf_ticker, {}).items():
+            item[col] = None if pd.isna(value) else (bool(value) if col in flag_columns else float(value))
+        results.append(item)
+    return results
+
+def classify_failure(series, reference_date, fetch_reason=None):
+    """
+    RS_6mo를 계산할 수 없는 티커의 실패 사유를 분류합니다. 정상이면 None.
+    - 'transient': 다운로드 자체가 실패(요청 제한/네트워크)했거나 최근 봉 몇 개만 빠짐 → 재시도 대상
+    - 'no_data': Yahoo에 가격 데이터가 없음 (티커 오류 등)
+    - 'delisted': 마지막 봉이 기준일보다 DELISTED_LAG_DAYS 넘게 오래됨 (상장폐지/거래정지)
+    - 'short_history': 6mo(121봉) 계산에 필요한 이력이 부족 (신규 상장 등)
+    """
+    import rs_engine
+
+    if series is None or series.notna().sum() == 0:
+        return fetch_reason or 'no_data'
+
+    last_valid = series.last_valid_index()
+    if reference_date is not None and last_valid < reference_date:
+        lag_days = (reference_date - last_valid).days
+        return 'delisted' if lag_days > DELISTED_LAG_DAYS else 'transient'
 
+    window = rs_engine.RS_WINDOWS['6mo'] + 1
+    if len(series) < window or _is_missing(series.iloc[-window]):
+        return 'short_history'
+    return None
+
+def write_failure_report(failures, retry_summary=None, path=FAILURE_REPORT_FILE):
+    """실패 사유별 티커 목록을 별도 파일(static/failures.json)로 저장"""
+    by_reason = {}
+    for ticker, reason in sorted(failures.items()):
+        by_reason.setdefault(reason, []).append(ticker)
+    report = {
+        "last_updated": time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime()),
+        "total_failed": len(failures),
+        "counts": {reason: len(tickers) for reason, tickers in by_reason.items()},
+        "by_reason": by_reason,
+        "retry": retry_summary or {},
+    }
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, separators=(',', ':'))
+        print(f"실패 리포트 저장: {path} {report['counts']}")
     except Exception as e:
-        print(f"Error processing {original_ticker}: {e}")
-        return None
+        print(f"실패 리포트 저장 에러: {e}")